@@ -11,6 +11,8 @@ from django.views import View
 from django.views.generic import TemplateView, FormView
 from django_ratelimit.decorators import ratelimit
 
+from daily import activity
+
 from .forms import SignUpForm, OnboardingForm
 from .models import User, EmailVerificationToken, UserOnboarding, DeletionOTP
 from .email_utils import send_verification_email, send_deletion_otp_email, send_password_reset_email
@@ -249,6 +251,9 @@ class DashboardView(OnboardingCompletedMixin, TemplateView):
         context['otp_requested'] = DeletionOTP.objects.filter(
             user=self.request.user, is_used=False
         ).exists()
+        # Daily quiz activity, read from the per-day bitmaps
+        context['daily_streak']      = activity.streak(self.request.user.id)
+        context['daily_active_days'] = activity.active_days(self.request.user.id, days=30)
         return context
 
 
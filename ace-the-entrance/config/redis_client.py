@@ -0,0 +1,33 @@
+# config/redis_client.py
+"""
+Direct access to the Redis server behind the default cache, for the
+features that need more than get/set: the daily activity bitmaps
+(daily.activity) and the exam telemetry stream (sxcmodel.telemetry).
+"""
+from django.conf import settings
+
+_redis = None
+
+
+def redis_client():
+    """
+    Redis client on the same server as the default cache, or None when the
+    cache is not Redis (local dev, tests) or redis-py is unavailable.
+    Created once per process and shared by every caller.
+    """
+    global _redis
+    if _redis is None:
+        conf = settings.CACHES.get('default', {})
+        if not conf.get('BACKEND', '').endswith('RedisCache'):
+            _redis = False
+        else:
+            try:
+                import redis
+            except ImportError:
+                _redis = False
+            else:
+                location = conf['LOCATION']
+                if isinstance(location, (list, tuple)):
+                    location = location[0]
+                _redis = redis.Redis.from_url(location)
+    return _redis or None
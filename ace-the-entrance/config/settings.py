@@ -240,7 +240,13 @@ LOGGING = {
 # ── Cron ──────────────────────────────────────────────────────────────────────
 
 CRONJOBS = [
-    ('1 0 * * *', 'django.core.management.call_command', ['create_daily_quiz'])
+    # 18:00 UTC = 23:45 in Nepal: tomorrow's quiz exists before local midnight.
+    ('0 18 * * *', 'django.core.management.call_command', ['plan_daily_quiz']),
+    ('* * * * *', 'django.core.management.call_command', ['flush_exam_telemetry']),
+    # 18:30 UTC = 00:15 in Nepal: yesterday's activity bitmap is final.
+    ('30 18 * * *', 'django.core.management.call_command', ['persist_daily_activity']),
+    ('*/10 * * * *', 'django.core.management.call_command', ['refresh_hot_scores']),
+    ('*/5 * * * *', 'django.core.management.call_command', ['compress_pending_images']),
 ]
 
 # ── Email ─────────────────────────────────────────────────────────────────────
@@ -0,0 +1,267 @@
+# daily/activity.py
+"""
+Daily-quiz activity, streaks and active-user counts from Redis bitmaps.
+
+Each quiz day (Nepal time) is one bitmap: bit N is set when user id N
+submitted that day's quiz.  A day costs max(user id) / 8 bytes no matter
+how many users played — 100k users fit in 12.5 KB — and every question
+below is a handful of GETBIT / BITCOUNT / BITOP calls:
+
+    mark_active(user_id)           record today's activity
+    streak(user_id)                consecutive active days up to today
+    active_days(user_id, days)     how many of the last `days` were active
+    active_users(start, end)       distinct users active in the range (DAU, WAU)
+    retention(cohort_date, after)  of the users active on cohort_date, how
+                                   many came back N days later
+
+streak() and active_days() are cached per user per quiz day (the
+dashboard asks on every load); mark_active() drops that user's entry.
+
+`persist_daily_activity` copies the bitmaps into ActivityBitmap every
+night and restores any that Redis has lost.  When the cache is not Redis
+(local dev, tests) the same bytes live in the Django cache and the
+bit arithmetic runs in Python.
+"""
+import datetime
+import uuid
+
+from django.core.cache import cache
+
+from config.redis_client import redis_client
+from daily.models import ActivityBitmap
+from daily.script import WEEKEND, quiz_today
+
+
+# ── Constants ─────────────────────────────────────────────────────────────────
+
+KEY_PREFIX   = 'daily:active:'
+STATS_PREFIX = 'daily:activity-stats:'
+STATS_TTL    = 86400    # cached streak / active-day counts are keyed by day anyway
+KEEP_DAYS    = 400      # bitmaps older than this expire from Redis; the table keeps them
+STREAK_CHUNK = 60       # days fetched per round-trip while walking back a streak
+
+
+def _key(day):
+    return f'{KEY_PREFIX}{day.isoformat()}'
+
+
+def _stats_key(user_id, day):
+    return f'{STATS_PREFIX}{day.isoformat()}:{user_id}'
+
+
+def _cached_stat(user_id, day, name, compute):
+    """One user's per-day numbers share a cache entry: {name: value}."""
+    key = _stats_key(user_id, day)
+    stats = cache.get(key) or {}
+    if name not in stats:
+        stats[name] = compute()
+        cache.set(key, stats, STATS_TTL)
+    return stats[name]
+
+
+def _ttl(day):
+    """Seconds until `day` falls out of the KEEP_DAYS window."""
+    expires = day + datetime.timedelta(days=KEEP_DAYS)
+    return max(1, (expires - quiz_today()).days * 86400)
+
+
+# ── Python fallback (same bit layout as Redis: bit 0 is the MSB of byte 0) ────
+
+def _get_bit(bits, offset):
+    index = offset >> 3
+    return index < len(bits) and bool(bits[index] & (0x80 >> (offset & 7)))
+
+
+def _local_bitmaps(days):
+    """{day: bytes} from the Django cache, falling back to the persisted table."""
+    found = cache.get_many([_key(day) for day in days])
+    bitmaps = {day: found.get(_key(day), b'') for day in days}
+    missing = [day for day in days if not bitmaps[day]]
+    if missing:
+        for row in ActivityBitmap.objects.filter(date__in=missing):
+            bitmaps[row.date] = bytes(row.bits)
+    return bitmaps
+
+
+# ── Public API ────────────────────────────────────────────────────────────────
+
+def mark_active(user_id, day=None):
+    """Set the user's bit for `day` (default: today in Nepal).  Idempotent."""
+    day = day or quiz_today()
+    client = redis_client()
+    if client:
+        pipe = client.pipeline(transaction=False)
+        pipe.setbit(_key(day), user_id, 1)
+        pipe.expire(_key(day), _ttl(day))
+        pipe.execute()
+        cache.delete(_stats_key(user_id, day))
+        return
+
+    # Read-modify-write is not atomic here; fine for a single dev process.
+    bits = bytearray(_local_bitmaps([day])[day])
+    index = user_id >> 3
+    if index >= len(bits):
+        bits.extend(b'\0' * (index + 1 - len(bits)))
+    bits[index] |= 0x80 >> (user_id & 7)
+    cache.set(_key(day), bytes(bits), _ttl(day))
+    cache.delete(_stats_key(user_id, day))
+
+
+def _user_bits(user_id, days):
+    """[active?] for each of `days`, in order — one pipelined round-trip."""
+    client = redis_client()
+    if client:
+        pipe = client.pipeline(transaction=False)
+        for day in days:
+            pipe.getbit(_key(day), user_id)
+        return [bool(bit) for bit in pipe.execute()]
+    bitmaps = _local_bitmaps(days)
+    return [_get_bit(bitmaps[day], user_id) for day in days]
+
+
+def is_active(user_id, day=None):
+    return _user_bits(user_id, [day or quiz_today()])[0]
+
+
+def streak(user_id, today=None):
+    """
+    Consecutive active days ending today — or ending yesterday if today's
+    quiz hasn't been played yet, since the streak is still alive until the
+    day is over.  Weekends have no quiz and are skipped.  Walks back
+    STREAK_CHUNK days per round-trip, up to KEEP_DAYS.
+    """
+    today = today or quiz_today()
+    return _cached_stat(user_id, today, 'streak', lambda: _streak(user_id, today))
+
+
+def _streak(user_id, today):
+    count = 0
+    offset = 0
+    while offset < KEEP_DAYS:
+        days = [today - datetime.timedelta(days=offset + i) for i in range(STREAK_CHUNK)]
+        days = [day for day in days if day.weekday() != WEEKEND]    # no quiz, no gap
+        for day, active in zip(days, _user_bits(user_id, days)):
+            if active:
+                count += 1
+            elif day != today:        # a missed day before today ends the streak
+                return count
+        offset += STREAK_CHUNK
+    return count
+
+
+def active_days(user_id, days=30, today=None):
+    """Number of the last `days` days (including today) the user was active."""
+    today = today or quiz_today()
+    return _cached_stat(
+        user_id, today, f'days:{days}',
+        lambda: sum(_user_bits(user_id, [today - datetime.timedelta(days=i) for i in range(days)])),
+    )
+
+
+def _count(days, op):
+    """BITCOUNT of one bitmap, or of the BITOP `op` ('OR' / 'AND') of several."""
+    client = redis_client()
+    if client:
+        if len(days) == 1:
+            return client.bitcount(_key(days[0]))
+        tmp = f'{KEY_PREFIX}tmp:{uuid.uuid4().hex}'
+        pipe = client.pipeline(transaction=False)
+        pipe.bitop(op, tmp, *[_key(day) for day in days])
+        pipe.bitcount(tmp)
+        pipe.delete(tmp)
+        return pipe.execute()[1]
+
+    bitmaps = list(_local_bitmaps(days).values())
+    width = max((len(bits) for bits in bitmaps), default=0)
+    values = [int.from_bytes(bits.ljust(width, b'\0'), 'big') for bits in bitmaps]
+    result = values[0]
+    for value in values[1:]:
+        result = result | value if op == 'OR' else result & value
+    return bin(result).count('1')
+
+
+def active_users(start, end=None):
+    """Distinct users active on any day from `start` to `end` inclusive."""
+    end = end or start
+    days = [start + datetime.timedelta(days=i) for i in range((end - start).days + 1)]
+    return _count(days, 'OR')
+
+
+def daily_active(day=None):
+    return active_users(day or quiz_today())
+
+
+def weekly_active(day=None):
+    """Users active in the seven days ending on `day`."""
+    day = day or quiz_today()
+    return active_users(day - datetime.timedelta(days=6), day)
+
+
+def retention(cohort_date, after=(1, 7, 30)):
+    """
+    {"cohort": n, "retained": {N: m, …}}: of the n users active on
+    cohort_date, m were also active N days later.  Days still in the
+    future are left out.
+    """
+    today = quiz_today()
+    retained = {}
+    for n in after:
+        later = cohort_date + datetime.timedelta(days=n)
+        if later <= today:
+            retained[n] = _count([cohort_date, later], 'AND')
+    return {'cohort': _count([cohort_date], 'OR'), 'retained': retained}
+
+
+# ── Persistence (persist_daily_activity) ──────────────────────────────────────
+
+def persist(days):
+    """
+    Copy each of `days` from Redis (or the dev cache) into ActivityBitmap.
+    Returns the number of days written.
+    """
+    client = redis_client()
+    if client:
+        pipe = client.pipeline(transaction=False)
+        for day in days:
+            pipe.get(_key(day))
+        bitmaps = dict(zip(days, pipe.execute()))
+    else:
+        found = cache.get_many([_key(day) for day in days])
+        bitmaps = {day: found.get(_key(day)) for day in days}
+
+    written = 0
+    for day, bits in bitmaps.items():
+        if not bits:
+            continue
+        ActivityBitmap.objects.update_or_create(
+            date=day,
+            defaults={'bits': bits, 'active_count': bin(int.from_bytes(bits, 'big')).count('1')},
+        )
+        written += 1
+    return written
+
+
+def restore():
+    """
+    Put back any bitmap still inside the KEEP_DAYS window that Redis has
+    lost (flush, failover).  Returns the number of days restored.
+    """
+    client = redis_client()
+    if not client:
+        return 0
+
+    since = quiz_today() - datetime.timedelta(days=KEEP_DAYS - 1)
+    rows = list(ActivityBitmap.objects.filter(date__gte=since).only('date'))
+    if not rows:
+        return 0
+
+    pipe = client.pipeline(transaction=False)
+    for row in rows:
+        pipe.exists(_key(row.date))
+    missing = [row.date for row, exists in zip(rows, pipe.execute()) if not exists]
+
+    pipe = client.pipeline(transaction=False)
+    for row in ActivityBitmap.objects.filter(date__in=missing):
+        pipe.set(_key(row.date), bytes(row.bits), ex=_ttl(row.date), nx=True)
+    pipe.execute()
+    return len(missing)
@@ -1,8 +1,35 @@
 from django.contrib import admin
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from daily.capacity import forecast
+from daily.models import (
+    Subject, Topic, Question, Choice, DailyQuiz, DailyQuizArchive,
+    DailyResult, ChoiceTally, ActivityBitmap,
+)
+
+
+@admin.register(Subject)
+class SubjectAdmin(admin.ModelAdmin):
+    change_list_template = 'admin/daily/subject/change_list.html'
+
+    def get_urls(self):
+        urls = [
+            path('capacity/', self.admin_site.admin_view(self.capacity_view), name='daily_subject_capacity'),
+        ]
+        return urls + super().get_urls()
+
+    def capacity_view(self, request):
+        """How many days each subject and topic can keep the daily quiz full."""
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Question bank capacity forecast',
+            'report': forecast(),
+        }
+        return TemplateResponse(request, 'admin/daily/capacity.html', context)
 
-from daily.models import Subject, Topic, Question, Choice, DailyQuiz
 
-admin.site.register(Subject)
 admin.site.register(Topic)
 admin.site.register(Question)
 admin.site.register(Choice)
@@ -10,3 +37,31 @@ admin.site.register(Choice)
 @admin.register(DailyQuiz)
 class DailyQuizAdmin(admin.ModelAdmin):
     filter_horizontal = ('questions',)
+
+
+@admin.register(DailyQuizArchive)
+class DailyQuizArchiveAdmin(admin.ModelAdmin):
+    list_display = ('date', 'subject', 'question_count', 'archived_at')
+    exclude = ('body',)
+    readonly_fields = ('date', 'subject', 'question_count', 'etag', 'archived_at')
+
+
+@admin.register(DailyResult)
+class DailyResultAdmin(admin.ModelAdmin):
+    list_display = ('user', 'date', 'score', 'total', 'submitted_at')
+    list_filter = ('date',)
+    raw_id_fields = ('user',)
+
+
+@admin.register(ChoiceTally)
+class ChoiceTallyAdmin(admin.ModelAdmin):
+    list_display = ('date', 'choice', 'picks')
+    list_filter = ('date',)
+    raw_id_fields = ('choice',)
+
+
+@admin.register(ActivityBitmap)
+class ActivityBitmapAdmin(admin.ModelAdmin):
+    list_display = ('date', 'active_count', 'updated_at')
+    exclude = ('bits',)
+    readonly_fields = ('date', 'active_count', 'updated_at')
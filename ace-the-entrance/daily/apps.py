@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class DailyConfig(AppConfig):
     name = 'daily'
+
+    def ready(self):
+        import daily.signals  # noqa
@@ -0,0 +1,118 @@
+# daily/capacity.py
+"""
+How long each subject's and topic's question pool lasts under the daily
+quiz rules (REPETITION-day cooldown, QUESTIONS_PER_QUIZ per quiz, at most
+MAX_PER_TOPIC per topic).
+
+Everything comes from one grouped query over Question — per topic: how
+many questions are active, how many are eligible today, and when the
+earliest cooling-down one comes back.  The rest is arithmetic:
+
+    demand per quiz   a topic gives min(MAX_PER_TOPIC, QUESTIONS_PER_QUIZ /
+                      topics) questions to each of its subject's quizzes
+    sustainable       active questions cover every quiz held during one
+                      cooldown, so the pool refills before it empties
+    days left         otherwise, eligible / demand quizzes, one every
+                      7 / quizzes-per-week days
+
+Used by the daily_capacity command and the Subject admin report.
+"""
+import datetime
+import math
+
+from django.db.models import Count, Min, Q
+
+from daily.models import Question
+from daily.script import DAY_MAP, MAX_PER_TOPIC, QUESTIONS_PER_QUIZ, REPETITION, WEEKEND, quiz_today
+
+
+def _quizzes_per_week():
+    counts = {}
+    for weekday, subject in DAY_MAP.items():
+        if weekday != WEEKEND:
+            counts[subject] = counts.get(subject, 0) + 1
+    return counts
+
+
+def _days_left(eligible, active, demand, interval):
+    """None when the pool never runs dry; otherwise days until it does."""
+    if demand <= 0:
+        return None
+    quizzes_per_cooldown = math.ceil(REPETITION / interval)
+    if active >= demand * quizzes_per_cooldown:
+        return None
+    quizzes = math.floor(round(eligible / demand, 6))     # 20 / (10/3) is 6, not 5.999…
+    return int(quizzes * interval)
+
+
+def forecast(today=None):
+    """
+    [{subject, quizzes_per_week, active, eligible, fills_today, days_left,
+      topics: [{topic, active, eligible, cooling, next_release, demand,
+                days_left}, …]}, …]
+    sorted with the subjects that run out soonest first.  days_left is
+    None when the pool is sustainable, and for subjects with no quiz day.
+    """
+    today = today or quiz_today()
+    limit_date = today - datetime.timedelta(days=REPETITION)
+    live = Q(is_active=True)
+    eligible = live & (Q(last_appeared__lt=limit_date) | Q(last_appeared__isnull=True))
+    cooling = live & Q(last_appeared__gte=limit_date)
+
+    rows = (
+        Question.objects
+        .values('topic_id', 'topic__name', 'topic__subject__name')
+        .annotate(
+            active=Count('id', filter=live),
+            eligible=Count('id', filter=eligible),
+            cooling=Count('id', filter=cooling),
+            oldest_cooling=Min('last_appeared', filter=cooling),
+        )
+        .order_by('topic__subject__name', 'topic__name')
+    )
+
+    per_week = _quizzes_per_week()
+    subjects = {}
+    for row in rows:
+        subjects.setdefault(row['topic__subject__name'], []).append(row)
+
+    report = []
+    for name, topic_rows in subjects.items():
+        weekly = per_week.get(name, 0)
+        interval = 7 / weekly if weekly else None
+        stocked = [row for row in topic_rows if row['active']]
+        demand = min(MAX_PER_TOPIC, QUESTIONS_PER_QUIZ / len(stocked)) if stocked else 0
+
+        topics = []
+        for row in topic_rows:
+            release = row['oldest_cooling']
+            topics.append({
+                'topic': row['topic__name'],
+                'active': row['active'],
+                'eligible': row['eligible'],
+                'cooling': row['cooling'],
+                'next_release': release + datetime.timedelta(days=REPETITION) if release else None,
+                'demand': round(demand, 1) if row['active'] else 0,
+                'days_left': (
+                    _days_left(row['eligible'], row['active'], demand, interval)
+                    if interval and row['active'] else None
+                ),
+            })
+
+        active = sum(row['active'] for row in topic_rows)
+        eligible_total = sum(row['eligible'] for row in topic_rows)
+        report.append({
+            'subject': name,
+            'quizzes_per_week': weekly,
+            'active': active,
+            'eligible': eligible_total,
+            # What _pick_balanced could pick today, with the per-topic cap.
+            'fills_today': sum(min(row['eligible'], MAX_PER_TOPIC) for row in topic_rows) >= QUESTIONS_PER_QUIZ,
+            'days_left': (
+                _days_left(eligible_total, active, QUESTIONS_PER_QUIZ, interval) if interval else None
+            ),
+            'topics': topics,
+        })
+
+    report.sort(key=lambda s: (s['days_left'] is None, s['days_left'] or 0, s['subject']))
+    return report
@@ -0,0 +1,52 @@
+"""
+Management command to forecast how long each subject's question bank
+lasts before generate_daily_quiz starts returning short quizzes.
+
+Usage:
+    python manage.py daily_capacity
+    python manage.py daily_capacity --topics    # per-topic breakdown too
+
+The same report is in the admin under Daily › Subjects › Capacity forecast.
+"""
+
+from django.core.management.base import BaseCommand
+
+from daily.capacity import forecast
+
+
+def _left(days):
+    return 'sustainable' if days is None else f'{days} day(s)'
+
+
+class Command(BaseCommand):
+    help = 'Forecasts how many days each subject and topic can keep supplying the daily quiz'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--topics', action='store_true',
+                            help='Show the per-topic breakdown')
+
+    def handle(self, *args, **options):
+        report = forecast()
+        if not report:
+            self.stdout.write(self.style.WARNING("No questions in the bank."))
+            return
+
+        for subject in report:
+            line = (
+                f"{subject['subject']}: {subject['eligible']}/{subject['active']} eligible, "
+                f"{subject['quizzes_per_week']} quiz/week — {_left(subject['days_left'])}"
+            )
+            if not subject['fills_today']:
+                self.stdout.write(self.style.ERROR(f"{line} (cannot fill a full quiz today)"))
+            elif subject['days_left'] is not None:
+                self.stdout.write(self.style.WARNING(line))
+            else:
+                self.stdout.write(self.style.SUCCESS(line))
+
+            if options['topics']:
+                for topic in subject['topics']:
+                    release = f", next back {topic['next_release']}" if topic['next_release'] else ''
+                    self.stdout.write(
+                        f"    {topic['topic']}: {topic['eligible']}/{topic['active']} eligible, "
+                        f"~{topic['demand']}/quiz — {_left(topic['days_left'])}{release}"
+                    )
@@ -1,73 +1,166 @@
+"""
+Management command to import daily quiz questions from a CSV file.
+
+CSV columns expected:
+    subject, topic, question_text, choice1, choice2, choice3, choice4, correct_answer
+
+    - correct_answer : the exact text of one of the four choices
+
+Usage:
+    python manage.py daily_import_questions path/to/questions.csv
+
+Options:
+    --skip-bad    Import the valid rows and report the bad ones
+                  (default: report every bad row and import nothing)
+    --batch-size  Questions per bulk INSERT (default 1000)
+
+Runs in two passes.  Pass 1 validates every row without touching the
+database.  Pass 2 loads subjects, topics and existing questions into
+dicts once, then bulk-creates questions and their choices in chunks —
+a handful of queries per chunk instead of 7+ per row.
+"""
+
 import csv
 import os
-from django.core.management.base import BaseCommand
+
+from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
+
 from daily.models import Subject, Topic, Question, Choice
 
+REQUIRED_COLS = ['subject', 'topic', 'question_text',
+                 'choice1', 'choice2', 'choice3', 'choice4', 'correct_answer']
+CHOICE_COLS = ['choice1', 'choice2', 'choice3', 'choice4']
+
+
 class Command(BaseCommand):
     help = 'Imports questions from a CSV file into the database'
 
     def add_arguments(self, parser):
         parser.add_argument('csv_file', type=str,
                             help='The path to the CSV file')
+        parser.add_argument('--skip-bad', action='store_true', default=False,
+                            help='Import valid rows even if some rows have errors')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Questions per bulk INSERT')
 
     def handle(self, *args, **options):
         file_path = options['csv_file']
 
         if not os.path.exists(file_path):
-            self.stdout.write(
-                self.style.ERROR(f"File '{file_path}' does not exist."))
-            return
+            raise CommandError(f"File '{file_path}' does not exist.")
 
         self.stdout.write(
             self.style.SUCCESS(f"Starting import from {file_path}..."))
 
-        # We use a transaction so that if one row fails, nothing is saved (data integrity)
-        try:
-            with transaction.atomic():
-                with open(file_path, mode='r', encoding='utf-8-sig') as file:
-                    reader = csv.DictReader(file)
-
-                    count = 0
-                    for row in reader:
-                        subj_name = row['subject'].strip()
-                        top_name = row['topic'].strip()
-                        q_text = row['question_text'].strip()
-                        ans_text = row['correct_answer'].strip()
-
-                        subject_obj, _ = Subject.objects.get_or_create(
-                            name=subj_name)
-
-                        topic_obj, _ = Topic.objects.get_or_create(
-                            name=top_name,
-                            subject=subject_obj
-                        )
-
-                        question_obj, created = Question.objects.get_or_create(
-                            topic=topic_obj,
-                            text=q_text
-                        )
-
-                        if created:
-                            choices = [
-                                row['choice1'].strip(),
-                                row['choice2'].strip(),
-                                row['choice3'].strip(),
-                                row['choice4'].strip()
-                            ]
-
-                            for choice_text in choices:
-                                is_correct = (choice_text == ans_text)
-
-                                Choice.objects.create(
-                                    question=question_obj,
-                                    text=choice_text,
-                                    is_correct=is_correct
-                                )
-                            count += 1
-
-            self.stdout.write(self.style.SUCCESS(
-                f"Successfully imported {count} new questions!"))
-
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f"An error occurred: {e}"))
\ No newline at end of file
+        rows, errors = self._validate(file_path)
+
+        if errors:
+            for err in errors:
+                self.stdout.write(self.style.WARNING(f"  ⚠  {err}"))
+            if not options['skip_bad']:
+                raise CommandError(
+                    f"{len(errors)} bad row(s); nothing imported. "
+                    f"Fix them or use --skip-bad to import the other {len(rows)}."
+                )
+
+        # One transaction: if anything fails, nothing is saved (data integrity)
+        with transaction.atomic():
+            created, duplicates = self._import(rows, options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Successfully imported {created} new questions!"))
+        if duplicates:
+            self.stdout.write(f"Skipped {duplicates} question(s) already in the database or repeated in the file.")
+        if errors:
+            self.stdout.write(self.style.WARNING(f"Skipped {len(errors)} bad row(s)."))
+
+    # ---- pass 1: validate --------------------------------------------------
+
+    def _validate(self, file_path):
+        """Every row checked up front; returns (clean rows, error messages)."""
+        rows, errors = [], []
+
+        with open(file_path, mode='r', encoding='utf-8-sig', newline='') as file:
+            reader = csv.DictReader(file)
+            if reader.fieldnames is None:
+                raise CommandError("CSV file appears to be empty or has no header row.")
+
+            reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+            missing = [col for col in REQUIRED_COLS if col not in reader.fieldnames]
+            if missing:
+                raise CommandError(f"Missing required columns: {', '.join(missing)}")
+
+            for row_num, raw in enumerate(reader, start=2):  # row 1 = header
+                row = {k: (v or '').strip() for k, v in raw.items() if k}
+                empty = [col for col in REQUIRED_COLS if not row.get(col)]
+                choices = [row.get(col, '') for col in CHOICE_COLS]
+
+                if empty:
+                    errors.append(f"Row {row_num}: empty {', '.join(empty)}")
+                elif len(set(choices)) != len(choices):
+                    errors.append(f"Row {row_num}: choices must all be different")
+                elif row['correct_answer'] not in choices:
+                    errors.append(
+                        f"Row {row_num}: correct_answer '{row['correct_answer']}' "
+                        f"does not match any choice"
+                    )
+                else:
+                    row['row_num'] = row_num
+                    rows.append(row)
+
+        return rows, errors
+
+    # ---- pass 2: import ----------------------------------------------------
+
+    def _import(self, rows, batch_size):
+        subjects = self._subjects({row['subject'] for row in rows})
+        topics = self._topics({(subjects[row['subject']].id, row['topic']) for row in rows})
+
+        existing = set(
+            Question.objects.filter(topic__in=topics.values()).values_list('topic_id', 'text')
+        )
+
+        pending = []
+        for row in rows:
+            topic = topics[(subjects[row['subject']].id, row['topic'])]
+            key = (topic.id, row['question_text'])
+            if key in existing:
+                continue
+            existing.add(key)  # also drops repeats within the file
+            pending.append((Question(topic=topic, text=row['question_text']), row))
+
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            Question.objects.bulk_create([question for question, _ in chunk])
+            Choice.objects.bulk_create([
+                Choice(question=question, text=row[col], is_correct=row[col] == row['correct_answer'])
+                for question, row in chunk
+                for col in CHOICE_COLS
+            ])
+            self.stdout.write(f"  ✓ {start + len(chunk)}/{len(pending)} questions…")
+
+        return len(pending), len(rows) - len(pending)
+
+    @staticmethod
+    def _subjects(names):
+        """{name: Subject}, creating any that are missing in one INSERT."""
+        found = {s.name: s for s in Subject.objects.filter(name__in=names)}
+        missing = [Subject(name=name) for name in names if name not in found]
+        if missing:
+            Subject.objects.bulk_create(missing)
+            found.update({s.name: s for s in Subject.objects.filter(name__in=names)})
+        return found
+
+    @staticmethod
+    def _topics(keys):
+        """{(subject_id, name): Topic}, creating any that are missing in one INSERT."""
+        found = {}
+        for topic in Topic.objects.filter(subject_id__in={s_id for s_id, _ in keys}).order_by('id'):
+            found.setdefault((topic.subject_id, topic.name), topic)
+        missing = [Topic(subject_id=s_id, name=name) for s_id, name in keys if (s_id, name) not in found]
+        if missing:
+            Topic.objects.bulk_create(missing)
+            for topic in Topic.objects.filter(subject_id__in={s_id for s_id, _ in keys}).order_by('id'):
+                found.setdefault((topic.subject_id, topic.name), topic)
+        return found
@@ -1,35 +1,105 @@
-from django.core.management.base import BaseCommand
-from daily.models import Question, Subject
+"""
+Management command to clear last_appeared so questions become eligible
+for the daily quiz again.
+
+Usage:
+    python manage.py daily_reset_cooldown
+    python manage.py daily_reset_cooldown --subject Physics --older-than 90
+    python manage.py daily_reset_cooldown --topic Optics --subject Physics --dry-run
+
+Options:
+    --subject NAME      Only questions in this subject
+    --topic NAME        Only questions in this topic (add --subject if the
+                        name is used by more than one subject)
+    --older-than N      Only questions that last appeared more than N days ago
+    --dry-run           Count what would be reset and stop
+    --batch-size N      Rows per UPDATE (default 5000)
+
+Only questions that are actually on cooldown (last_appeared set) are
+touched, and never those on today's quiz or one already planned ahead
+(last_appeared today or later) — resetting those would let the generator
+hand them out a second time.  They are reset in primary-key ranges, one
+short transaction per batch, so quiz generation is never blocked behind
+a table-wide UPDATE.
+"""
+
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from daily.models import Question, Topic
+from daily.script import quiz_today
 
 
 class Command(BaseCommand):
     help = 'Resets the cooldown for questions'
 
     def add_arguments(self, parser):
-        # Optional: allow resetting only one subject
         parser.add_argument('--subject', type=str,
                             help='Reset only a specific subject')
+        parser.add_argument('--topic', type=str,
+                            help='Reset only a specific topic')
+        parser.add_argument('--older-than', type=int, metavar='DAYS',
+                            help='Reset only questions last shown more than DAYS days ago')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report how many questions would be reset')
+        parser.add_argument('--batch-size', type=int, default=5000)
 
     def handle(self, *args, **options):
+        qs, scope = self._queryset(options)
+
+        if options['dry_run']:
+            self.stdout.write(f"Would reset {qs.count()} question(s) {scope}.")
+            return
+
+        reset = 0
+        last_id = 0
+        while True:
+            ids = list(
+                qs.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:options['batch_size']]
+            )
+            if not ids:
+                break
+
+            # Re-apply the filter inside the range: a row the quiz generator
+            # picked since the id scan now carries today's or a later date,
+            # which the filter excludes, so it keeps its fresh last_appeared.
+            with transaction.atomic():
+                reset += qs.filter(pk__gte=ids[0], pk__lte=ids[-1]).update(last_appeared=None)
+
+            last_id = ids[-1]
+            self.stdout.write(f"  {reset} reset — through id {last_id}")
+
+        self.stdout.write(self.style.SUCCESS(f"Successfully reset {reset} question(s) {scope}."))
+
+    def _queryset(self, options):
+        """Questions on cooldown matching the options, and a phrase describing the scope."""
+        qs = Question.objects.filter(last_appeared__isnull=False).exclude(last_appeared__gte=quiz_today())
+        scope = []
+
         subject_name = options['subject']
+        topic_name = options['topic']
+        if topic_name:
+            topics = Topic.objects.filter(name__iexact=topic_name)
+            if subject_name:
+                topics = topics.filter(subject__name__iexact=subject_name)
+            topic_ids = list(topics.values_list('id', flat=True))
+            if not topic_ids:
+                raise CommandError(f"No topic named '{topic_name}'"
+                                   + (f" in '{subject_name}'" if subject_name else ''))
+            # topic_id first: served by the (topic, is_active, last_appeared) index
+            qs = qs.filter(topic_id__in=topic_ids)
+            scope.append(f"in topic '{topic_name}'")
+        elif subject_name:
+            if not Topic.objects.filter(subject__name__iexact=subject_name).exists():
+                raise CommandError(f"No questions found for subject '{subject_name}'")
+            qs = qs.filter(topic__subject__name__iexact=subject_name)
+            scope.append(f"for '{subject_name}'")
+
+        if options['older_than'] is not None:
+            cutoff = quiz_today() - datetime.timedelta(days=options['older_than'])
+            qs = qs.filter(last_appeared__lt=cutoff)
+            scope.append(f"last shown before {cutoff}")
 
-        if subject_name:
-            # Reset only questions in a specific subject
-            qs = Question.objects.filter(
-                topic__subject__name__iexact=subject_name)
-            if not qs.exists():
-                self.stdout.write(self.style.ERROR(
-                    f"No questions found for subject '{subject_name}'"))
-                return
-
-            count = qs.count()
-            qs.update(last_appeared=None)
-            self.stdout.write(self.style.SUCCESS(
-                f"Successfully reset {count} questions for '{subject_name}'."))
-
-        else:
-            # Reset everything
-            count = Question.objects.count()
-            Question.objects.update(last_appeared=None)
-            self.stdout.write(self.style.SUCCESS(
-                f"Successfully reset the cooldown for all {count} questions."))
\ No newline at end of file
+        return qs, ' '.join(scope) or 'across all subjects'
@@ -0,0 +1,38 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from daily import activity
+from daily.script import quiz_today
+
+
+class Command(BaseCommand):
+    help = 'Copies recent daily-activity bitmaps from Redis to the database and restores lost ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=2,
+                            help='How many days back from today to persist (default 2)')
+
+    def handle(self, *args, **options):
+        today = quiz_today()
+        days = [today - datetime.timedelta(days=i) for i in range(options['days'] + 1)]
+
+        written = activity.persist(days)
+        self.stdout.write(self.style.SUCCESS(
+            f"Persisted {written} day(s) of activity through {today:%Y-%m-%d}"
+        ))
+
+        restored = activity.restore()
+        if restored:
+            self.stdout.write(self.style.WARNING(f"Restored {restored} bitmap(s) missing from Redis"))
+
+        # One-line health report for the cron log.
+        yesterday = today - datetime.timedelta(days=1)
+        week_ago = today - datetime.timedelta(days=7)
+        cohort = activity.retention(week_ago, after=(1, 7))
+        self.stdout.write(
+            f"DAU {yesterday:%Y-%m-%d}: {activity.daily_active(yesterday)} · "
+            f"WAU: {activity.weekly_active(yesterday)} · "
+            f"{week_ago:%Y-%m-%d} cohort of {cohort['cohort']}: "
+            f"D1 {cohort['retained'].get(1, 0)}, D7 {cohort['retained'].get(7, 0)}"
+        )
@@ -0,0 +1,55 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from daily import payload
+from daily.models import DailyQuiz
+from daily.script import WEEKEND, ensure_daily_quiz, generation_in_progress, quiz_today
+
+
+class Command(BaseCommand):
+    help = 'Pre-generates the daily quiz for today and the next N days (Nepal time)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7,
+                            help='How many days ahead of today to plan (default 7)')
+
+    def handle(self, *args, **options):
+        today = quiz_today()
+        horizon = [today + datetime.timedelta(days=i) for i in range(options['days'] + 1)]
+        planned = set(
+            DailyQuiz.objects.filter(date__range=(horizon[0], horizon[-1]))
+            .values_list('date', flat=True)
+        )
+
+        # Oldest first: each day's picks set last_appeared, which keeps them
+        # out of the following days' pools for the REPETITION cooldown.
+        created = 0
+        for day in horizon:
+            if day.weekday() == WEEKEND or day in planned:
+                continue
+            # Same single-flight lock as the API's lazy path, so a request
+            # racing the cron job never generates the day twice.
+            quiz = ensure_daily_quiz(day)
+            if quiz:
+                created += 1
+                self.stdout.write(f"{day:%a %Y-%m-%d}: {quiz.questions.count()} question(s)")
+            elif generation_in_progress(day):
+                self.stdout.write(f"{day:%a %Y-%m-%d}: being generated by another worker")
+            else:
+                self.stdout.write(self.style.WARNING(f"{day:%a %Y-%m-%d}: no eligible questions"))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Planned {created} new quiz(zes) through {horizon[-1]:%Y-%m-%d}"
+        ))
+
+        # Days that have ended are frozen into the archive once, for good.
+        archived = payload.archive_past_quizzes(before=today)
+        if archived:
+            self.stdout.write(self.style.SUCCESS(f"Archived {archived} past quiz(zes)"))
+
+        # Serialize tomorrow's quiz now so the first request after local
+        # midnight is a cache hit.
+        tomorrow = today + datetime.timedelta(days=1)
+        if tomorrow.weekday() != WEEKEND and payload.get_payload(tomorrow):
+            self.stdout.write(self.style.SUCCESS(f"Warmed the API cache for {tomorrow:%Y-%m-%d}"))
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.2 on 2026-10-19 13:36
+
+import random
+
+import daily.models
+from django.db import migrations, models
+
+
+def shuffle_existing(apps, schema_editor):
+    # AddField evaluates a callable default once, so every existing row got
+    # the same key; give each its own.
+    Question = apps.get_model('daily', 'Question')
+    batch = []
+    for q in Question.objects.only('id').iterator(chunk_size=2000):
+        q.random_key = random.random()
+        batch.append(q)
+        if len(batch) >= 2000:
+            Question.objects.bulk_update(batch, ['random_key'])
+            batch = []
+    Question.objects.bulk_update(batch, ['random_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('daily', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='random_key',
+            field=models.FloatField(default=daily.models.random_key_default),
+        ),
+        migrations.RunPython(shuffle_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-19 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('daily', '0002_question_random_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyQuizArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('subject', models.CharField(blank=True, max_length=100)),
+                ('question_count', models.PositiveSmallIntegerField(default=0)),
+                ('body', models.BinaryField()),
+                ('etag', models.CharField(max_length=32)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-date'],
+            },
+        ),
+    ]
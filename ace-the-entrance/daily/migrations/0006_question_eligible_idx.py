@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-19 16:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('daily', '0005_activitybitmap'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['topic', 'is_active', 'last_appeared'], name='daily_q_eligible_idx'),
+        ),
+    ]
@@ -1,8 +1,15 @@
+import random
+
+from django.conf import settings
 from django.utils import timezone
 from django.db import models
 
 # Create your models here.
 
+def random_key_default():
+    return random.random()
+
+
 class Subject(models.Model):
     name = models.CharField(max_length=100, unique=True)
 
@@ -21,6 +28,21 @@ class Question(models.Model):
     text = models.TextField()
     last_appeared = models.DateField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
+    # Position in a random queue, so daily selection can rank questions
+    # per topic in SQL instead of ORDER BY random() over the whole bank.
+    # Re-drawn each time the question is picked.
+    random_key = models.FloatField(default=random_key_default)
+
+    class Meta:
+        indexes = [
+            # The eligibility filter in daily.script / daily.capacity:
+            # topic = ? AND is_active AND (last_appeared < ? OR IS NULL)
+            models.Index(fields=['topic', 'is_active', 'last_appeared'], name='daily_q_eligible_idx'),
+            # No (topic, random_key) index: _pick_balanced orders each topic by
+            # a CASE over random_key (the walk from a random pivot), which an
+            # index on the raw column can't serve, and it ranks only the rows
+            # the eligibility index above has already narrowed down.
+        ]
 
     def __str__(self):
         return f"{self.topic} - {self.text}"
@@ -32,4 +54,74 @@ class Choice(models.Model):
 
 class DailyQuiz(models.Model):
     date = models.DateField(unique=True, default=timezone.now)
-    questions = models.ManyToManyField(Question)
\ No newline at end of file
+    questions = models.ManyToManyField(Question)
+
+class DailyQuizArchive(models.Model):
+    """
+    Frozen, pre-serialized copy of a past day's quiz.  Written once by
+    plan_daily_quiz after the date has passed and never updated, so the
+    archive endpoints serve it verbatim with long-lived caching.
+    """
+    date = models.DateField(unique=True)
+    subject = models.CharField(max_length=100, blank=True)
+    question_count = models.PositiveSmallIntegerField(default=0)
+    body = models.BinaryField()             # gzip-compressed JSON payload
+    etag = models.CharField(max_length=32)  # md5 of the uncompressed JSON
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.date} — {self.subject}"
+
+
+class DailyResult(models.Model):
+    """
+    A user's graded submission for one day — one compact row, with the
+    picks kept as {"<question_id>": <choice_id>} rather than a row per answer.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='daily_results')
+    date = models.DateField()
+    score = models.PositiveSmallIntegerField()
+    total = models.PositiveSmallIntegerField()
+    picks = models.JSONField(default=dict)
+    submitted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user', 'date')
+
+    def __str__(self):
+        return f"{self.user} — {self.date}: {self.score}/{self.total}"
+
+
+class ChoiceTally(models.Model):
+    """
+    How many users picked a choice on a given day.  Incremented with a
+    single F() UPDATE per submission, so "62% picked this" is a plain
+    read — never an aggregate over DailyResult.
+    """
+    date = models.DateField()
+    choice = models.ForeignKey(Choice, on_delete=models.CASCADE, related_name='tallies')
+    picks = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('date', 'choice')
+
+
+class ActivityBitmap(models.Model):
+    """
+    Durable copy of one day's activity bitmap (bit N set = user id N was
+    active), written nightly from Redis by persist_daily_activity.  Live
+    reads and writes go through daily.activity, never this table.
+    """
+    date = models.DateField(unique=True)
+    bits = models.BinaryField()
+    active_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.date}: {self.active_count} active"
@@ -0,0 +1,158 @@
+"""
+Pre-serialized daily quiz payloads.
+
+A day's quiz never changes once generated, so its JSON is built once, stored
+in the cache as bytes and served verbatim to every user until the day ends
+in Nepal.  Per-user variety comes from a deterministic permutation seeded by
+user and date, which travels next to the shared bytes instead of inside them.
+
+Today's payload never says which choice is correct; the answer key is kept
+server-side for grading and only returned by the submit endpoint.
+"""
+import datetime
+import gzip
+import hashlib
+import json
+import random
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from daily.models import DailyQuiz, DailyQuizArchive
+from daily.script import QUIZ_TIME_ZONE
+
+
+def _cache_key(quiz_date):
+    return f'daily:payload:v2:{quiz_date.isoformat()}'
+
+
+def _seconds_until_end_of(quiz_date):
+    """Cache lifetime: until local midnight at the end of `quiz_date`."""
+    end = datetime.datetime.combine(
+        quiz_date + datetime.timedelta(days=1), datetime.time.min, tzinfo=QUIZ_TIME_ZONE
+    )
+    return max(1, int((end - timezone.now()).total_seconds()))
+
+
+def build_payload(quiz, reveal_answers=False):
+    """
+    Canonical (unshuffled, id-ordered) serialization of one DailyQuiz.
+    isCorrect is only included for days that are over (the archive).
+    """
+    questions = []
+    for question in sorted(quiz.questions.all(), key=lambda q: q.id):
+        choices = []
+        for choice in sorted(question.choices.all(), key=lambda c: c.id):
+            item = {'id': choice.id, 'text': choice.text}
+            if reveal_answers:
+                item['isCorrect'] = choice.is_correct
+            choices.append(item)
+        questions.append({'id': question.id, 'question': question.text, 'choices': choices})
+    return {'date': quiz.date.isoformat(), 'questions': questions}
+
+
+def _answer_key(quiz):
+    """{question_id: (correct_choice_id or None, [choice ids])} for grading."""
+    key = {}
+    for question in quiz.questions.all():
+        choices = sorted(question.choices.all(), key=lambda c: c.id)
+        correct = next((c.id for c in choices if c.is_correct), None)
+        key[question.id] = (correct, [c.id for c in choices])
+    return key
+
+
+def _serialize(data):
+    return json.dumps(data, separators=(',', ':')).encode()
+
+
+def get_payload(quiz_date):
+    """
+    (body, etag, shape, answer_key) for `quiz_date`, or None when no quiz
+    exists.  `body` is the cached JSON bytes; `shape` is [choice count per
+    question], enough to build a permutation without touching the body;
+    `answer_key` is what the submit endpoint grades against.
+    """
+    entry = cache.get(_cache_key(quiz_date))
+    if entry is not None:
+        return entry
+
+    quiz = (
+        DailyQuiz.objects.prefetch_related('questions__choices')
+        .filter(date=quiz_date).first()
+    )
+    if quiz is None:
+        return None
+
+    data = build_payload(quiz)
+    body = _serialize(data)
+    entry = (
+        body,
+        hashlib.md5(body).hexdigest(),
+        [len(q['choices']) for q in data['questions']],
+        _answer_key(quiz),
+    )
+    cache.set(_cache_key(quiz_date), entry, _seconds_until_end_of(quiz_date))
+    return entry
+
+
+def invalidate(quiz_date):
+    cache.delete(_cache_key(quiz_date))
+
+
+def shuffle_order(shape, seed):
+    """
+    Deterministic per-user ordering: {"questions": [...], "choices": [[...], ...]}
+    as index permutations into the canonical payload.  Same seed, same order,
+    so a reload shows the quiz exactly as before.
+    """
+    rng = random.Random(seed)
+    question_order = list(range(len(shape)))
+    rng.shuffle(question_order)
+    choice_orders = []
+    for n in shape:
+        order = list(range(n))
+        rng.shuffle(order)
+        choice_orders.append(order)
+    return {'questions': question_order, 'choices': choice_orders}
+
+
+# ── Archive of past days ──────────────────────────────────────────────────────
+
+ARCHIVE_BATCH = 100
+
+
+def archive_past_quizzes(before):
+    """
+    Freeze every quiz dated before `before` that is not archived yet.
+    Past quizzes never change, so each is serialized and gzipped exactly
+    once; the archive endpoints then never run a prefetch.  Returns the
+    number of days archived.
+    """
+    archived = set(DailyQuizArchive.objects.filter(date__lt=before).values_list('date', flat=True))
+    pending = (
+        DailyQuiz.objects.filter(date__lt=before)
+        .exclude(date__in=archived)
+        .prefetch_related('questions__choices', 'questions__topic__subject')
+        .order_by('date')
+    )
+
+    count = 0
+    batch = []
+    for quiz in pending.iterator(chunk_size=ARCHIVE_BATCH):
+        data = build_payload(quiz, reveal_answers=True)
+        if not data['questions']:
+            continue
+        body = _serialize(data)
+        first = next(iter(quiz.questions.all()))
+        batch.append(DailyQuizArchive(
+            date=quiz.date,
+            subject=first.topic.subject.name,
+            question_count=len(data['questions']),
+            body=gzip.compress(body, compresslevel=9),
+            etag=hashlib.md5(body).hexdigest(),
+        ))
+        if len(batch) >= ARCHIVE_BATCH:
+            count += len(DailyQuizArchive.objects.bulk_create(batch, ignore_conflicts=True))
+            batch = []
+    count += len(DailyQuizArchive.objects.bulk_create(batch, ignore_conflicts=True))
+    return count
@@ -1,84 +1,159 @@
 import datetime
+import logging
 import random
+import uuid
+from zoneinfo import ZoneInfo
+
+from django.core.cache import cache
 from django.utils import timezone
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, F, When, Window
+from django.db.models.functions import RowNumber
 from daily.models import Subject, Question, DailyQuiz
 
-REPETITION = 150
-
+logger = logging.getLogger(__name__)
 
-def generate_daily_quiz():
-    now = timezone.now()
-    today_date = now.date()
+REPETITION = 150
+QUESTIONS_PER_QUIZ = 10
+MAX_PER_TOPIC = 5
+
+# The quiz rolls over at midnight in Nepal, not at UTC midnight.
+QUIZ_TIME_ZONE = ZoneInfo('Asia/Kathmandu')
+
+# Subject by weekday.  Saturday (5) is the weekend — the API serves no quiz —
+# but keeps a fallback so generating for it can never crash.
+DAY_MAP = {
+    0: "Chemistry", 1: "Biology", 2: "Maths",
+    3: "English", 4: "GKIQ", 5: "GKIQ",
+    6: "Physics"
+}
+WEEKEND = 5
+
+# Single-flight generation: one caller builds a missing quiz, the rest are
+# told to come back instead of waiting on it.
+GENERATION_LOCK_SECONDS = 30     # lock expires on its own if the holder dies
+
+
+def quiz_today():
+    """Today's date in Nepal — the date the daily quiz is keyed by."""
+    return timezone.now().astimezone(QUIZ_TIME_ZONE).date()
+
+
+def _pick_balanced(subject, limit_date):
+    """
+    Up to QUESTIONS_PER_QUIZ eligible questions, spread round-robin across
+    topics with at most MAX_PER_TOPIC from any one topic.
+
+    Each topic's questions are ranked in SQL with
+    ROW_NUMBER() OVER (PARTITION BY topic_id ORDER BY <random key>), starting
+    from a fresh random pivot, and only ranks 1..MAX_PER_TOPIC are fetched —
+    a few ids per topic instead of the whole shuffled bank.
+    """
+    pivot = random.random()
+    # Walk the random_key circle from the pivot: keys >= pivot first, then wrap.
+    queue_position = Case(
+        When(random_key__gte=pivot, then=F('random_key') - pivot),
+        default=F('random_key') + (1 - pivot),
+        output_field=models.FloatField(),
+    )
+
+    ranked = list(
+        Question.objects.filter(
+            topic__subject=subject,
+            is_active=True
+        ).filter(
+            models.Q(last_appeared__lt=limit_date) | models.Q(
+                last_appeared__isnull=True)
+        ).annotate(
+            rank=Window(RowNumber(), partition_by=[F('topic_id')], order_by=queue_position.asc())
+        ).filter(
+            rank__lte=MAX_PER_TOPIC
+        ).values_list('id', 'topic_id', 'rank')
+    )
+
+    # ROUND-ROBIN: every topic's rank 1, then every topic's rank 2, … with
+    # topics in a random order so no topic is always first.
+    topic_ids = list({topic_id for _, topic_id, _ in ranked})
+    random.shuffle(topic_ids)
+    topic_order = {t_id: i for i, t_id in enumerate(topic_ids)}
+    ranked.sort(key=lambda row: (row[2], topic_order[row[1]]))
+
+    picked_ids = [q_id for q_id, _, _ in ranked[:QUESTIONS_PER_QUIZ]]
+    lookup = Question.objects.in_bulk(picked_ids)
+    return [lookup[q_id] for q_id in picked_ids]
+
+
+def generate_daily_quiz(quiz_date=None):
+    """
+    Pick and store the questions for `quiz_date` (default: today in Nepal).
+    Picked questions get last_appeared = quiz_date, so days planned ahead
+    by plan_daily_quiz honour the REPETITION cooldown among themselves.
+    """
+    today_date = quiz_date or quiz_today()
     limit_date = today_date - datetime.timedelta(days=REPETITION)
 
-    # 1. Added Saturday (5) to prevent crashes
-    day_map = {
-        0: "Chemistry", 1: "Biology", 2: "Maths",
-        3: "English", 4: "GKIQ", 5: "GKIQ",  # Fallback for Saturday
-        6: "Physics"
-    }
-
-    subject_name = day_map.get(today_date.weekday())
+    subject_name = DAY_MAP.get(today_date.weekday())
 
     # 2. Add error handling so it doesn't crash if subject is missing
     try:
         subject = Subject.objects.get(name=subject_name)
     except Subject.DoesNotExist:
-        print(f"Error: Subject '{subject_name}' not found in database.")
+        logger.error("Subject '%s' not found; no daily quiz for %s", subject_name, today_date)
         return []
 
-    eligible_qs = Question.objects.filter(
-        topic__subject=subject,
-        is_active=True
-    ).filter(
-        models.Q(last_appeared__lt=limit_date) | models.Q(
-            last_appeared__isnull=True)
-    ).select_related('topic').order_by('?')
-
-    # Grouping by Topic ID
-    questions_by_topic = {}
-    for q in eligible_qs:
-        questions_by_topic.setdefault(q.topic_id, []).append(q)
-
-    selected_questions = []
-    topic_ids = list(questions_by_topic.keys())
-    random.shuffle(topic_ids)  # Randomize topic order for variety
-
-    # Track how many questions we've taken from each topic
-    topic_usage_counters = {t_id: 0 for t_id in topic_ids}
-
-    # ROUND-ROBIN SELECTION
-    # We keep looping through the topics until we have 10 questions
-    # OR we run out of available questions/hit the topic caps.
-    while len(selected_questions) < 10:
-        added_in_this_loop = False
-
-        for t_id in topic_ids:
-            if len(selected_questions) >= 10:
-                break
-
-            # CHECK LIMITS:
-            # 1. Has the topic reached the 5-question cap?
-            # 2. Are there questions left in this topic's list?
-            if topic_usage_counters[t_id] < 5 and questions_by_topic[t_id]:
-                selected_questions.append(questions_by_topic[t_id].pop(0))
-                topic_usage_counters[t_id] += 1
-                added_in_this_loop = True
-
-        # Safety break: if we checked every topic and couldn't add even one question,
-        # it means we are truly out of eligible questions.
-        if not added_in_this_loop:
-            break
+    selected_questions = _pick_balanced(subject, limit_date)
 
     # Save to database
     if selected_questions:
         quiz, _ = DailyQuiz.objects.get_or_create(date=today_date)
         quiz.questions.set(selected_questions)
-        Question.objects.filter(
-            id__in=[q.id for q in selected_questions]).update(
-            last_appeared=now)
-        print(
-            f"Generated {len(selected_questions)} questions for {subject_name}.")
-
-    return selected_questions
\ No newline at end of file
+        # Start the cooldown and send each question to a new random place
+        # in its topic's queue.
+        for q in selected_questions:
+            q.last_appeared = today_date
+            q.random_key = random.random()
+        Question.objects.bulk_update(selected_questions, ['last_appeared', 'random_key'])
+        logger.info("Generated %d questions for %s on %s", len(selected_questions), subject_name, today_date)
+
+    return selected_questions
+
+
+def _generation_lock_key(quiz_date):
+    return f'daily:generate:{quiz_date.isoformat()}'
+
+
+def generation_in_progress(quiz_date):
+    """True while some worker holds the generation lock for `quiz_date`."""
+    return cache.get(_generation_lock_key(quiz_date)) is not None
+
+
+def ensure_daily_quiz(quiz_date):
+    """
+    The DailyQuiz for `quiz_date`, generating it first if it is missing.
+
+    Generation is single-flight: a cache lock (cache.add is atomic on Redis)
+    lets exactly one caller run generate_daily_quiz.  Concurrent callers get
+    None straight away — generation_in_progress() tells them apart from a
+    day with no eligible questions — so no request sleeps on another's work.
+    The lock is always released, so a failed generation can be retried.
+    """
+    quiz = DailyQuiz.objects.filter(date=quiz_date).first()
+    if quiz:
+        return quiz
+
+    lock_key = _generation_lock_key(quiz_date)
+    token = uuid.uuid4().hex
+
+    if cache.add(lock_key, token, GENERATION_LOCK_SECONDS):
+        try:
+            # Another worker may have finished between our read and the lock.
+            quiz = DailyQuiz.objects.filter(date=quiz_date).first()
+            if quiz is None:
+                with transaction.atomic():
+                    generate_daily_quiz(quiz_date)
+                quiz = DailyQuiz.objects.filter(date=quiz_date).first()
+            return quiz
+        finally:
+            if cache.get(lock_key) == token:
+                cache.delete(lock_key)
+    return None
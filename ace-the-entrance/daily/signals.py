@@ -0,0 +1,40 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from daily import payload
+from daily.models import Choice, DailyQuiz, Question
+
+
+def _invalidate_for_question(question_id):
+    for quiz_date in DailyQuiz.objects.filter(questions=question_id).values_list('date', flat=True):
+        payload.invalidate(quiz_date)
+
+
+@receiver(post_save, sender=DailyQuiz)
+@receiver(post_delete, sender=DailyQuiz)
+def quiz_changed(sender, instance, **kwargs):
+    payload.invalidate(instance.date)
+
+
+@receiver(m2m_changed, sender=DailyQuiz.questions.through)
+def quiz_questions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        payload.invalidate(instance.date)
+    elif pk_set:
+        for quiz_date in DailyQuiz.objects.filter(pk__in=pk_set).values_list('date', flat=True):
+            payload.invalidate(quiz_date)
+    else:
+        _invalidate_for_question(instance.pk)
+
+
+@receiver(post_save, sender=Question)
+def question_changed(sender, instance, **kwargs):
+    _invalidate_for_question(instance.pk)
+
+
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+def choice_changed(sender, instance, **kwargs):
+    _invalidate_for_question(instance.question_id)
@@ -48,6 +48,13 @@ document.addEventListener('DOMContentLoaded', () => {
 async function loadQuestions() {
     try {
         const response = await fetch(window.QUIZ_API_URL);
+
+        /* Someone else's request is generating today's quiz — try again shortly */
+        if (response.status === 503 && response.headers.has('Retry-After')) {
+            const retryAfter = parseInt(response.headers.get('Retry-After'), 10) || 2;
+            setTimeout(loadQuestions, retryAfter * 1000);
+            return;
+        }
         if (!response.ok) throw new Error(`HTTP ${response.status}`);
 
         const data   = await response.json();
@@ -69,7 +76,11 @@ async function loadQuestions() {
             return; // ← stop processing
         }
 
-        questions    = data.questions;
+        /* Shared payload + this user's seeded order (index permutations) */
+        questions    = data.order.questions.map((i) => {
+            const q = data.questions[i];
+            return { ...q, choices: data.order.choices[i].map((j) => q.choices[j]) };
+        });
         userAnswers  = new Array(questions.length).fill(null);
         questionsReady = true;
 
@@ -231,7 +242,23 @@ function updateQuestionCounter() {
 /* ════════════════════════════════════════
    SUBMIT & RESULTS
 ════════════════════════════════════════ */
-function submitQuiz() {
+/* Answers are only revealed to a recorded, signed-in submission */
+function showLoginPrompt() {
+    if (document.getElementById('login-warning')) return;
+    const footer = document.querySelector('.quiz-footer');
+    const msg = document.createElement('p');
+    msg.id = 'login-warning';
+    msg.style.cssText = 'font-size:.82rem;margin:0.5rem 0 0;text-align:center;';
+    msg.innerHTML = `<a href="${window.QUIZ_LOGIN_URL}">Log in</a> to submit and see your results.`;
+    footer.insertAdjacentElement('afterbegin', msg);
+}
+
+async function submitQuiz() {
+    if (!window.QUIZ_SIGNED_IN) {
+        showLoginPrompt();
+        return;
+    }
+
     const unanswered = userAnswers.filter(a => a === null).length;
 
     if (unanswered > 0 && !document.getElementById('submit-warning')) {
@@ -249,20 +276,39 @@ function submitQuiz() {
     const warning = document.getElementById('submit-warning');
     if (warning) warning.remove();
 
-    score = 0;
+    /* Graded on the server — the browser never holds the answer key */
+    const answers = {};
     questions.forEach((q, i) => {
-        const correct = q.choices.find(c => c.isCorrect);
-        if (!correct) {
-            console.warn(`Question ${i} has no correct answer:`, q);
-            return;
-        }
-        if (userAnswers[i] === correct.id) score++;
+        if (userAnswers[i] !== null) answers[q.id] = userAnswers[i];
     });
 
-    showResults();
+    try {
+        const response = await fetch(window.QUIZ_SUBMIT_URL, {
+            method:  'POST',
+            headers: { 'Content-Type': 'application/json', 'X-CSRFToken': window.QUIZ_CSRF_TOKEN },
+            body:    JSON.stringify({ answers }),
+        });
+        if (response.status === 401) {
+            // Signed out in another tab since the page loaded
+            showLoginPrompt();
+            return;
+        }
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        const result = await response.json();
+        score = result.score;
+        showResults(result);
+    } catch (err) {
+        console.error('Error submitting quiz:', err);
+        const footer = document.querySelector('.quiz-footer');
+        const msg = document.createElement('p');
+        msg.id = 'submit-warning';
+        msg.style.cssText = 'color:#b91c1c;font-size:.82rem;margin:0.5rem 0 0;text-align:center;';
+        msg.textContent = 'Could not submit — check your connection and click Finish again.';
+        footer.insertAdjacentElement('afterbegin', msg);
+    }
 }
 
-function showResults() {
+function showResults(result) {
     hideEl('quiz-content');
     showEl('results', 'block');
 
@@ -271,8 +317,42 @@ function showResults() {
     document.getElementById('final-total').textContent = questions.length;
     document.getElementById('percentage').textContent  = pct;
 
-    document.getElementById('performance-message-container').innerHTML =
-        `<p class="performance-msg">${getPerformanceMessage(pct)}</p>`;
+    let message = `<p class="performance-msg">${getPerformanceMessage(pct)}</p>`;
+    if (result.streak) {
+        message += `<p class="streak-msg">🔥 ${result.streak}-day streak</p>`;
+    }
+    document.getElementById('performance-message-container').innerHTML = message;
+
+    renderReview(result);
+}
+
+/* Per-question review: your pick, the right answer, and how everyone else picked */
+function renderReview(result) {
+    const container = document.getElementById('review-container');
+    if (!container) return;
+
+    let html = '';
+    questions.forEach((q, i) => {
+        const correctId = result.correct[q.id];
+        const pickedId  = result.picks[q.id];
+        const total     = q.choices.reduce((n, c) => n + (result.tally[c.id] || 0), 0);
+
+        html += `<div class="review-item">
+                    <div class="review-question">${i + 1}. ${safeFormat(q.question)}</div>`;
+        q.choices.forEach((c) => {
+            const share = total ? Math.round(((result.tally[c.id] || 0) / total) * 100) : 0;
+            const state = c.id === correctId ? 'correct' : (c.id === pickedId ? 'wrong' : '');
+            html += `<div class="review-choice ${state}">
+                        <span class="review-bar" style="width:${share}%"></span>
+                        <span class="review-text">${c.id === pickedId ? '&#9679; ' : ''}${safeFormat(c.text)}</span>
+                        <span class="review-share">${total ? share + '% picked this' : ''}</span>
+                     </div>`;
+        });
+        html += '</div>';
+    });
+    container.innerHTML = html;
+
+    if (typeof renderLatexInQuiz === 'function') renderLatexInQuiz(container);
 }
 
 function getPerformanceMessage(pct) {
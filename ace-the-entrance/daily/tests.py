@@ -1,3 +1,501 @@
+import csv
+import datetime
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
 from django.test import TestCase
+from django.urls import reverse
+
+from accounts.models import User
+from daily import activity, capacity, payload, script
+from daily.models import Choice, ChoiceTally, DailyQuiz, DailyResult, Question, Subject, Topic
+from daily.script import DAY_MAP, MAX_PER_TOPIC, QUESTIONS_PER_QUIZ, REPETITION, generate_daily_quiz, quiz_today
+
+
+QUIZ_DAY = datetime.date(2026, 10, 19)      # a Monday
+
+
+def make_quiz(day=QUIZ_DAY, questions=3, choices=2):
+    """A stored quiz; returns {question_id: [correct choice id, other choice ids…]}."""
+    topic = Topic.objects.create(name='Optics', subject=Subject.objects.get_or_create(name='Physics')[0])
+    quiz = DailyQuiz.objects.create(date=day)
+    key = {}
+    for i in range(questions):
+        question = Question.objects.create(topic=topic, text=f'Q{i}')
+        key[question.id] = [
+            Choice.objects.create(question=question, text=f'choice {j}', is_correct=j == 0).id
+            for j in range(choices)
+        ]
+        quiz.questions.add(question)
+    return key
+
+
+def make_user(username='student'):
+    return User.objects.create_user(
+        username=username, email=f'{username}@example.com', password='pass', is_active=True,
+    )
+
+
+class ResetCooldownTests(TestCase):
+    def setUp(self):
+        topic = Topic.objects.create(name='Optics', subject=Subject.objects.create(name='Physics'))
+        today = quiz_today()
+        self.questions = {
+            label: Question.objects.create(topic=topic, text=label, last_appeared=day)
+            for label, day in [
+                ('old',      today - datetime.timedelta(days=120)),
+                ('recent',   today - datetime.timedelta(days=1)),
+                ('today',    today),
+                ('planned',  today + datetime.timedelta(days=3)),
+                ('never',    None),
+            ]
+        }
+
+    def last_appeared(self):
+        return {q.text: q.last_appeared for q in Question.objects.all()}
+
+    def test_keeps_todays_and_planned_quizzes(self):
+        before = self.last_appeared()
+        call_command('daily_reset_cooldown', stdout=StringIO())
+        after = self.last_appeared()
+
+        self.assertIsNone(after['old'])
+        self.assertIsNone(after['recent'])
+        self.assertEqual(after['today'], before['today'])
+        self.assertEqual(after['planned'], before['planned'])
+
+    def test_older_than(self):
+        call_command('daily_reset_cooldown', '--older-than', '90', stdout=StringIO())
+        after = self.last_appeared()
+
+        self.assertIsNone(after['old'])
+        self.assertIsNotNone(after['recent'])
+
+
+class GenerateQuizTests(TestCase):
+    SUNDAY = datetime.date(2026, 10, 18)     # Physics day
+
+    def setUp(self):
+        physics = Subject.objects.create(name='Physics')
+        self.topics = {
+            name: Topic.objects.create(name=name, subject=physics)
+            for name in ['Optics', 'Waves', 'Heat']
+        }
+
+    def add_questions(self, topic, count):
+        Question.objects.bulk_create(
+            Question(topic=self.topics[topic], text=f'{topic} {i}') for i in range(count)
+        )
+
+    def test_caps_each_topic(self):
+        self.add_questions('Optics', 12)
+        self.add_questions('Waves', 2)
+
+        picked = generate_daily_quiz(self.SUNDAY)
+        by_topic = {name: sum(q.topic == topic for q in picked) for name, topic in self.topics.items()}
+        self.assertEqual(by_topic, {'Optics': MAX_PER_TOPIC, 'Waves': 2, 'Heat': 0})
+
+        quiz = DailyQuiz.objects.get(date=self.SUNDAY)
+        self.assertEqual(set(quiz.questions.all()), set(picked))
+        self.assertEqual(
+            Question.objects.filter(last_appeared=self.SUNDAY).count(), MAX_PER_TOPIC + 2,
+        )
+
+    def test_fills_the_quiz_round_robin(self):
+        for name in self.topics:
+            self.add_questions(name, 6)
+
+        picked = generate_daily_quiz(self.SUNDAY)
+        self.assertEqual(len(picked), QUESTIONS_PER_QUIZ)
+        counts = sorted(sum(q.topic == topic for q in picked) for topic in self.topics.values())
+        self.assertEqual(counts, [3, 3, 4])
+
+
+class PlanQuizTests(TestCase):
+    MONDAY = datetime.date(2026, 10, 19)     # Chemistry day, and again a week later
+
+    def setUp(self):
+        for name in set(DAY_MAP.values()):
+            Subject.objects.create(name=name)
+        topic = Topic.objects.create(name='Bonding', subject=Subject.objects.get(name='Chemistry'))
+        self.fresh = [Question.objects.create(topic=topic, text=f'fresh {i}') for i in range(8)]
+        self.cooling = [
+            Question.objects.create(
+                topic=topic, text=f'cooling {i}', last_appeared=self.MONDAY - datetime.timedelta(days=10),
+            )
+            for i in range(4)
+        ]
+
+    def test_skips_questions_on_cooldown(self):
+        with mock.patch('daily.management.commands.plan_daily_quiz.quiz_today', return_value=self.MONDAY):
+            call_command('plan_daily_quiz', '--days', '7', stdout=StringIO())
+
+        first, second = (
+            set(DailyQuiz.objects.get(date=day).questions.all())
+            for day in [self.MONDAY, self.MONDAY + datetime.timedelta(days=7)]
+        )
+        # A week apart is well inside the cooldown: the second Monday only
+        # gets the fresh questions the first one left over.
+        self.assertEqual(len(first), MAX_PER_TOPIC)
+        self.assertEqual(first | second, set(self.fresh))
+        self.assertFalse(first & second)
+        self.assertEqual(DailyQuiz.objects.count(), 2)
+
+
+class LazyGenerationTests(TestCase):
+    MONDAY = datetime.date(2026, 10, 19)     # Chemistry day
+
+    def setUp(self):
+        topic = Topic.objects.create(name='Bonding', subject=Subject.objects.create(name='Chemistry'))
+        for i in range(3):
+            question = Question.objects.create(topic=topic, text=f'Q{i}')
+            Choice.objects.create(question=question, text='right', is_correct=True)
+            Choice.objects.create(question=question, text='wrong')
+
+        self.addCleanup(payload.invalidate, self.MONDAY)
+        patcher = mock.patch('daily.views.quiz_today', return_value=self.MONDAY)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        generate = mock.patch('daily.script.generate_daily_quiz', wraps=script.generate_daily_quiz)
+        self.generate = generate.start()
+        self.addCleanup(generate.stop)
+
+    def test_generates_once(self):
+        for _ in range(2):
+            response = self.client.get(reverse('daily:get_questions'))
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.generate.call_count, 1)
+        self.assertEqual(DailyQuiz.objects.get(date=self.MONDAY).questions.count(), 3)
+
+    def test_other_callers_are_told_to_retry_without_waiting(self):
+        lock_key = script._generation_lock_key(self.MONDAY)
+        cache.add(lock_key, 'another worker', script.GENERATION_LOCK_SECONDS)
+        self.addCleanup(cache.delete, lock_key)
+
+        with mock.patch('time.sleep') as sleep:
+            response = self.client.get(reverse('daily:get_questions'))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '2')
+        self.assertTrue(response.json()['generating'])
+        sleep.assert_not_called()
+        self.generate.assert_not_called()
+        self.assertFalse(DailyQuiz.objects.exists())
+
+    def test_no_questions_is_not_retried(self):
+        Question.objects.update(is_active=False)
+        response = self.client.get(reverse('daily:get_questions'))
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.has_header('Retry-After'))
+
+
+class QuizPayloadTests(TestCase):
+    def setUp(self):
+        make_quiz(questions=6, choices=4)
+        self.addCleanup(payload.invalidate, QUIZ_DAY)
+        patcher = mock.patch('daily.views.quiz_today', return_value=QUIZ_DAY)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client.force_login(make_user())
+
+    def fetch(self, **headers):
+        return self.client.get(reverse('daily:get_questions'), headers=headers)
+
+    def test_same_seed_same_order(self):
+        shape = [4] * 6
+        self.assertEqual(payload.shuffle_order(shape, 'a'), payload.shuffle_order(shape, 'a'))
+        self.assertNotEqual(payload.shuffle_order(shape, 'a'), payload.shuffle_order(shape, 'b'))
+
+        first, again = self.fetch().json(), self.fetch().json()
+        self.assertEqual(first, again)
+        self.assertEqual(sorted(first['order']['questions']), list(range(6)))
+        self.assertNotIn('isCorrect', first['questions'][0]['choices'][0])
+
+    def test_etag_round_trip(self):
+        response = self.fetch()
+        etag = response['ETag']
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+        not_modified = self.fetch(if_none_match=etag)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], etag)
+        self.assertEqual(not_modified.content, b'')
+
+        self.assertEqual(self.fetch(if_none_match='"stale"').status_code, 200)
+
+        # Another user shares the payload but not the order, so not the ETag.
+        self.client.force_login(make_user('rival'))
+        response = self.fetch(if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class ImportQuestionsTests(TestCase):
+    HEADER = ['subject', 'topic', 'question_text', 'choice1', 'choice2', 'choice3', 'choice4', 'correct_answer']
+    GOOD = [
+        ['Physics', 'Optics', 'Focal length of a plane mirror?', 'zero', 'infinite', '1 m', '-1 m', 'infinite'],
+        ['Physics', 'Waves', 'Unit of frequency?', 'Hz', 'N', 'J', 'W', 'Hz'],
+    ]
+
+    def write_csv(self, rows, header=HEADER):
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        self.addCleanup(os.remove, path)
+        with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerows([header, *rows])
+        return path
+
+    def run_import(self, path, *args):
+        out = StringIO()
+        call_command('daily_import_questions', path, *args, stdout=out)
+        return out.getvalue()
+
+    def test_imports_questions_with_one_correct_choice(self):
+        self.run_import(self.write_csv(self.GOOD))
+        question = Question.objects.get(text='Unit of frequency?')
+        self.assertEqual(question.topic.subject.name, 'Physics')
+        self.assertEqual(
+            sorted(question.choices.values_list('text', 'is_correct')),
+            [('Hz', True), ('J', False), ('N', False), ('W', False)],
+        )
+
+    def test_reimport_does_not_duplicate(self):
+        path = self.write_csv(self.GOOD + self.GOOD[:1])     # repeated within the file too
+        self.run_import(path)
+        output = self.run_import(path)
+
+        self.assertIn('Successfully imported 0 new questions', output)
+        self.assertEqual(Question.objects.count(), 2)
+        self.assertEqual(Choice.objects.count(), 8)
+        self.assertEqual(Topic.objects.count(), 2)
+        self.assertEqual(Subject.objects.count(), 1)
+
+    def test_bad_rows_block_the_import(self):
+        bad = [
+            ['Physics', 'Optics', '', 'a', 'b', 'c', 'd', 'a'],                 # row 4: empty question
+            ['Physics', 'Optics', 'Same twice?', 'a', 'a', 'c', 'd', 'a'],      # row 5: repeated choice
+            ['Physics', 'Optics', 'Which?', 'a', 'b', 'c', 'd', 'e'],           # row 6: answer not a choice
+        ]
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command('daily_import_questions', self.write_csv(self.GOOD + bad), stdout=out)
+        self.assertFalse(Question.objects.exists())
+        for row in ['Row 4: empty question_text', 'Row 5: choices must all be different', "Row 6: correct_answer 'e'"]:
+            self.assertIn(row, out.getvalue())
+
+        self.run_import(self.write_csv(self.GOOD + bad), '--skip-bad')
+        self.assertEqual(Question.objects.count(), 2)
+
+    def test_missing_columns(self):
+        with self.assertRaisesMessage(CommandError, 'Missing required columns: correct_answer'):
+            self.run_import(self.write_csv([], header=self.HEADER[:-1]))
+
+
+class ArchiveTests(TestCase):
+    SUNDAY = QUIZ_DAY - datetime.timedelta(days=1)
+
+    def setUp(self):
+        self.key = make_quiz(day=self.SUNDAY)
+        make_quiz(day=QUIZ_DAY)
+        patcher = mock.patch('daily.views.quiz_today', return_value=QUIZ_DAY)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.assertEqual(payload.archive_past_quizzes(before=QUIZ_DAY), 1)
+        self.url = reverse('daily:archive_quiz', args=[self.SUNDAY.isoformat()])
+
+    def test_serves_stored_gzip_with_answers(self):
+        response = self.client.get(self.url, headers={'accept_encoding': 'gzip, br'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        data = json.loads(gzip.decompress(response.content))
+
+        correct = {q['id']: [c['id'] for c in q['choices'] if c['isCorrect']] for q in data['questions']}
+        self.assertEqual(correct, {q_id: choices[:1] for q_id, choices in self.key.items()})
+
+        plain = self.client.get(self.url)
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(json.loads(plain.content), data)
+
+        self.assertEqual(self.client.get(self.url, headers={'if_none_match': response['ETag']}).status_code, 304)
+
+    def test_archive_never_changes(self):
+        before = self.client.get(self.url)
+        Question.objects.update(text='edited')
+        Choice.objects.update(is_correct=False)
+
+        self.assertEqual(payload.archive_past_quizzes(before=QUIZ_DAY), 0)
+        after = self.client.get(self.url)
+        self.assertEqual(after.content, before.content)
+        self.assertEqual(after['ETag'], before['ETag'])
+
+    def test_only_past_days(self):
+        for day in [QUIZ_DAY, QUIZ_DAY + datetime.timedelta(days=1), self.SUNDAY - datetime.timedelta(days=1)]:
+            response = self.client.get(reverse('daily:archive_quiz', args=[day.isoformat()]))
+            self.assertEqual(response.status_code, 404, day)
+
+        days = self.client.get(reverse('daily:archive_index')).json()['days']
+        self.assertEqual(days, [{'date': self.SUNDAY.isoformat(), 'subject': 'Physics', 'questions': 3}])
+
+
+class SubmitTests(TestCase):
+    """Grading happens on the server; the answer key only leaves it for a recorded result."""
+
+    def setUp(self):
+        self.key = make_quiz()      # question id -> [correct choice id, wrong choice id]
+        self.addCleanup(payload.invalidate, QUIZ_DAY)
+        patcher = mock.patch('daily.views.quiz_today', return_value=QUIZ_DAY)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = make_user()
+
+    def submit(self, answers):
+        return self.client.post(
+            reverse('daily:submit'), json.dumps({'answers': answers}), content_type='application/json',
+        )
+
+    def test_guests_are_asked_to_sign_in(self):
+        page = self.client.get(reverse('daily:quiz'))
+        self.assertContains(page, 'id="signin-prompt"')
+        self.assertContains(page, 'window.QUIZ_SIGNED_IN  = false')
+
+        self.client.force_login(self.user)
+        page = self.client.get(reverse('daily:quiz'))
+        self.assertNotContains(page, 'id="signin-prompt"')
+        self.assertContains(page, 'window.QUIZ_SIGNED_IN  = true')
+
+    def test_anonymous_submit_reveals_nothing(self):
+        response = self.submit({str(q): right for q, (right, _) in self.key.items()})
+        self.assertEqual(response.status_code, 401)
+        self.assertNotIn('correct', response.json())
+        self.assertFalse(ChoiceTally.objects.exists())
+
+    def test_grades_against_the_stored_key(self):
+        self.client.force_login(self.user)
+        (q1, (r1, _)), (q2, (_, w2)), _ = self.key.items()
+        data = self.submit({str(q1): r1, str(q2): w2, '999999': r1}).json()
+
+        self.assertEqual((data['score'], data['total']), (1, 3))
+        self.assertEqual(data['correct'], {str(q): right for q, (right, _) in self.key.items()})
+        self.assertEqual(data['picks'], {str(q1): r1, str(q2): w2})
+        self.assertEqual(data['tally'], {str(r1): 1, str(w2): 1})
+
+        result = DailyResult.objects.get(user=self.user, date=QUIZ_DAY)
+        self.assertEqual((result.score, result.total), (1, 3))
+
+    def test_choice_from_another_question_is_ignored(self):
+        self.client.force_login(self.user)
+        (q1, _), (_, (r2, _)), _ = self.key.items()
+        data = self.submit({str(q1): r2}).json()
+        self.assertEqual((data['score'], data['picks']), (0, {}))
+
+    def test_first_submission_counts(self):
+        self.client.force_login(self.user)
+        q1, (r1, w1) = next(iter(self.key.items()))
+        self.submit({str(q1): w1})
+        data = self.submit({str(q1): r1}).json()
+
+        self.assertEqual(data['score'], 0)
+        self.assertEqual(data['picks'], {str(q1): w1})
+        self.assertEqual(data['tally'], {str(w1): 1})
+        self.assertEqual(DailyResult.objects.count(), 1)
+
+
+class StreakTests(TestCase):
+    USER = 7
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def play(self, *days_ago):
+        for n in days_ago:
+            activity.mark_active(self.USER, QUIZ_DAY - datetime.timedelta(days=n))
+
+    def streak(self):
+        return activity.streak(self.USER, QUIZ_DAY)
+
+    def test_saturday_is_not_a_gap(self):
+        self.play(0, 1, 3, 4)           # Mon, Sun, (Sat off), Fri, Thu
+        self.assertEqual(self.streak(), 4)
+
+    def test_streak_survives_until_today_is_over(self):
+        self.play(1, 3)                 # Sun and Fri; Monday not played yet
+        self.assertEqual(self.streak(), 2)
+        self.play(0)
+        self.assertEqual(self.streak(), 3)
+
+    def test_missed_day_ends_the_streak(self):
+        self.play(1, 4, 5)              # Sun, then nothing on Fri; Thu and Wed
+        self.assertEqual(self.streak(), 1)
+        self.play(3)                    # Fri filled in: Sun, Fri, Thu, Wed as of Sunday
+        self.assertEqual(activity.streak(self.USER, QUIZ_DAY - datetime.timedelta(days=1)), 4)
+        self.assertEqual(activity.streak(self.USER, QUIZ_DAY + datetime.timedelta(days=1)), 0)
+
+    def test_cached_per_user_per_day(self):
+        self.play(1, 2)
+        with mock.patch('daily.activity._user_bits', wraps=activity._user_bits) as user_bits:
+            for _ in range(3):
+                self.assertEqual(self.streak(), 1)
+                self.assertEqual(activity.active_days(self.USER, days=30, today=QUIZ_DAY), 2)
+            self.assertEqual(user_bits.call_count, 2)
+
+            self.play(0)                # marking today drops the cached numbers
+            self.assertEqual(self.streak(), 2)
+            self.assertEqual(activity.active_days(self.USER, days=30, today=QUIZ_DAY), 3)
+            self.assertEqual(activity.streak(self.USER + 1, QUIZ_DAY), 0)
+
+
+class CapacityTests(TestCase):
+    def setUp(self):
+        self.cooled = QUIZ_DAY - datetime.timedelta(days=10)
+        self.bank({
+            # Physics, one quiz a week: two stocked topics, 5 questions each per quiz.
+            ('Physics', 'Optics'): [None] * 10 + [self.cooled] * 2,
+            ('Physics', 'Waves'): [None] * 8,
+            ('Physics', 'Heat'): [],
+            # Chemistry, one quiz a week: enough to refill within each cooldown.
+            ('Chemistry', 'Bonding'): [None] * 110,
+            ('Chemistry', 'Acids'): [None] * 110,
+            # Never on the quiz calendar.
+            ('Nepali', 'Grammar'): [None] * 3,
+        })
+        Question.objects.create(topic=Topic.objects.get(name='Heat'), text='retired', is_active=False)
+
+    def bank(self, spec):
+        questions = []
+        for (subject, topic), last_appeared in spec.items():
+            topic = Topic.objects.create(name=topic, subject=Subject.objects.get_or_create(name=subject)[0])
+            questions += [Question(topic=topic, text='Q', last_appeared=day) for day in last_appeared]
+        Question.objects.bulk_create(questions)
+
+    def test_forecast(self):
+        report = capacity.forecast(QUIZ_DAY)
+        self.assertEqual([s['subject'] for s in report], ['Physics', 'Chemistry', 'Nepali'])
+        physics, chemistry, nepali = report
+
+        self.assertEqual(
+            {k: physics[k] for k in ['quizzes_per_week', 'active', 'eligible', 'fills_today', 'days_left']},
+            {'quizzes_per_week': 1, 'active': 20, 'eligible': 18, 'fills_today': True, 'days_left': 7},
+        )
+        topics = {t['topic']: t for t in physics['topics']}
+        self.assertEqual(
+            {name: (t['eligible'], t['cooling'], t['demand'], t['days_left']) for name, t in topics.items()},
+            {'Optics': (10, 2, 5, 14), 'Waves': (8, 0, 5, 7), 'Heat': (0, 0, 0, None)},
+        )
+        self.assertEqual(topics['Optics']['next_release'], self.cooled + datetime.timedelta(days=REPETITION))
+
+        self.assertIsNone(chemistry['days_left'])
+        self.assertEqual({t['days_left'] for t in chemistry['topics']}, {None})
+        self.assertEqual((nepali['quizzes_per_week'], nepali['days_left']), (0, None))
+        self.assertFalse(nepali['fills_today'])
 
-# Create your tests here.
+    def test_command(self):
+        out = StringIO()
+        with mock.patch('daily.capacity.quiz_today', return_value=QUIZ_DAY):
+            call_command('daily_capacity', '--topics', stdout=out)
+        self.assertIn('Physics: 18/20 eligible, 1 quiz/week — 7 day(s)', out.getvalue())
+        self.assertIn('Bonding: 110/110 eligible, ~5/quiz — sustainable', out.getvalue())
@@ -5,4 +5,7 @@ app_name = 'daily'
 urlpatterns = [
     path('quiz/', views.DailyQuizView.as_view(), name='quiz' ),
     path('quiz/api/questions/', views.DailyQuizAPI.as_view(), name='get_questions' ),
+    path('quiz/api/submit/', views.DailyQuizSubmitAPI.as_view(), name='submit' ),
+    path('quiz/api/archive/', views.DailyQuizArchiveIndexAPI.as_view(), name='archive_index' ),
+    path('quiz/api/archive/<str:date>/', views.DailyQuizArchiveAPI.as_view(), name='archive_quiz' ),
 ]
\ No newline at end of file
@@ -1,10 +1,18 @@
-from django.http import JsonResponse
+import datetime
+import gzip
+import hashlib
+import json
+
+from django.core.paginator import EmptyPage, Paginator
+from django.db import transaction
+from django.db.models import F
+from django.http import Http404, HttpResponse, HttpResponseNotModified, JsonResponse
 from django.views import View
 from django.views.generic import TemplateView
 
-from daily.models import DailyQuiz
-from django.utils import timezone
-import random
+from daily import activity, payload
+from daily.models import ChoiceTally, DailyQuizArchive, DailyResult
+from daily.script import WEEKEND, ensure_daily_quiz, generation_in_progress, quiz_today
 
 
 class DailyQuizView(TemplateView):
@@ -13,41 +21,216 @@ class DailyQuizView(TemplateView):
 class DailyQuizAPI(View):
 
     @staticmethod
-    def get(request):
-        today = timezone.now().date()
+    def _seed(request, today):
+        """Stable per user per day, so reloads keep the same order."""
+        if request.user.is_authenticated:
+            who = f'user:{request.user.pk}'
+        else:
+            who = f'anon:{request.session.session_key or ""}'
+        return f'{today.isoformat()}:{who}'
+
+    GENERATION_RETRY_SECONDS = 2
+
+    @classmethod
+    def _not_ready(cls, today):
+        if not generation_in_progress(today):
+            return JsonResponse({'error': 'No quiz available today'}, status=503)
+        response = JsonResponse({'error': 'Quiz is being generated', 'generating': True}, status=503)
+        response['Retry-After'] = str(cls.GENERATION_RETRY_SECONDS)
+        return response
+
+    def get(self, request):
+        today = quiz_today()
         weekday = today.weekday()
 
-        if weekday == 5:
+        if weekday == WEEKEND:
             return JsonResponse({
                 'weekend': True,
             }, status=200)
 
-        quiz = DailyQuiz.objects.prefetch_related('questions__choices').filter(
-            date=today).first()
-
-        if not quiz:
-            from daily.script import generate_daily_quiz
-            generate_daily_quiz()
-            quiz = DailyQuiz.objects.prefetch_related(
-                'questions__choices').filter(date=today).first()
-
-        questions = list(quiz.questions.all())
-        random.shuffle(questions)
-        quiz_data = []
-        for question in questions:
-            choices = list(question.choices.all())
-            random.shuffle(choices)
-            quiz_data.append({
-                'id': question.id,
-                'question' : question.text,
-                'choices' : [
-                    {
-                        'id' : choice.id,
-                        'text' : choice.text,
-                        'isCorrect' : choice.is_correct,
-                    } for choice in choices
-                ],
-            })
-
-        return JsonResponse({'questions' : quiz_data})
+        # The serialized quiz is shared by everyone for the whole day; only
+        # the small permutation below is computed per request.
+        entry = payload.get_payload(today)
+        if entry is None:
+            # Normally pre-generated by plan_daily_quiz; this is the fallback.
+            # Only one request generates — the others get a 503 with
+            # Retry-After at once instead of piling onto the same work.
+            if ensure_daily_quiz(today) is None:
+                return self._not_ready(today)
+            entry = payload.get_payload(today)
+        body, digest, shape, _ = entry
+
+        seed = self._seed(request, today)
+        etag = '"%s-%s"' % (digest[:16], hashlib.md5(seed.encode()).hexdigest()[:8])
+        if etag in [t.strip() for t in request.headers.get('If-None-Match', '').split(',')]:
+            response = HttpResponseNotModified()
+        else:
+            order = json.dumps(payload.shuffle_order(shape, seed), separators=(',', ':'))
+            # Splice the order in front of the cached object's keys — the
+            # shared bytes are never decoded or re-encoded.
+            response = HttpResponse(
+                b'{"order":' + order.encode() + b',' + body[1:],
+                content_type='application/json',
+            )
+
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        response['Vary'] = 'Cookie'
+        return response
+
+
+class DailyQuizSubmitAPI(View):
+    """
+    Grades today's quiz on the server.
+    Body: JSON { "answers": { "<question_id>": <choice_id>, … } }
+
+    Sign-in required: the first submission of the day is stored as one
+    DailyResult and bumps each picked choice's ChoiceTally; later
+    submissions just return that stored result.  The response is the only
+    place the day's correct answers are revealed, and only once a result
+    is on record — an anonymous submit would otherwise be a free answer
+    key (or, through the score, a one-question-at-a-time oracle):
+        { "score", "total", "correct": {qid: choice_id},
+          "picks": {qid: choice_id}, "tally": {choice_id: n}, "streak" }
+    """
+    http_method_names = ['post']
+
+    def post(self, request):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Login required'}, status=401)
+
+        today = quiz_today()
+        entry = payload.get_payload(today) if today.weekday() != WEEKEND else None
+        if entry is None:
+            return JsonResponse({'error': 'No quiz today'}, status=404)
+        answer_key = entry[3]
+
+        try:
+            data = json.loads(request.body)
+        except json.JSONDecodeError:
+            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+        answers = data.get('answers')
+        if not isinstance(answers, dict):
+            return JsonResponse({'error': 'Expected an answers object'}, status=400)
+
+        # Keep only real (question, choice) pairs from today's quiz.
+        picks = {}
+        for q_id_str, choice_id in answers.items():
+            try:
+                q_id = int(q_id_str)
+            except (TypeError, ValueError):
+                continue
+            if q_id in answer_key and choice_id in answer_key[q_id][1]:
+                picks[q_id] = choice_id
+
+        picks = self._record(request.user, today, picks, answer_key)
+        activity.mark_active(request.user.id, today)
+
+        score = sum(1 for q_id, choice_id in picks.items() if answer_key[q_id][0] == choice_id)
+        all_choices = [c_id for _, choice_ids in answer_key.values() for c_id in choice_ids]
+        tally = dict(
+            ChoiceTally.objects.filter(date=today, choice_id__in=all_choices)
+            .values_list('choice_id', 'picks')
+        )
+
+        return JsonResponse({
+            'score': score,
+            'total': len(answer_key),
+            'correct': {str(q_id): correct for q_id, (correct, _) in answer_key.items()},
+            'picks': {str(q_id): choice_id for q_id, choice_id in picks.items()},
+            'tally': {str(c_id): n for c_id, n in tally.items()},
+            'streak': activity.streak(request.user.id, today),
+        })
+
+    @staticmethod
+    def _record(user, today, picks, answer_key):
+        """Store the first submission of the day; returns the picks that count."""
+        score = sum(1 for q_id, choice_id in picks.items() if answer_key[q_id][0] == choice_id)
+        with transaction.atomic():
+            result, created = DailyResult.objects.get_or_create(
+                user=user, date=today,
+                defaults={
+                    'score': score,
+                    'total': len(answer_key),
+                    'picks': {str(q_id): c_id for q_id, c_id in picks.items()},
+                },
+            )
+            if created and picks:
+                picked = list(picks.values())
+                ChoiceTally.objects.bulk_create(
+                    [ChoiceTally(date=today, choice_id=c_id) for c_id in picked],
+                    ignore_conflicts=True,
+                )
+                # One UPDATE, each counter incremented in the database.
+                ChoiceTally.objects.filter(date=today, choice_id__in=picked).update(
+                    picks=F('picks') + 1
+                )
+        return {int(q_id): c_id for q_id, c_id in result.picks.items()}
+
+
+class DailyQuizArchiveIndexAPI(View):
+    """
+    Calendar of archived days, newest first:
+        GET ?page=N  →  {"days": [{"date", "subject", "questions"}, …],
+                         "page", "numPages", "hasNext"}
+    Reads only the small columns — never the stored payloads.
+    """
+    PAGE_SIZE = 30
+
+    def get(self, request):
+        days = DailyQuizArchive.objects.values('date', 'subject', 'question_count')
+        paginator = Paginator(days, self.PAGE_SIZE)
+        try:
+            page = paginator.page(request.GET.get('page') or 1)
+        except (EmptyPage, ValueError):
+            return JsonResponse({'error': 'Invalid page'}, status=404)
+
+        response = JsonResponse({
+            'days': [
+                {
+                    'date': day['date'].isoformat(),
+                    'subject': day['subject'],
+                    'questions': day['question_count'],
+                } for day in page.object_list
+            ],
+            'page': page.number,
+            'numPages': paginator.num_pages,
+            'hasNext': page.has_next(),
+        })
+        # A new day is appended once a day; a short shared cache is plenty.
+        response['Cache-Control'] = 'public, max-age=300'
+        return response
+
+
+class DailyQuizArchiveAPI(View):
+    """
+    One past day's quiz, answers included, exactly as frozen by
+    plan_daily_quiz.  The stored gzip bytes are sent as-is to clients that
+    accept gzip; the body can never change, so it is cacheable forever.
+    """
+
+    def get(self, request, date):
+        try:
+            quiz_date = datetime.date.fromisoformat(date)
+        except ValueError:
+            raise Http404('Invalid date')
+        if quiz_date >= quiz_today():
+            raise Http404('Only past quizzes are archived')
+
+        archive = DailyQuizArchive.objects.filter(date=quiz_date).only('body', 'etag').first()
+        if archive is None:
+            raise Http404('No quiz archived for this date')
+
+        etag = f'"{archive.etag}"'
+        if etag in [t.strip() for t in request.headers.get('If-None-Match', '').split(',')]:
+            response = HttpResponseNotModified()
+        elif 'gzip' in request.headers.get('Accept-Encoding', ''):
+            response = HttpResponse(bytes(archive.body), content_type='application/json')
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(gzip.decompress(archive.body), content_type='application/json')
 
+        response['ETag'] = etag
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+        response['Vary'] = 'Accept-Encoding'
+        return response
@@ -4,11 +4,13 @@ from .models import Thread, Reply
 
 @admin.register(Thread)
 class ThreadAdmin(admin.ModelAdmin):
-    list_display  = ("title", "author", "category", "likes", "created_at")
-    list_filter   = ("category",)
+    list_display  = ("title", "author", "category", "likes", "reply_count", "image_status", "created_at")
+    readonly_fields = ("reply_count",)
+    list_filter   = ("category", "image_status")
     search_fields = ("title", "author__username")
 
 @admin.register(Reply)
 class ReplyAdmin(admin.ModelAdmin):
-    list_display  = ("thread", "author", "likes", "created_at")
+    list_display  = ("thread", "author", "likes", "image_status", "created_at")
+    list_filter   = ("image_status",)
     search_fields = ("author__username",)
\ No newline at end of file
@@ -0,0 +1,104 @@
+# forum/imaging.py
+"""
+WebP compression of forum uploads, off the request path.
+
+compress_image is a decode, a resize and several WebP encodes — a few
+hundred milliseconds of CPU for a phone photo.  Done inline it held a
+gunicorn worker for all of that, so instead:
+
+    1. the view stores the validated upload as received, with
+       image_status = "processing", and responds straight away;
+    2. enqueue() hands the row to a small pool of background threads
+       once the transaction commits;
+    3. compress() writes the WebP and its srcset variants, swaps it into
+       the row (status "ready") and deletes the original.
+
+Only a "ready" image is ever shown.  If compression fails the row is
+marked "failed" and the upload stays hidden: re-encoding is what strips
+the EXIF block, so the original may still carry the phone's GPS position.
+
+The pool is bounded at IMAGE_WORKERS per process, so a burst of uploads
+queues up instead of taking every core from the web workers.  Pillow
+releases the GIL while resampling and encoding, so the threads run in
+parallel with request handling.  Work queued in a process that restarts
+is not lost: the compress_pending_images cron job picks up any row still
+"processing" after a few minutes.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection, transaction
+
+from config.images import delete_image, encode_image, prepare_image, save_variants
+
+from .models import IMAGE_FAILED, IMAGE_PROCESSING, IMAGE_READY
+
+logger = logging.getLogger(__name__)
+
+# ── Constants ──────────────────────────────────────────────────────────────────
+
+IMAGE_WORKERS = 2
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _pool():
+    # Created on first use, so each gunicorn worker gets its own after fork.
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=IMAGE_WORKERS, thread_name_prefix="forum-image")
+        return _executor
+
+
+def enqueue(model, pk):
+    """Compress the row's image in the background once the current transaction commits."""
+    transaction.on_commit(lambda: _pool().submit(_run, model, pk))
+
+
+def _run(model, pk):
+    try:
+        compress(model, pk)
+    except Exception:
+        logger.exception("Compressing %s %s failed", model.__name__, pk)
+    finally:
+        connection.close()      # this thread's connection; the pool thread outlives the job
+
+
+def compress(model, pk):
+    """
+    Replace the row's original upload with its WebP version and write the
+    thumb/medium variants beside it, all from one decode.  Returns True if
+    this call swapped it in.  Safe to run twice for the same row: the swap
+    is conditional on the original still being there, and the loser
+    deletes its own copies.
+    """
+    obj = model.objects.filter(pk=pk, image_status=IMAGE_PROCESSING).only("id", "image").first()
+    if obj is None or not obj.image:
+        return False
+
+    original = obj.image.name
+    storage = obj.image.storage
+    try:
+        with storage.open(original, "rb") as raw:
+            img = prepare_image(raw)
+        webp = encode_image(img, os.path.basename(original))
+    except Exception:
+        # Kept for the admin, but views never publish a failed upload.
+        logger.exception("Compressing %s %s failed; image withheld", model.__name__, pk)
+        model.objects.filter(pk=pk, image=original).update(image_status=IMAGE_FAILED)
+        return False
+
+    name = storage.save(obj.image.field.generate_filename(obj, webp.name), webp)
+    width = save_variants(storage, name, img)
+    swapped = model.objects.filter(pk=pk, image=original, image_status=IMAGE_PROCESSING).update(
+        image=name, image_width=width, image_status=IMAGE_READY,
+    )
+    if swapped:
+        storage.delete(original)
+    else:
+        delete_image(storage, name)
+    return bool(swapped)
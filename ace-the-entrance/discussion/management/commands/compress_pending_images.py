@@ -0,0 +1,48 @@
+"""
+Management command to compress forum uploads the background pool never
+finished — the process restarted with jobs queued, or a job crashed.
+
+Uploads are compressed by discussion.imaging right after they are posted,
+normally within seconds.  Anything still "processing" after --older-than
+minutes is compressed here, in the cron process rather than a web worker.
+
+Usage:
+    python manage.py compress_pending_images
+    python manage.py compress_pending_images --older-than 0
+
+Options:
+    --older-than N   Only uploads posted more than N minutes ago (default 5),
+                     so rows the pool is about to handle are left alone
+"""
+
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from discussion import imaging
+from discussion.models import IMAGE_PROCESSING, Reply, Thread
+
+
+class Command(BaseCommand):
+    help = 'Compresses forum images still waiting for the background pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=5, metavar='MINUTES')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - datetime.timedelta(minutes=options['older_than'])
+
+        compressed = pending = 0
+        for model in (Thread, Reply):
+            ids = list(
+                model.objects.filter(image_status=IMAGE_PROCESSING, created_at__lt=cutoff)
+                .order_by('created_at').values_list('pk', flat=True)
+            )
+            for pk in ids:
+                if imaging.compress(model, pk):
+                    compressed += 1
+                    self.stdout.write(f"  {model.__name__.lower()} {pk}: compressed")
+            pending += len(ids)
+
+        self.stdout.write(self.style.SUCCESS(f"Compressed {compressed} of {pending} pending image(s)."))
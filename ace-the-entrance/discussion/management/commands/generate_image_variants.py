@@ -0,0 +1,58 @@
+"""
+Management command to write srcset variants for forum images compressed
+before variants existed.
+
+New uploads get their thumb and medium copies when discussion.imaging
+compresses them.  This fills them in for older threads and replies whose
+image is ready but has no image_width, reading the stored WebP (already at
+most 1024 px) rather than re-encoding it.
+
+Usage:
+    python manage.py generate_image_variants
+    python manage.py generate_image_variants --dry-run
+
+Options:
+    --dry-run   Count the images that would get variants
+"""
+
+from django.core.management.base import BaseCommand
+
+from config.images import prepare_image, save_variants
+from discussion.models import IMAGE_PROCESSING, Reply, Thread
+
+
+class Command(BaseCommand):
+    help = 'Generates thumb/medium srcset variants for existing forum images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        done = total = 0
+        for model in (Thread, Reply):
+            pending = (
+                model.objects.filter(image_width__isnull=True)
+                .exclude(image='').exclude(image__isnull=True)
+                .exclude(image_status=IMAGE_PROCESSING)     # imaging.compress will do these
+            )
+            if options['dry_run']:
+                total += pending.count()
+                continue
+
+            for obj in pending.only('id', 'image').order_by('pk').iterator():
+                total += 1
+                storage = obj.image.storage
+                try:
+                    with storage.open(obj.image.name, 'rb') as raw:
+                        img = prepare_image(raw)
+                except Exception as exc:        # missing or unreadable file
+                    self.stderr.write(f"  {model.__name__.lower()} {obj.pk}: {exc}")
+                    continue
+                width = save_variants(storage, obj.image.name, img)
+                model.objects.filter(pk=obj.pk, image=obj.image.name).update(image_width=width)
+                done += 1
+
+        if options['dry_run']:
+            self.stdout.write(f"Would generate variants for {total} image(s).")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Generated variants for {done} of {total} image(s)."))
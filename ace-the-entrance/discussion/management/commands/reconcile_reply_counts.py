@@ -0,0 +1,72 @@
+"""
+Management command to repair drift in Thread.reply_count.
+
+The column is kept in step by discussion.signals with F() updates, but
+bulk deletes, raw SQL or a crash between statements can leave it off.
+This walks the threads in primary-key batches, finds the ones whose stored
+count differs from COUNT(replies), and rewrites only those — each with a
+correlated subquery, so a reply posted mid-run is still counted.
+
+Usage:
+    python manage.py reconcile_reply_counts
+    python manage.py reconcile_reply_counts --dry-run
+
+Options:
+    --batch-size N   Threads per batch (default 2000)
+    --dry-run        Report the drifted threads without fixing them
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from discussion.models import Reply, Thread
+
+
+class Command(BaseCommand):
+    help = 'Recomputes Thread.reply_count wherever it has drifted from the real number of replies'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report threads whose count is wrong')
+
+    def handle(self, *args, **options):
+        live_count = Coalesce(
+            Subquery(
+                Reply.objects.filter(thread=OuterRef('pk'))
+                .order_by().values('thread').annotate(n=Count('id')).values('n')
+            ),
+            0,
+        )
+
+        checked = fixed = 0
+        last_id = 0
+        while True:
+            ids = list(
+                Thread.objects.filter(pk__gt=last_id).order_by('pk')
+                .values_list('pk', flat=True)[:options['batch_size']]
+            )
+            if not ids:
+                break
+
+            drifted = list(
+                Thread.objects.filter(pk__gte=ids[0], pk__lte=ids[-1])
+                .annotate(actual=live_count)
+                .exclude(reply_count=F('actual'))
+                .values_list('pk', 'reply_count', 'actual')
+            )
+            for pk, stored, actual in drifted:
+                self.stdout.write(f"  thread {pk}: stored {stored}, actual {actual}")
+
+            if drifted and not options['dry_run']:
+                with transaction.atomic():
+                    Thread.objects.filter(pk__in=[pk for pk, _, _ in drifted]).update(reply_count=live_count)
+
+            checked += len(ids)
+            fixed += len(drifted)
+            last_id = ids[-1]
+
+        verb = 'would fix' if options['dry_run'] else 'fixed'
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} thread(s), {verb} {fixed}."))
@@ -0,0 +1,25 @@
+"""
+Management command to re-decay the forum's stored hot scores.
+
+Likes and replies update a thread's score as they happen; this job
+(cron, every 10 minutes) applies the passage of time to every thread in
+the hot window and zeroes the ones that have aged out of it.
+
+Usage:
+    python manage.py refresh_hot_scores [--batch-size N]
+"""
+
+from django.core.management.base import BaseCommand
+
+from discussion.ranking import REFRESH_BATCH, refresh_scores
+
+
+class Command(BaseCommand):
+    help = 'Recomputes time-decayed hot scores for recent forum threads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=REFRESH_BATCH)
+
+    def handle(self, *args, **options):
+        rescored = refresh_scores(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rescored {rescored} thread(s)."))
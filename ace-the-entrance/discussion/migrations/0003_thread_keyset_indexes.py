@@ -0,0 +1,27 @@
+# Generated by Django 6.0.2 on 2026-10-19 17:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('discussion', '0002_alter_reply_image_alter_thread_image_replylike_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['-created_at'], name='thread_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['category', '-created_at'], name='thread_cat_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['-likes', '-created_at'], name='thread_popular_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-19 17:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('discussion', '0003_thread_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reply',
+            index=models.Index(fields=['thread', 'created_at'], name='reply_thread_created_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.2 on 2026-10-19 17:50
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_reply_counts(apps, schema_editor):
+    Thread = apps.get_model('discussion', 'Thread')
+    Reply = apps.get_model('discussion', 'Reply')
+    counts = (
+        Reply.objects.filter(thread=OuterRef('pk'))
+        .order_by().values('thread').annotate(n=Count('id')).values('n')
+    )
+    Thread.objects.update(reply_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('discussion', '0004_reply_thread_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='thread',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_reply_counts, migrations.RunPython.noop),
+    ]
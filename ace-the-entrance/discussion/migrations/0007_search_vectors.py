@@ -0,0 +1,93 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:20
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+FTS_TABLE = 'discussion_search_fts'
+
+
+def create_search_index(apps, schema_editor):
+    """
+    Postgres: GIN indexes on the stored vectors, then fill them.
+    SQLite (local dev, tests): an FTS5 table standing in for both, filled
+    from the existing rows.  See discussion/search.py.
+    """
+    Thread = apps.get_model('discussion', 'Thread')
+    Reply = apps.get_model('discussion', 'Reply')
+    vendor = schema_editor.connection.vendor
+
+    if vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchVector
+        schema_editor.execute(
+            'CREATE INDEX thread_search_idx ON discussion_thread USING gin (search_vector)'
+        )
+        schema_editor.execute(
+            'CREATE INDEX reply_search_idx ON discussion_reply USING gin (search_vector)'
+        )
+        Thread.objects.update(search_vector=(
+            SearchVector('title', weight='A', config='english')
+            + SearchVector('body', weight='B', config='english')
+        ))
+        Reply.objects.update(search_vector=SearchVector('body', weight='B', config='english'))
+
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            "kind UNINDEXED, obj_id UNINDEXED, thread_id UNINDEXED, title, body, "
+            "tokenize='porter unicode61')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (kind, obj_id, thread_id, title, body) "
+            "SELECT 'thread', id, id, title, body FROM discussion_thread"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (kind, obj_id, thread_id, title, body) "
+            "SELECT 'reply', id, thread_id, '', body FROM discussion_reply"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS thread_search_idx')
+        schema_editor.execute('DROP INDEX IF EXISTS reply_search_idx')
+    elif vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('discussion', '0006_thread_hot_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='thread',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='reply',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        # GIN only exists on Postgres, so the indexes are created by hand
+        # there and only recorded in the model state everywhere else.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='thread',
+                    index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='thread_search_idx'),
+                ),
+                migrations.AddIndex(
+                    model_name='reply',
+                    index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='reply_search_idx'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(create_search_index, drop_search_index),
+            ],
+        ),
+    ]
@@ -3,6 +3,8 @@ import uuid
 import os
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 
 
 # ── Upload path helpers ────────────────────────────────────────────────────────
@@ -18,6 +20,21 @@ def reply_image_path(instance, filename):
     return f"discussion/replies/{uuid.uuid4().hex}{ext}"
 
 
+# ── Image processing states ───────────────────────────────────────────────────
+# Uploads are stored as received and compressed to WebP by discussion.imaging
+# after the response has gone out.
+
+IMAGE_READY      = "ready"
+IMAGE_PROCESSING = "processing"
+IMAGE_FAILED     = "failed"        # compression failed; the upload is withheld
+
+IMAGE_STATUS_CHOICES = [
+    (IMAGE_READY,      "Ready"),
+    (IMAGE_PROCESSING, "Processing"),
+    (IMAGE_FAILED,     "Failed"),
+]
+
+
 # ── Models ─────────────────────────────────────────────────────────────────────
 
 class Thread(models.Model):
@@ -34,12 +51,32 @@ class Thread(models.Model):
     category   = models.CharField(max_length=50, choices=CATEGORY_CHOICES, default="General")
     author     = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="threads")
     likes      = models.PositiveIntegerField(default=0)
+    # Kept in step by discussion.signals; reconcile_reply_counts repairs drift.
+    reply_count = models.PositiveIntegerField(default=0)
+    # Time-decayed rank for the Hot sort, maintained by discussion.ranking.
+    hot_score  = models.FloatField(default=0)
     image      = models.ImageField(upload_to=thread_image_path, null=True, blank=True)
+    # Set once the srcset variants exist; see config.images.image_srcset.
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_status = models.CharField(max_length=10, choices=IMAGE_STATUS_CHOICES, default=IMAGE_READY)
+    # Title (A) + body (B) tsvector, rewritten on save by discussion.search.
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes  = [
+            # Keyset pagination in ThreadListView: one index per sort order.
+            models.Index(fields=["-created_at"], name="thread_recent_idx"),
+            models.Index(fields=["category", "-created_at"], name="thread_cat_recent_idx"),
+            models.Index(fields=["-likes", "-created_at"], name="thread_popular_idx"),
+            models.Index(fields=["-hot_score", "-created_at"], name="thread_hot_idx"),
+            GinIndex(fields=["search_vector"], name="thread_search_idx"),
+            # compress_pending_images: only the handful of rows still waiting.
+            models.Index(fields=["created_at"], condition=models.Q(image_status=IMAGE_PROCESSING),
+                         name="thread_image_pending_idx"),
+        ]
 
     def __str__(self):
         return self.title
@@ -51,10 +88,20 @@ class Reply(models.Model):
     author     = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="replies")
     likes      = models.PositiveIntegerField(default=0)
     image      = models.ImageField(upload_to=reply_image_path, null=True, blank=True)
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_status = models.CharField(max_length=10, choices=IMAGE_STATUS_CHOICES, default=IMAGE_READY)
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ["created_at"]
+        indexes  = [
+            # A thread's replies page by page, oldest first.
+            models.Index(fields=["thread", "created_at"], name="reply_thread_created_idx"),
+            GinIndex(fields=["search_vector"], name="reply_search_idx"),
+            models.Index(fields=["created_at"], condition=models.Q(image_status=IMAGE_PROCESSING),
+                         name="reply_image_pending_idx"),
+        ]
 
     def __str__(self):
         return f"Reply by {self.author} on '{self.thread}'"
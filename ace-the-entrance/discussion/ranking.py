@@ -0,0 +1,74 @@
+# forum/ranking.py
+"""
+Stored "hot" score for the forum's Hot sort.
+
+    hot = (likes + REPLY_WEIGHT · replies + 1) / (age_hours + AGE_OFFSET_HOURS) ** GRAVITY
+
+Hacker-News-style gravity: engagement lifts a thread, age pulls it down,
+so a busy new thread outranks a famous old one.  The score is a column
+with an index on (-hot_score, -created_at), so a Hot page is an index
+scan instead of a sort over every thread.
+
+Two writers keep it current:
+    refresh_thread(pk)   after a like or a reply — that thread only
+    refresh_scores()     refresh_hot_scores cron job — decay for every
+                         thread younger than HOT_WINDOW_DAYS; older ones
+                         drop to 0 and fall back to newest-first order
+"""
+import datetime
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Thread
+
+# ── Constants ──────────────────────────────────────────────────────────────────
+
+GRAVITY          = 1.8
+REPLY_WEIGHT     = 2      # a reply is worth two likes
+AGE_OFFSET_HOURS = 2
+HOT_WINDOW_DAYS  = 14     # beyond this a thread is no longer "hot" at all
+REFRESH_BATCH    = 1000
+
+
+def hot_score(likes, reply_count, created_at, now=None):
+    now = now or timezone.now()
+    if now - created_at > datetime.timedelta(days=HOT_WINDOW_DAYS):
+        return 0.0
+    age_hours = max((now - created_at).total_seconds() / 3600, 0)
+    return (likes + REPLY_WEIGHT * reply_count + 1) / (age_hours + AGE_OFFSET_HOURS) ** GRAVITY
+
+
+def refresh_thread(pk):
+    """Recompute one thread's score from its current likes and replies."""
+    row = Thread.objects.filter(pk=pk).values_list("likes", "reply_count", "created_at").first()
+    if row:
+        Thread.objects.filter(pk=pk).update(hot_score=hot_score(*row))
+
+
+def refresh_scores(batch_size=REFRESH_BATCH):
+    """
+    Re-decay every thread inside the hot window, one primary-key batch per
+    short transaction, and zero the ones that have left it.  Returns the
+    number of threads rescored.
+    """
+    now = timezone.now()
+    window_start = now - datetime.timedelta(days=HOT_WINDOW_DAYS)
+
+    Thread.objects.filter(created_at__lt=window_start, hot_score__gt=0).update(hot_score=0)
+
+    recent = Thread.objects.filter(created_at__gte=window_start).order_by("pk")
+    rescored = 0
+    last_id = 0
+    while True:
+        rows = list(
+            recent.filter(pk__gt=last_id).only("id", "likes", "reply_count", "created_at")[:batch_size]
+        )
+        if not rows:
+            return rescored
+        for thread in rows:
+            thread.hot_score = hot_score(thread.likes, thread.reply_count, thread.created_at, now)
+        with transaction.atomic():
+            Thread.objects.bulk_update(rows, ["hot_score"])
+        rescored += len(rows)
+        last_id = rows[-1].pk
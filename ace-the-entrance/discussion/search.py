@@ -0,0 +1,199 @@
+# forum/search.py
+"""
+Full-text search over thread titles/bodies and reply bodies.
+
+Postgres (production): each Thread and Reply stores its own tsvector in
+`search_vector` (title weighted A, body B), GIN-indexed and rewritten by
+discussion.signals whenever the row is saved.  A search is a
+websearch_to_tsquery match on the index, ranked with ts_rank and
+highlighted with ts_headline.
+
+SQLite (local dev, tests): the same rows are mirrored into an FTS5 table,
+FTS_TABLE, created by the migration; ranking is bm25, highlighting is
+FTS5's snippet().
+
+Both return hits ordered by (score desc, kind, id desc).  That tuple is
+also the keyset cursor, so every page is "the next `limit` matches after
+this one" rather than an OFFSET.
+"""
+import re
+
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Cast
+from django.utils.html import escape
+
+from .models import Reply, Thread
+
+# ── Constants ──────────────────────────────────────────────────────────────────
+
+SEARCH_CONFIG = "english"
+FTS_TABLE     = "discussion_search_fts"
+MARK_START    = "\x02"          # sentinels, swapped for <mark> after HTML-escaping
+MARK_STOP     = "\x03"
+SNIPPET_WORDS = 24
+
+KINDS = {"reply": Reply, "thread": Thread}
+
+
+def _postgres():
+    return connection.vendor == "postgresql"
+
+
+# ── Keeping the index current (called from discussion.signals) ────────────────
+
+def thread_vector():
+    return (SearchVector("title", weight="A", config=SEARCH_CONFIG)
+            + SearchVector("body", weight="B", config=SEARCH_CONFIG))
+
+
+def reply_vector():
+    return SearchVector("body", weight="B", config=SEARCH_CONFIG)
+
+
+def index_thread(thread):
+    if _postgres():
+        Thread.objects.filter(pk=thread.pk).update(search_vector=thread_vector())
+    else:
+        _fts_replace("thread", thread.pk, thread.pk, thread.title, thread.body)
+
+
+def index_reply(reply):
+    if _postgres():
+        Reply.objects.filter(pk=reply.pk).update(search_vector=reply_vector())
+    else:
+        _fts_replace("reply", reply.pk, reply.thread_id, "", reply.body)
+
+
+def unindex(kind, pk):
+    """Postgres drops the vector with the row; only the FTS5 mirror needs this."""
+    if not _postgres():
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE kind = %s AND obj_id = %s", [kind, pk])
+
+
+def unindex_thread(pk):
+    """A deleted thread and all of its replies, in one statement."""
+    if not _postgres():
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE thread_id = %s", [pk])
+
+
+def _fts_replace(kind, pk, thread_id, title, body):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE kind = %s AND obj_id = %s", [kind, pk])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (kind, obj_id, thread_id, title, body) VALUES (%s, %s, %s, %s, %s)",
+            [kind, pk, thread_id, title, body],
+        )
+
+
+# ── Searching ──────────────────────────────────────────────────────────────────
+
+def search(terms, after=None, limit=20):
+    """
+    Up to `limit` hits for the user's query string `terms`, after the
+    cursor key `after` ([score, kind, id] of the last hit on the previous
+    page).  Returns (hits, next_key) where each hit is
+        {"kind", "id", "thread_id", "score", "snippet"}
+    and next_key is None on the last page.
+    """
+    rows = _search_postgres(terms, after, limit) if _postgres() else _search_sqlite(terms, after, limit)
+    rows.sort(key=lambda hit: (-hit["score"], hit["kind"], -hit["id"]))
+
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+    next_key = [rows[-1]["score"], rows[-1]["kind"], rows[-1]["id"]] if has_next else None
+    return rows, next_key
+
+
+def _after(kind, after):
+    """
+    Rows of `kind` past the cursor in (score desc, kind asc, id desc) order.
+    The kind is fixed per query, so the tuple comparison collapses to one of
+    three shapes.
+    """
+    score, after_kind, after_id = after
+    if kind > after_kind:
+        return Q(score__lte=score)
+    if kind == after_kind:
+        return Q(score__lt=score) | Q(score=score, id__lt=after_id)
+    return Q(score__lt=score)
+
+
+def _search_postgres(terms, after, limit):
+    query = SearchQuery(terms, search_type="websearch", config=SEARCH_CONFIG)
+    rows = []
+    # Each kind contributes its own best limit + 1 past the cursor; merged,
+    # the top `limit` are exactly the next page.
+    for kind, model in KINDS.items():
+        # ts_rank is float4.  Its value round-trips through the cursor as a
+        # float8, and real = double compares unequal at the boundary row, so
+        # rank in float8 throughout.
+        qs = (
+            model.objects.filter(search_vector=query)
+            .annotate(score=Cast(SearchRank(F("search_vector"), query), FloatField()))
+        )
+        if after:
+            qs = qs.filter(_after(kind, after))
+        qs = qs.annotate(snippet=SearchHeadline(
+            "body", query, config=SEARCH_CONFIG,
+            start_sel=MARK_START, stop_sel=MARK_STOP,
+            max_words=SNIPPET_WORDS, min_words=SNIPPET_WORDS // 2,
+        ))
+        thread_field = "id" if kind == "thread" else "thread_id"
+        for pk, thread_id, score, snippet in (
+            qs.order_by("-score", "-id").values_list("id", thread_field, "score", "snippet")[:limit + 1]
+        ):
+            rows.append({"kind": kind, "id": pk, "thread_id": thread_id, "score": score, "snippet": snippet})
+    return rows
+
+
+def _fts_match(terms):
+    """
+    The user's words as an FTS5 query: each quoted (so operators and
+    punctuation can't break the syntax), all required, last one as a prefix.
+    """
+    words = re.findall(r"\w+", terms)
+    if not words:
+        return None
+    quoted = [f'"{word}"' for word in words]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _search_sqlite(terms, after, limit):
+    match = _fts_match(terms)
+    if match is None:
+        return []
+
+    # bm25 is "lower is better"; negate it so both backends sort score desc.
+    # Column weights: kind, obj_id, thread_id (unindexed), title ×10, body ×1.
+    sql = f"""
+        SELECT kind, obj_id, thread_id, score, snippet FROM (
+            SELECT kind, obj_id, thread_id,
+                   -bm25({FTS_TABLE}, 0, 0, 0, 10.0, 1.0) AS score,
+                   snippet({FTS_TABLE}, 4, %s, %s, '…', {SNIPPET_WORDS}) AS snippet
+            FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s
+        )
+    """
+    params = [MARK_START, MARK_STOP, match]
+    if after:
+        score, after_kind, after_id = after
+        sql += "WHERE score < %s OR (score = %s AND (kind > %s OR (kind = %s AND obj_id < %s)))"
+        params += [score, score, after_kind, after_kind, after_id]
+    sql += " ORDER BY score DESC, kind ASC, obj_id DESC LIMIT %s"
+    params.append(limit + 1)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [
+            {"kind": kind, "id": int(pk), "thread_id": int(thread_id), "score": score, "snippet": snippet}
+            for kind, pk, thread_id, score, snippet in cursor.fetchall()
+        ]
+
+
+def highlight(snippet):
+    """HTML-escape a snippet, then turn the match sentinels into <mark> tags."""
+    return escape(snippet or "").replace(MARK_START, "<mark>").replace(MARK_STOP, "</mark>")
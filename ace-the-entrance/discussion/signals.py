@@ -0,0 +1,53 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from config.images import delete_image
+
+from . import search
+from .models import Reply, Thread
+from .ranking import refresh_thread
+
+
+@receiver(post_save, sender=Thread)
+def thread_saved(sender, instance, **kwargs):
+    search.index_thread(instance)
+
+
+@receiver(post_delete, sender=Thread)
+def thread_deleted(sender, instance, **kwargs):
+    search.unindex_thread(instance.pk)
+
+
+@receiver(post_save, sender=Reply)
+def reply_created(sender, instance, created, **kwargs):
+    search.index_reply(instance)
+    if created:
+        Thread.objects.filter(pk=instance.thread_id).update(reply_count=F("reply_count") + 1)
+        refresh_thread(instance.thread_id)
+
+
+@receiver(post_delete, sender=Reply)
+def reply_deleted(sender, instance, origin=None, **kwargs):
+    # Deleting a thread cascades here once per reply, before the thread row
+    # itself goes.  Its count and rank are about to vanish and
+    # thread_deleted drops the whole thread from the index, so skip it all.
+    if isinstance(origin, Thread):
+        return
+    search.unindex("reply", instance.pk)
+    # Never drops below zero if the count had drifted.
+    if Thread.objects.filter(pk=instance.thread_id, reply_count__gt=0).update(
+        reply_count=F("reply_count") - 1
+    ):
+        refresh_thread(instance.thread_id)
+
+
+@receiver(post_delete, sender=Thread)
+@receiver(post_delete, sender=Reply)
+def image_deleted(sender, instance, **kwargs):
+    # Runs for cascaded replies too.  Files go only once the delete has
+    # committed, so a rolled-back delete never loses its images.
+    if instance.image:
+        storage, name = instance.image.storage, instance.image.name
+        transaction.on_commit(lambda: delete_image(storage, name))
@@ -3,12 +3,21 @@ let state = {
   threads:       [],
   activeThread:  null,
   activeReplies: [],
+  repliesNext:   null,    // cursor for the next page of the open thread's replies
   category:      "All",
   sort:          "recent",
-  likedThreads:  new Set(JSON.parse(localStorage.getItem("likedThreads") || "[]")),
-  likedReplies:  new Set(JSON.parse(localStorage.getItem("likedReplies") || "[]")),
+  nextCursor:    null,    // cursor for the next page of threads, null when done
+  loadingMore:   false,
+  search:        "",      // active search query; the list shows matches instead of threads
 };
 
+const SEARCH_MIN_LENGTH = 2;
+const SEARCH_DEBOUNCE_MS = 300;
+
+// Uploads are compressed server-side after posting; poll until the WebP is in.
+const IMAGE_POLL_MS    = 2000;
+const IMAGE_POLL_TRIES = 15;
+
 /* ─────────────────────────────────────────
    Image validation config  (single source of truth)
 ───────────────────────────────────────── */
@@ -124,13 +133,6 @@ function showToast(message, type = "success") {
   });
 }
 
-function saveLikedThreads() {
-  localStorage.setItem("likedThreads", JSON.stringify([...state.likedThreads]));
-}
-function saveLikedReplies() {
-  localStorage.setItem("likedReplies", JSON.stringify([...state.likedReplies]));
-}
-
 function esc(str) {
   const d = document.createElement("div");
   d.textContent = str;
@@ -239,27 +241,44 @@ async function throwApiError(res, fallback) {
   throw new Error(message);
 }
 
-async function fetchThreads() {
+async function fetchThreads(cursor = null) {
   const params = new URLSearchParams();
   if (state.category !== "All") params.set("category", state.category);
   params.set("sort", state.sort);
+  if (cursor) params.set("cursor", cursor);
   const res = await fetch(`${FORUM_CONFIG.apiBase}?${params}`);
   if (!res.ok) await throwApiError(res, "Failed to load threads");
   return res.json();
 }
 
+async function fetchSearch(query, cursor = null) {
+  const params = new URLSearchParams({ q: query });
+  if (cursor) params.set("cursor", cursor);
+  const res = await fetch(`${FORUM_CONFIG.searchUrl}?${params}`);
+  if (!res.ok) await throwApiError(res, "Search failed");
+  return res.json();
+}
+
 async function fetchThread(id) {
   const res = await fetch(`${FORUM_CONFIG.apiBase}${id}/`);
   if (!res.ok) await throwApiError(res, "Thread not found");
   return res.json();
 }
 
-async function fetchReplies(threadId) {
-  const res = await fetch(`${FORUM_CONFIG.apiBase}${threadId}/replies/`);
+async function fetchReplies(threadId, cursor) {
+  const params = new URLSearchParams({ cursor });
+  const res = await fetch(`${FORUM_CONFIG.apiBase}${threadId}/replies/?${params}`);
   if (!res.ok) await throwApiError(res, "Failed to load replies");
   return res.json();
 }
 
+async function fetchReply(id) {
+  const base = FORUM_CONFIG.apiBase.replace(/\/threads\/$/, "/replies/");
+  const res  = await fetch(`${base}${id}/`);
+  if (!res.ok) await throwApiError(res, "Reply not found");
+  return res.json();
+}
+
 async function postThread(data, imageFile) {
   const fd = new FormData();
   fd.append("title",    data.title);
@@ -284,18 +303,19 @@ async function postReply(threadId, body, imageFile) {
   return res.json();
 }
 
-async function likeThread(id) {
+/* like = true → POST (like), false → DELETE (unlike). Returns { likes, liked }. */
+async function likeThread(id, like = true) {
   const res = await fetch(`${FORUM_CONFIG.apiBase}${id}/like/`, {
-    method: "POST", headers: { ...csrfHeader(), "Content-Type": "application/json" },
+    method: like ? "POST" : "DELETE", headers: { ...csrfHeader(), "Content-Type": "application/json" },
   });
   if (!res.ok) await throwApiError(res, "Like failed");
   return res.json();
 }
 
-async function likeReply(id) {
+async function likeReply(id, like = true) {
   const base = FORUM_CONFIG.apiBase.replace(/\/threads\/$/, "/replies/");
   const res  = await fetch(`${base}${id}/like/`, {
-    method: "POST", headers: { ...csrfHeader(), "Content-Type": "application/json" },
+    method: like ? "POST" : "DELETE", headers: { ...csrfHeader(), "Content-Type": "application/json" },
   });
   if (!res.ok) await throwApiError(res, "Like failed");
   return res.json();
@@ -446,7 +466,7 @@ function showConfirmDeleteBar(container, onConfirm) {
    Render helpers
 ───────────────────────────────────────── */
 function renderThreadCard_NEW(thread) {
-  const liked   = state.likedThreads.has(thread.id);
+  const liked   = !!thread.liked_by_me;
   const replies = thread.reply_count ?? 0;
   const hasImg  = !!thread.image_url;
 
@@ -458,7 +478,7 @@ function renderThreadCard_NEW(thread) {
   card.dataset.id = thread.id;
   card.innerHTML  = `
     <div class="thread-card-inner">
-      ${hasImg ? `<img class="thread-thumb" src="${esc(thread.image_url)}" alt="Thread image">` : ""}
+      ${hasImg ? imgTag(thread, "Thread image", IMAGE_SIZES.thumb, "thread-thumb") : ""}
       <div class="thread-card-content">
         <div class="thread-cat">${esc(thread.category)}</div>
         <div class="thread-title">${esc(thread.title)}</div>
@@ -468,6 +488,7 @@ function renderThreadCard_NEW(thread) {
           <span>${timeAgo(thread.created_at)}</span>
           <span>&#x1F4AC; ${replies}</span>
           ${hasImg ? `<span>&#x1F5BC; image</span>` : ""}
+          ${thread.image_processing ? `<span>&#x1F5BC; processing&#x2026;</span>` : ""}
           <button class="like-btn${liked ? " liked" : ""}" data-thread-id="${thread.id}">
             &#x2665; <span class="like-count">${thread.likes}</span>
           </button>
@@ -512,8 +533,66 @@ function renderThreadCard_NEW(thread) {
   return card;
 }
 
+/* Rendered width of each image slot, so the browser picks the smallest
+   srcset candidate that is still sharp (thumb in lists, medium on phones). */
+const IMAGE_SIZES = {
+  thumb:  "58px",
+  thread: "(max-width: 760px) 95vw, 720px",
+  reply:  "(max-width: 760px) 95vw, 480px",
+};
+
+function imgTag(item, alt, sizes, cls = "") {
+  const srcset = item.image_srcset ? ` srcset="${esc(item.image_srcset)}" sizes="${sizes}"` : "";
+  return `<img${cls ? ` class="${cls}"` : ""} src="${esc(item.image_url)}"${srcset} alt="${alt}" loading="lazy">`;
+}
+
+/* Placeholder shown while an attachment is being compressed. */
+function imageProcessingHtml(cls) {
+  return `<div class="${cls} image-processing">Processing image&#x2026;</div>`;
+}
+
+/* Re-fetch `load()` until its image_url appears, then swap the placeholder
+   inside `container` for the image and resolve with the fresh item.  Gives
+   up quietly: the image shows up on the next visit anyway. */
+async function watchImage(container, cls, alt, sizes, load) {
+  for (let i = 0; i < IMAGE_POLL_TRIES; i++) {
+    await new Promise(resolve => setTimeout(resolve, IMAGE_POLL_MS));
+    const placeholder = container.querySelector(`.${cls}.image-processing`);
+    if (!placeholder || !placeholder.isConnected) return;   // navigated away
+    let item;
+    try { item = await load(); } catch (_) { return; }
+    if (item.image_processing) continue;
+    if (!item.image_url) { placeholder.remove(); return; }
+    placeholder.classList.remove("image-processing");
+    placeholder.innerHTML = imgTag(item, alt, sizes);
+    placeholder.querySelector("img").addEventListener("click", () => openLightbox(item.image_url));
+    return item;
+  }
+}
+
+/* snippet_html is escaped by the server; only <mark> tags are markup. */
+function renderSearchResult(hit) {
+  const card = document.createElement("div");
+  card.className  = "thread-card search-result";
+  card.dataset.id = hit.thread_id;
+  card.innerHTML  = `
+    <div class="thread-card-inner">
+      <div class="thread-card-content">
+        <div class="thread-cat">${hit.type === "reply" ? "Reply" : "Question"}</div>
+        <div class="thread-title">${esc(hit.title)}</div>
+        <div class="thread-snippet">${hit.snippet_html}</div>
+        <div class="thread-meta">
+          <span>by <strong>${esc(hit.author_username)}</strong></span>
+          <span>${timeAgo(hit.created_at)}</span>
+        </div>
+      </div>
+    </div>`;
+  card.addEventListener("click", () => openThread(hit.thread_id));
+  return card;
+}
+
 function renderReplyCard(reply) {
-  const liked  = state.likedReplies.has(reply.id);
+  const liked  = !!reply.liked_by_me;
   const hasImg = !!reply.image_url;
 
   const isOwner = FORUM_CONFIG.isAuthenticated &&
@@ -525,7 +604,8 @@ function renderReplyCard(reply) {
   card.innerHTML  = `
     <div class="reply-author">${esc(reply.author_username)}</div>
     <div class="reply-body-text">${esc(reply.body)}</div>
-    ${hasImg ? `<div class="reply-image"><img src="${esc(reply.image_url)}" alt="Reply attachment"></div>` : ""}
+    ${hasImg ? `<div class="reply-image">${imgTag(reply, "Reply attachment", IMAGE_SIZES.reply)}</div>` : ""}
+    ${reply.image_processing ? imageProcessingHtml("reply-image") : ""}
     <div class="reply-meta">
       <span>${timeAgo(reply.created_at)}</span>
       <button class="like-btn${liked ? " liked" : ""}" data-reply-id="${reply.id}">
@@ -544,6 +624,11 @@ function renderReplyCard(reply) {
 
   if (hasImg) {
     card.querySelector(".reply-image img").addEventListener("click", () => openLightbox(reply.image_url));
+  } else if (reply.image_processing) {
+    watchImage(card, "reply-image", "Reply attachment", IMAGE_SIZES.reply, () => fetchReply(reply.id))
+      .then(item => {
+        if (item) Object.assign(reply, { image_url: item.image_url, image_srcset: item.image_srcset, image_processing: false });
+      });
   }
 
   if (isOwner) {
@@ -566,11 +651,10 @@ function renderReplyCard(reply) {
         try {
           await deleteReply(reply.id);
           state.activeReplies = state.activeReplies.filter(r => r.id !== reply.id);
+          state.activeThread.reply_count -= 1;
           card.remove();
-          const count = state.activeReplies.length;
-          document.getElementById("reply-count-divider").textContent =
-            `${count} ${count === 1 ? "reply" : "replies"}`;
-          if (!count) {
+          updateReplyCount();
+          if (!state.activeThread.reply_count) {
             document.getElementById("reply-list").innerHTML =
               `<div class="empty-state" style="margin-bottom:1rem;">Be the first to reply.</div>`;
           }
@@ -612,26 +696,33 @@ function triggerThreadEdit() {
 /* ─────────────────────────────────────────
    Like handlers
 ───────────────────────────────────────── */
+/* A second click on a liked button unlikes; the server's count always wins. */
 async function handleThreadLike(threadId, btn) {
   if (!FORUM_CONFIG.isAuthenticated) { showToast("Please log in to like threads.", "warning"); return; }
-  if (state.likedThreads.has(threadId)) { showToast("You already liked this thread.", "warning"); return; }
+  if (btn.disabled) return;
+  btn.disabled = true;
   try {
-    const data = await likeThread(threadId);
-    state.likedThreads.add(threadId); saveLikedThreads();
-    btn.classList.add("liked");
+    const data = await likeThread(threadId, !btn.classList.contains("liked"));
+    const cached = state.threads.find(t => t.id === threadId);
+    if (cached) { cached.liked_by_me = data.liked; cached.likes = data.likes; }
+    btn.classList.toggle("liked", data.liked);
     btn.querySelector(".like-count").textContent = data.likes;
   } catch (err) { showToast(err.message || "Could not record your like.", "error"); }
+  finally { btn.disabled = false; }
 }
 
 async function handleReplyLike(replyId, btn) {
   if (!FORUM_CONFIG.isAuthenticated) { showToast("Please log in to like replies.", "warning"); return; }
-  if (state.likedReplies.has(replyId)) { showToast("You already liked this reply.", "warning"); return; }
+  if (btn.disabled) return;
+  btn.disabled = true;
   try {
-    const data = await likeReply(replyId);
-    state.likedReplies.add(replyId); saveLikedReplies();
-    btn.classList.add("liked");
+    const data = await likeReply(replyId, !btn.classList.contains("liked"));
+    const cached = state.activeReplies.find(r => r.id === replyId);
+    if (cached) { cached.liked_by_me = data.liked; cached.likes = data.likes; }
+    btn.classList.toggle("liked", data.liked);
     btn.querySelector(".like-count").textContent = data.likes;
   } catch (err) { showToast(err.message || "Could not record your like.", "error"); }
+  finally { btn.disabled = false; }
 }
 
 /* ─────────────────────────────────────────
@@ -644,20 +735,96 @@ async function showList() {
   document.getElementById("view-new").style.display    = "none";
   const list = document.getElementById("thread-list");
   list.innerHTML = `<div class="loading">Loading threads&#x2026;</div>`;
+  state.nextCursor = null;
+  if (state.search) return showSearchResults(list);
   try {
-    state.threads = await fetchThreads();
+    const page = await fetchThreads();
+    state.threads    = page.results;
+    state.nextCursor = page.next;
     list.innerHTML = "";
     if (!state.threads.length) {
       list.innerHTML = `<div class="empty-state">No threads yet in this category.</div>`;
       return;
     }
     state.threads.forEach(t => list.appendChild(renderThreadCard_NEW(t)));
+    rearmInfiniteScroll();
   } catch (err) {
     list.innerHTML = `<div class="empty-state">Could not load threads. Please try again.</div>`;
     console.error(err);
   }
 }
 
+async function showSearchResults(list) {
+  const query = state.search;
+  try {
+    const page = await fetchSearch(query);
+    if (query !== state.search) return;        // the query changed while this was in flight
+    state.nextCursor = page.next;
+    list.innerHTML = "";
+    if (!page.results.length) {
+      list.innerHTML = `<div class="empty-state">No matches for \u201c${esc(query)}\u201d.</div>`;
+      return;
+    }
+    page.results.forEach(hit => list.appendChild(renderSearchResult(hit)));
+    rearmInfiniteScroll();
+  } catch (err) {
+    if (query !== state.search) return;
+    list.innerHTML = `<div class="empty-state">${esc(err.message)}</div>`;
+  }
+}
+
+let searchTimer = null;
+
+function onSearchInput(e) {
+  clearTimeout(searchTimer);
+  searchTimer = setTimeout(() => {
+    const value = e.target.value.trim();
+    const query = value.length >= SEARCH_MIN_LENGTH ? value : "";
+    if (query === state.search) return;
+    state.search = query;
+    showList();
+  }, SEARCH_DEBOUNCE_MS);
+}
+
+/* Infinite scroll: fetch the next page when the sentinel below the list comes into view */
+let threadObserver = null;
+
+/* Re-observing makes the observer report the sentinel again, so a page too
+   short to fill the screen still pulls in the next one. */
+function rearmInfiniteScroll() {
+  const sentinel = document.getElementById("thread-list-sentinel");
+  if (!threadObserver || !sentinel) return;
+  threadObserver.unobserve(sentinel);
+  threadObserver.observe(sentinel);
+}
+
+async function loadMoreThreads() {
+  if (state.view !== "list" || !state.nextCursor || state.loadingMore) return;
+  state.loadingMore = true;
+  const cursor = state.nextCursor;
+  const list   = document.getElementById("thread-list");
+  try {
+    if (state.search) {
+      const page = await fetchSearch(state.search, cursor);
+      if (cursor !== state.nextCursor) return;   // query changed meanwhile
+      state.nextCursor = page.next;
+      page.results.forEach(hit => list.appendChild(renderSearchResult(hit)));
+    } else {
+      const page = await fetchThreads(cursor);
+      if (cursor !== state.nextCursor) return;   // category/sort changed meanwhile
+      state.threads.push(...page.results);
+      state.nextCursor = page.next;
+      page.results.forEach(t => list.appendChild(renderThreadCard_NEW(t)));
+    }
+  } catch (err) {
+    showToast(err.message, "error");
+    return;
+  } finally {
+    state.loadingMore = false;
+  }
+  rearmInfiniteScroll();
+}
+
 async function openThread(threadId) {
   state.view = "thread";
   document.getElementById("view-list").style.display   = "none";
@@ -669,10 +836,12 @@ async function openThread(threadId) {
   detailBox.innerHTML = `<div class="loading">Loading&#x2026;</div>`;
   replyList.innerHTML = "";
   try {
-    const [thread, replies] = await Promise.all([fetchThread(threadId), fetchReplies(threadId)]);
+    const thread = await fetchThread(threadId);   // includes the first page of replies
+    const replies = thread.replies.results;
     state.activeThread  = thread;
     state.activeReplies = replies;
-    const liked   = state.likedThreads.has(thread.id);
+    state.repliesNext   = thread.replies.next;
+    const liked   = !!thread.liked_by_me;
     const hasImg  = !!thread.image_url;
     const isOwner = FORUM_CONFIG.isAuthenticated &&
       (FORUM_CONFIG.currentUser === thread.author_username || FORUM_CONFIG.isSuperuser);
@@ -693,7 +862,8 @@ async function openThread(threadId) {
         </span>` : ""}
       </div>
       <div class="thread-body">${esc(thread.body)}</div>
-      ${hasImg ? `<div class="thread-image"><img src="${esc(thread.image_url)}" alt="Thread attachment"></div>` : ""}`;
+      ${hasImg ? `<div class="thread-image">${imgTag(thread, "Thread attachment", IMAGE_SIZES.thread)}</div>` : ""}
+      ${thread.image_processing ? imageProcessingHtml("thread-image") : ""}`;
 
     detailBox.querySelector("#detail-like-btn").addEventListener("click", async (e) => {
       await handleThreadLike(thread.id, e.currentTarget);
@@ -701,6 +871,11 @@ async function openThread(threadId) {
 
     if (hasImg) {
       detailBox.querySelector(".thread-image img").addEventListener("click", () => openLightbox(thread.image_url));
+    } else if (thread.image_processing) {
+      watchImage(detailBox, "thread-image", "Thread attachment", IMAGE_SIZES.thread, () => fetchThread(thread.id))
+        .then(item => {
+          if (item) Object.assign(thread, { image_url: item.image_url, image_srcset: item.image_srcset, image_processing: false });
+        });
     }
 
     if (isOwner) {
@@ -720,13 +895,13 @@ async function openThread(threadId) {
       });
     }
 
-    const count = replies.length;
-    divider.textContent = `${count} ${count === 1 ? "reply" : "replies"}`;
+    updateReplyCount();
     replyList.innerHTML = "";
-    if (!count) {
+    if (!replies.length) {
       replyList.innerHTML = `<div class="empty-state" style="margin-bottom:1rem;">Be the first to reply.</div>`;
     } else {
       replies.forEach(r => replyList.appendChild(renderReplyCard(r)));
+      renderLoadMoreReplies();
     }
     document.getElementById("view-thread").scrollIntoView({ behavior: "smooth" });
   } catch (err) {
@@ -735,6 +910,50 @@ async function openThread(threadId) {
   }
 }
 
+function updateReplyCount() {
+  const count = state.activeThread.reply_count;
+  document.getElementById("reply-count-divider").textContent =
+    `${count} ${count === 1 ? "reply" : "replies"}`;
+}
+
+/* "Load more" sits after the loaded pages; replies posted meanwhile go below it,
+   so older pages slot in above them and the list stays in order. */
+function renderLoadMoreReplies() {
+  const replyList = document.getElementById("reply-list");
+  let btn = document.getElementById("btn-more-replies");
+  if (!state.repliesNext) { btn?.remove(); return; }
+  if (btn) return;
+
+  btn = document.createElement("button");
+  btn.id        = "btn-more-replies";
+  btn.className = "btn-more-replies";
+  btn.textContent = "Load more replies";
+  btn.addEventListener("click", loadMoreReplies);
+  replyList.appendChild(btn);
+}
+
+async function loadMoreReplies() {
+  const btn    = document.getElementById("btn-more-replies");
+  const thread = state.activeThread;
+  if (!btn || !thread || !state.repliesNext) return;
+  btn.disabled = true; btn.textContent = "Loading\u2026";
+  try {
+    const page = await fetchReplies(thread.id, state.repliesNext);
+    if (state.activeThread?.id !== thread.id) return;   // another thread was opened meanwhile
+    const shown = new Set(state.activeReplies.map(r => r.id));
+    page.results.filter(r => !shown.has(r.id)).forEach(r => {
+      state.activeReplies.push(r);
+      btn.before(renderReplyCard(r));
+    });
+    state.repliesNext = page.next;
+  } catch (err) {
+    showToast(err.message, "error");
+  } finally {
+    btn.disabled = false; btn.textContent = "Load more replies";
+    renderLoadMoreReplies();
+  }
+}
+
 function showNew() {
   state.view = "new";
   document.getElementById("view-list").style.display   = "none";
@@ -793,13 +1012,12 @@ async function submitReply() {
     document.getElementById("reply-body").value = "";
     document.getElementById("btn-remove-reply-image")?.click();
     state.activeReplies.push(reply);
+    state.activeThread.reply_count += 1;
     const replyList   = document.getElementById("reply-list");
     const placeholder = replyList.querySelector(".empty-state");
     if (placeholder) placeholder.remove();
     replyList.appendChild(renderReplyCard(reply));
-    const count = state.activeReplies.length;
-    document.getElementById("reply-count-divider").textContent =
-      `${count} ${count === 1 ? "reply" : "replies"}`;
+    updateReplyCount();
     showToast("Reply posted!");
   } catch (err) {
     showToast(err.message, "error");
@@ -817,6 +1035,7 @@ document.addEventListener("DOMContentLoaded", () => {
   document.getElementById("btn-back-new")  ?.addEventListener("click", () => showList());
   document.getElementById("btn-publish")   ?.addEventListener("click", submitThread);
   document.getElementById("btn-post-reply")?.addEventListener("click", submitReply);
+  document.getElementById("forum-search")  ?.addEventListener("input", onSearchInput);
 
   document.getElementById("category-controls").addEventListener("click", (e) => {
     const btn = e.target.closest(".cat-btn");
@@ -850,6 +1069,18 @@ document.addEventListener("DOMContentLoaded", () => {
     removeBtnId: "btn-remove-reply-image",
   });
 
+  const sentinel = document.getElementById("thread-list-sentinel");
+  if (sentinel && "IntersectionObserver" in window) {
+    threadObserver = new IntersectionObserver((entries) => {
+      if (entries.some(e => e.isIntersecting)) loadMoreThreads();
+    }, { rootMargin: "400px 0px" });
+    threadObserver.observe(sentinel);
+  }
+
+  // Like state now comes from the server; drop what older versions stored.
+  localStorage.removeItem("likedThreads");
+  localStorage.removeItem("likedReplies");
+
   editModal.init();
   showList();
 });
\ No newline at end of file
@@ -1,3 +1,457 @@
-from django.test import TestCase
+import datetime
+import io
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from config import images
+from config.images import IMAGE_VARIANT_WIDTHS, image_srcset, save_variants, variant_name
+from discussion import ranking
+from discussion.models import IMAGE_FAILED, IMAGE_PROCESSING, IMAGE_READY, Reply, ReplyLike, Thread, ThreadLike
+
+
+def make_user(username="student"):
+    return get_user_model().objects.create_user(
+        username=username, email=f"{username}@example.com", password="pass", is_active=True,
+    )
+
+
+def page_through(client, url, params, key):
+    """Follow the `next` cursor to the end; returns every row's `key`, in order."""
+    seen, cursor = [], None
+    while True:
+        response = client.get(url, {**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200, response.content
+        data = response.json()
+        seen += [key(row) for row in data["results"]]
+        cursor = data["next"]
+        if not cursor:
+            return seen
+
+
+# ── Keyset pagination ──────────────────────────────────────────────────────────
+
+class ThreadPaginationTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        for i in range(11):
+            Thread.objects.create(title=f"Thread {i}", body="body", author=self.user)
+        # Every sort key tied, so only the id tiebreak separates the rows.
+        Thread.objects.update(created_at=timezone.now(), likes=4)
+        self.ids = sorted(Thread.objects.values_list("id", flat=True), reverse=True)
+
+    def test_every_sort_pages_through_ties_in_id_order(self):
+        for sort in ("recent", "popular"):
+            seen = page_through(
+                self.client, reverse("forum:api-threads"), {"sort": sort, "limit": 4},
+                key=lambda row: row["id"],
+            )
+            self.assertEqual(seen, self.ids, sort)
+
+    def test_partial_ties(self):
+        # Two likes groups; inside each, created_at ties and id decides.
+        Thread.objects.filter(id__in=self.ids[::2]).update(likes=9)
+        expected = self.ids[::2] + self.ids[1::2]
+        seen = page_through(
+            self.client, reverse("forum:api-threads"), {"sort": "popular", "limit": 3},
+            key=lambda row: row["id"],
+        )
+        self.assertEqual(seen, expected)
+
+    def test_rejects_a_cursor_from_another_sort(self):
+        first = self.client.get(reverse("forum:api-threads"), {"sort": "recent", "limit": 2}).json()
+        response = self.client.get(reverse("forum:api-threads"), {"sort": "popular", "cursor": first["next"]})
+        self.assertEqual(response.status_code, 400)
+
+
+class ReplyPaginationTests(TestCase):
+    def setUp(self):
+        user = make_user()
+        self.thread = Thread.objects.create(title="Busy", body="body", author=user)
+        for _ in range(9):
+            Reply.objects.create(thread=self.thread, body="same second", author=user)
+        Reply.objects.update(created_at=timezone.now())
+        self.ids = sorted(self.thread.replies.values_list("id", flat=True))
+
+    def test_pages_through_tied_timestamps_oldest_first(self):
+        seen = page_through(
+            self.client, reverse("forum:api-replies", args=[self.thread.pk]), {"limit": 4},
+            key=lambda row: row["id"],
+        )
+        self.assertEqual(seen, self.ids)
+
+    def test_thread_detail_carries_the_first_page(self):
+        data = self.client.get(reverse("forum:api-thread-edit", args=[self.thread.pk]), {"limit": 4}).json()
+        self.assertEqual((data["id"], data["title"], data["liked_by_me"]), (self.thread.pk, "Busy", False))
+        first = [row["id"] for row in data["replies"]["results"]]
+        self.assertEqual(first, self.ids[:4])
+
+        rest = page_through(
+            self.client, reverse("forum:api-replies", args=[self.thread.pk]),
+            {"limit": 4, "cursor": data["replies"]["next"]}, key=lambda row: row["id"],
+        )
+        self.assertEqual(first + rest, self.ids)
+
+
+# ── Hot ranking ────────────────────────────────────────────────────────────────
+
+class HotRankingTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.now = timezone.now()
+
+    def thread(self, title, hours_old, likes=0):
+        thread = Thread.objects.create(title=title, body="body", author=self.user)
+        Thread.objects.filter(pk=thread.pk).update(
+            created_at=self.now - datetime.timedelta(hours=hours_old), likes=likes,
+        )
+        return thread
+
+    def test_score_decays_with_age(self):
+        scores = [ranking.hot_score(10, 0, self.now - datetime.timedelta(hours=h), self.now) for h in (0, 5, 50)]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertGreater(scores[-1], 0)
+
+        created = self.now - datetime.timedelta(hours=3)
+        self.assertEqual(ranking.hot_score(2, 0, created, self.now), ranking.hot_score(0, 1, created, self.now))
+
+        past_window = self.now - datetime.timedelta(days=ranking.HOT_WINDOW_DAYS, hours=1)
+        self.assertEqual(ranking.hot_score(1000, 50, past_window, self.now), 0.0)
+
+    def test_refresh_orders_the_hot_sort(self):
+        fresh = self.thread("Fresh", hours_old=1, likes=3)
+        famous = self.thread("Famous", hours_old=24 * 5, likes=60)
+        quiet = self.thread("Quiet", hours_old=30, likes=0)
+        ancient = self.thread("Ancient", hours_old=24 * 30, likes=500)
+        Thread.objects.update(hot_score=0.5)        # stale scores from before the decay
+
+        self.assertEqual(ranking.refresh_scores(batch_size=2), 3)
+        ancient.refresh_from_db()
+        self.assertEqual(ancient.hot_score, 0)
+
+        seen = page_through(
+            self.client, reverse("forum:api-threads"), {"sort": "hot", "limit": 2},
+            key=lambda row: row["title"],
+        )
+        self.assertEqual(seen, [fresh.title, famous.title, quiet.title, ancient.title])
+
+    def test_like_rescores_the_thread(self):
+        thread = self.thread("Liked", hours_old=2)
+        ranking.refresh_thread(thread.pk)
+        thread.refresh_from_db()
+        before = thread.hot_score
+
+        self.client.force_login(make_user("fan"))
+        self.client.post(reverse("forum:api-thread-like", args=[thread.pk]))
+        thread.refresh_from_db()
+        self.assertGreater(thread.hot_score, before)
+
+    def test_pages_through_tied_scores_in_id_order(self):
+        for i in range(11):
+            Thread.objects.create(title=f"Thread {i}", body="body", author=self.user)
+        Thread.objects.update(created_at=self.now, hot_score=1.5)
+        seen = page_through(
+            self.client, reverse("forum:api-threads"), {"sort": "hot", "limit": 4},
+            key=lambda row: row["id"],
+        )
+        self.assertEqual(seen, sorted(Thread.objects.values_list("id", flat=True), reverse=True))
+
+
+# ── Likes ──────────────────────────────────────────────────────────────────────
+
+class LikeTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.thread = Thread.objects.create(title="Likeable", body="body", author=self.user)
+        self.reply = Reply.objects.create(thread=self.thread, body="reply", author=self.user)
+        self.client.force_login(self.user)
+
+    def test_like_and_unlike_are_idempotent(self):
+        for url, obj in [
+            (reverse("forum:api-thread-like", args=[self.thread.pk]), self.thread),
+            (reverse("forum:api-reply-like", args=[self.reply.pk]), self.reply),
+        ]:
+            for _ in range(2):
+                self.assertEqual(self.client.post(url).json(), {"likes": 1, "liked": True})
+            obj.refresh_from_db()
+            self.assertEqual(obj.likes, 1)
+
+            for _ in range(2):
+                self.assertEqual(self.client.delete(url).json(), {"likes": 0, "liked": False})
+            obj.refresh_from_db()
+            self.assertEqual(obj.likes, 0)
+
+    def test_likes_from_different_users_add_up(self):
+        url = reverse("forum:api-thread-like", args=[self.thread.pk])
+        self.client.post(url)
+        self.client.force_login(make_user("other"))
+        self.assertEqual(self.client.post(url).json()["likes"], 2)
+        self.assertEqual(self.client.delete(url).json()["likes"], 1)
+
+    def test_anonymous_cannot_like(self):
+        self.client.logout()
+        response = self.client.post(reverse("forum:api-thread-like", args=[self.thread.pk]))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.thread.thread_likes.count(), 0)
+
+
+class LikedByMeTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.threads = [Thread.objects.create(title=f"T{i}", body="body", author=self.user) for i in range(4)]
+        self.replies = [Reply.objects.create(thread=self.threads[0], body="r", author=self.user) for _ in range(3)]
+        for thread in self.threads[::2]:
+            ThreadLike.objects.create(user=self.user, thread=thread)
+        ReplyLike.objects.create(user=self.user, reply=self.replies[1])
+
+    def flags(self, url, table):
+        """{id: liked_by_me} for one page, and how many queries read `table`."""
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get(url).json()
+        rows = data["results"] if "results" in data else data["replies"]["results"]
+        lookups = sum(table in q["sql"] for q in ctx.captured_queries)
+        return {row["id"]: row["liked_by_me"] for row in rows}, lookups
+
+    def test_thread_list(self):
+        self.client.force_login(self.user)
+        flags, lookups = self.flags(reverse("forum:api-threads"), ThreadLike._meta.db_table)
+        self.assertEqual(flags, {t.id: i % 2 == 0 for i, t in enumerate(self.threads)})
+        self.assertEqual(lookups, 1)
+
+        self.client.force_login(make_user("other"))
+        flags, _ = self.flags(reverse("forum:api-threads"), ThreadLike._meta.db_table)
+        self.assertFalse(any(flags.values()))
+
+    def test_reply_list_and_thread_detail(self):
+        self.client.force_login(self.user)
+        expected = {r.id: i == 1 for i, r in enumerate(self.replies)}
+        for url in [
+            reverse("forum:api-replies", args=[self.threads[0].pk]),
+            reverse("forum:api-thread-edit", args=[self.threads[0].pk]),
+        ]:
+            flags, lookups = self.flags(url, ReplyLike._meta.db_table)
+            self.assertEqual(flags, expected, url)
+            self.assertEqual(lookups, 1, url)
+
+        detail = self.client.get(reverse("forum:api-thread-edit", args=[self.threads[0].pk])).json()
+        self.assertTrue(detail["liked_by_me"])
+
+    def test_guests_get_no_flags_and_no_lookup(self):
+        flags, lookups = self.flags(reverse("forum:api-threads"), ThreadLike._meta.db_table)
+        self.assertEqual(set(flags.values()), {False})
+        self.assertEqual(lookups, 0)
+
+
+# ── Reply counters ─────────────────────────────────────────────────────────────
+
+class ReplyCountSignalTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.thread = Thread.objects.create(title="Optics", body="lenses", author=self.user)
+
+    def reply_count(self):
+        self.thread.refresh_from_db()
+        return self.thread.reply_count
+
+    def test_counts_follow_creates_and_deletes(self):
+        replies = [Reply.objects.create(thread=self.thread, body="answer", author=self.user) for _ in range(3)]
+        self.assertEqual(self.reply_count(), 3)
+
+        replies[0].body = "edited"
+        replies[0].save()
+        self.assertEqual(self.reply_count(), 3)
+
+        replies[1].delete()
+        self.assertEqual(self.reply_count(), 2)
+
+    def test_never_drops_below_zero(self):
+        reply = Reply.objects.create(thread=self.thread, body="answer", author=self.user)
+        Thread.objects.filter(pk=self.thread.pk).update(reply_count=0)
+        reply.delete()
+        self.assertEqual(self.reply_count(), 0)
+
+    def test_thread_delete_skips_per_reply_work(self):
+        for _ in range(5):
+            Reply.objects.create(thread=self.thread, body="lenses answer", author=self.user)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.thread.delete()
+
+        updates = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(updates, [])
+        response = self.client.get(reverse("forum:api-search"), {"q": "lenses"})
+        self.assertEqual(response.json()["results"], [])
+
+
+# ── Images ─────────────────────────────────────────────────────────────────────
+
+class ImageVisibilityTests(TestCase):
+    def test_only_compressed_images_are_published(self):
+        user = make_user()
+        thread = Thread.objects.create(title="Diagram", body="see image", author=user)
+        for status, published in [(IMAGE_READY, True), (IMAGE_PROCESSING, False), (IMAGE_FAILED, False)]:
+            reply = Reply.objects.create(
+                thread=thread, body="photo", author=user,
+                image="discussion/replies/photo.jpg", image_status=status,
+            )
+            data = self.client.get(reverse("forum:api-reply-edit", args=[reply.pk])).json()
+            self.assertEqual(data["image_url"] is not None, published, status)
+            self.assertIsNone(data["image_srcset"])     # no variants recorded (image_width unset)
+
+
+class CompressionTests(TestCase):
+    def encode_calls(self, bytes_per_quality):
+        """Run _encode_to_target with WebP sizes of quality * bytes_per_quality."""
+        fake = mock.Mock(side_effect=lambda img, quality: b"x" * (quality * bytes_per_quality))
+        with mock.patch("config.images._encode_webp", fake):
+            data = images._encode_to_target(None)
+        return [c.args[1] for c in fake.call_args_list], len(data) // bytes_per_quality
+
+    def test_fits_at_top_quality_in_one_encode(self):
+        self.assertEqual(self.encode_calls(100), ([images.COMPRESS_WEBP_QUALITY], images.COMPRESS_WEBP_QUALITY))
+
+    def test_bisects_to_the_best_quality_that_fits(self):
+        # 3000 bytes per quality point: 34 is the highest that fits 100 KB.
+        calls, quality = self.encode_calls(3000)
+        self.assertEqual(calls, [65, 42, 30, 36])
+        self.assertEqual(quality, 30)
+        self.assertEqual(len(calls), 1 + images.COMPRESS_SEARCH_STEPS)
+
+    def test_falls_back_to_the_floor(self):
+        calls, quality = self.encode_calls(images.COMPRESS_TARGET_BYTES)
+        self.assertEqual(calls[-1], images.COMPRESS_MIN_QUALITY)
+        self.assertEqual(quality, images.COMPRESS_MIN_QUALITY)
+
+    def test_compress_image_keeps_alpha_and_caps_the_size(self):
+        buf = io.BytesIO()
+        Image.new("RGBA", (2048, 512), (255, 0, 0, 128)).save(buf, format="PNG")
+        out = images.compress_image(buf, "diagram.png")
+        self.assertEqual(out.name, "diagram.webp")
+        with Image.open(out) as img:
+            self.assertEqual((img.format, img.mode, img.size), ("WEBP", "RGBA", (1024, 256)))
+
+
+class MediaTestCase(TestCase):
+    """Uploads go to a throwaway MEDIA_ROOT."""
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=media)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.user = make_user()
+
+
+class VariantTests(MediaTestCase):
+    def store(self, width):
+        thread = Thread.objects.create(title="Diagram", body="see image", author=self.user)
+        img = Image.new("RGB", (width, width // 2), "teal")
+        buf = io.BytesIO()
+        img.save(buf, format="WEBP")
+        thread.image.save("photo.webp", ContentFile(buf.getvalue()))
+        return thread.image, img
+
+    def written(self, field_file):
+        """{variant: width} of the variants in storage next to `field_file`."""
+        found = {}
+        for variant in IMAGE_VARIANT_WIDTHS:
+            path = variant_name(field_file.name, variant)
+            if field_file.storage.exists(path):
+                with field_file.storage.open(path) as f, Image.open(f) as img:
+                    found[variant] = img.width
+        return found
+
+    def test_small_image_gets_no_variants(self):
+        field_file, img = self.store(300)
+        self.assertEqual(save_variants(field_file.storage, field_file.name, img), 300)
+        self.assertEqual(self.written(field_file), {})
+        self.assertEqual(image_srcset(field_file, 300), f"{field_file.url} 300w")
+
+    def test_large_image_gets_every_narrower_variant(self):
+        field_file, img = self.store(1024)
+        save_variants(field_file.storage, field_file.name, img)
+        save_variants(field_file.storage, field_file.name, img)     # rerun replaces, same names
+        self.assertEqual(self.written(field_file), {"thumb": 320, "medium": 640})
+
+        storage = field_file.storage
+        self.assertEqual(image_srcset(field_file, 1024), ", ".join([
+            f"{storage.url(variant_name(field_file.name, 'thumb'))} 320w",
+            f"{storage.url(variant_name(field_file.name, 'medium'))} 640w",
+            f"{field_file.url} 1024w",
+        ]))
+
+    def test_in_between_and_unknown_widths(self):
+        field_file, img = self.store(500)
+        save_variants(field_file.storage, field_file.name, img)
+        self.assertEqual(self.written(field_file), {"thumb": 320})
+        self.assertEqual(image_srcset(field_file, 500).count("w, "), 1)
+        self.assertIsNone(image_srcset(field_file, None))
+
+
+class ImageCleanupTests(MediaTestCase):
+
+    def attach(self, obj):
+        """Store a WebP with its srcset variants on `obj`; returns every stored name."""
+        img = Image.new("RGB", (800, 600), "teal")
+        buf = io.BytesIO()
+        img.save(buf, format="WEBP")
+        obj.image.save("photo.webp", ContentFile(buf.getvalue()))
+        save_variants(obj.image.storage, obj.image.name, img)
+        return [obj.image.name, *(variant_name(obj.image.name, v) for v in IMAGE_VARIANT_WIDTHS)]
+
+    def test_deleting_posts_deletes_their_images(self):
+        thread = Thread.objects.create(title="Diagram", body="see image", author=self.user)
+        reply = Reply.objects.create(thread=thread, body="another", author=self.user)
+        kept = Reply.objects.create(thread=thread, body="and one more", author=self.user)
+        reply_files, kept_files, thread_files = self.attach(reply), self.attach(kept), self.attach(thread)
+        storage = thread.image.storage
+        self.assertTrue(all(storage.exists(name) for name in reply_files + kept_files + thread_files))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reply.delete()
+        self.assertFalse(any(storage.exists(name) for name in reply_files))
+        self.assertTrue(all(storage.exists(name) for name in kept_files + thread_files))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            thread.delete()         # cascades to `kept`
+        self.assertFalse(any(storage.exists(name) for name in kept_files + thread_files))
+
+
+# ── Search ─────────────────────────────────────────────────────────────────────
+
+class SearchPaginationTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        # Identical text, so every thread ties with every other thread and
+        # every reply with every other reply; only (kind, id) orders them.
+        self.threads = [
+            Thread.objects.create(title="Projectile", body="projectile range", author=self.user)
+            for _ in range(7)
+        ]
+        self.replies = [
+            Reply.objects.create(thread=self.threads[0], body="projectile range", author=self.user)
+            for _ in range(8)
+        ]
+
+    def test_pages_through_tied_ranks_without_duplicates(self):
+        seen = page_through(
+            self.client, reverse("forum:api-search"), {"q": "projectile", "limit": 3},
+            key=lambda row: (row["type"], row["reply_id"] or row["thread_id"]),
+        )
+        expected = {("thread", t.id) for t in self.threads} | {("reply", r.id) for r in self.replies}
+        self.assertEqual(len(seen), len(expected))
+        self.assertEqual(set(seen), expected)
+
+    def test_rejects_malformed_cursor(self):
+        response = self.client.get(reverse("forum:api-search"), {"q": "projectile", "cursor": "zz"})
+        self.assertEqual(response.status_code, 400)
@@ -18,4 +18,5 @@ urlpatterns = [
          name="api-thread-edit"),
     path("api/replies/<int:pk>/", views.ReplyDetailEditView.as_view(),
          name="api-reply-edit"),
+    path("api/search/", views.SearchView.as_view(), name="api-search"),
 ]
@@ -1,7 +1,5 @@
 # forum/utils.py
-import io
 from PIL import Image
-from django.core.files.base import ContentFile
 from django.core.cache import cache
 from django.http import JsonResponse
 
@@ -12,11 +10,6 @@ MAX_IMAGE_SIZE_BYTES  = 3 * 1024 * 1024          # 3 MB  (upload limit)
 ALLOWED_CONTENT_TYPES = {"image/jpeg", "image/png", "image/webp"}
 ALLOWED_EXTENSIONS    = {".jpg", ".jpeg", ".png", ".webp"}
 
-# Compression targets
-COMPRESS_MAX_DIMENSION = 1024          # longest edge capped at 1024 px
-COMPRESS_WEBP_QUALITY  = 65            # starting quality for WebP
-COMPRESS_TARGET_BYTES  = 100 * 1024    # target <= 100 KB; bottoms out at quality 20
-
 # Rate-limiting
 IMAGE_UPLOAD_RATE_LIMIT  = 10          # max uploads per window
 IMAGE_UPLOAD_WINDOW_SECS = 60 * 60    # 1 hour
@@ -61,60 +54,6 @@ def validate_image_upload(file) -> str | None:
     return None               # all good
 
 
-# ── Compression ───────────────────────────────────────────────────────────────
-
-def compress_image(file, filename: str) -> ContentFile:
-    """
-    Compress and resize an uploaded image in-memory.
-    Returns a Django ContentFile ready to be saved.
-
-    Strategy
-    --------
-    • Resize so the longest edge <= 1024 px (preserves aspect ratio).
-    • Convert to WebP — better compression than JPEG/PNG, widely supported.
-    • Transparent images (PNG with alpha) are saved as RGBA WebP.
-    • Adaptive quality loop: 65 -> 50 -> 35 -> 20 until <= 100 KB.
-    """
-    import os
-
-    file.seek(0)
-    img = Image.open(file)
-
-    # Ensure we have pixel data (not just header)
-    img.load()
-
-    # ── Resize ────────────────────────────────────────────────────────────────
-    w, h = img.size
-    max_dim = COMPRESS_MAX_DIMENSION
-    if max(w, h) > max_dim:
-        ratio = max_dim / max(w, h)
-        img = img.resize((int(w * ratio), int(h * ratio)), Image.LANCZOS)
-
-    # ── Convert to WebP (best size/quality ratio, no GIF to worry about) ─────
-    has_alpha = img.mode in ("RGBA", "LA", "PA") or (
-        img.mode == "P" and "transparency" in img.info
-    )
-    img = img.convert("RGBA" if has_alpha else "RGB")
-
-    # ── Adaptive quality loop — drop quality until under target ──────────────
-    # Steps: 65 → 50 → 35 → 20  (4 attempts, bottoms out at 20)
-    quality = COMPRESS_WEBP_QUALITY
-    buf = io.BytesIO()
-
-    for _ in range(4):
-        buf.seek(0)
-        buf.truncate()
-        img.save(buf, format="WEBP", quality=quality, method=6)
-        if buf.tell() <= COMPRESS_TARGET_BYTES or quality <= 20:
-            break
-        quality -= 15
-
-    buf.seek(0)
-    base = os.path.splitext(filename)[0]
-    new_filename = base + ".webp"
-    return ContentFile(buf.read(), name=new_filename)
-
-
 # ── Rate limiting ─────────────────────────────────────────────────────────────
 
 def _rate_limit_key(user_id: int) -> str:
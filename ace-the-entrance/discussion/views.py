@@ -1,15 +1,23 @@
 # forum/views.py
+import base64
 import json
 from django.contrib import messages
 from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.views import View
 from django.views.generic import TemplateView
-from django.db.models import Count
+from django.db import transaction
+from django.db.models import F, Q
 
-from .models import Thread, Reply, ThreadLike, ReplyLike
+from config.images import image_srcset
+
+from . import imaging
+from .models import IMAGE_PROCESSING, IMAGE_READY, Thread, Reply, ThreadLike, ReplyLike
+from .ranking import hot_score, refresh_thread
+from .search import KINDS, highlight, search
 from .utils import (
     validate_image_upload,
-    compress_image,
     check_image_upload_rate_limit,
     check_post_rate_limit,
 )
@@ -18,6 +26,18 @@ from .utils import (
 
 TITLE_MAX_LENGTH = 255
 BODY_MAX_LENGTH  = 10_000   # characters
+PAGE_LIMIT       = 20       # threads per page unless ?limit= says otherwise
+PAGE_LIMIT_MAX   = 50
+SEARCH_MIN_LENGTH = 2
+SEARCH_MAX_LENGTH = 200
+
+# Thread list orderings.  Each is served by an index on its leading columns;
+# "id" breaks ties so keyset cursors never skip or repeat a row.
+THREAD_SORTS = {
+    "recent":  ("-created_at", "-id"),
+    "popular": ("-likes", "-created_at", "-id"),
+    "hot":     ("-hot_score", "-created_at", "-id"),
+}
 
 
 class IndexPageView(TemplateView):
@@ -28,8 +48,9 @@ class IndexPageView(TemplateView):
 
 def _process_image(request, field_name: str = "image"):
     """
-    Validate, rate-limit and compress an uploaded image.
-    Returns (ContentFile | None, JsonResponse | None).
+    Validate and rate-limit an uploaded image.
+    Returns (UploadedFile | None, JsonResponse | None).  The file is stored
+    as uploaded; discussion.imaging compresses it after the response.
     """
     raw = request.FILES.get(field_name)
     if raw is None:
@@ -45,7 +66,7 @@ def _process_image(request, field_name: str = "image"):
         messages.error(request, err)
         return None, JsonResponse({"detail": err}, status=429)
 
-    return compress_image(raw, raw.name), None
+    return raw, None
 
 
 def _validate_body(body, max_length=BODY_MAX_LENGTH):
@@ -56,24 +77,161 @@ def _validate_body(body, max_length=BODY_MAX_LENGTH):
     return None
 
 
+def _page_limit(request, default=PAGE_LIMIT):
+    try:
+        limit = int(request.GET.get("limit", default))
+    except ValueError:
+        limit = default
+    return min(max(limit, 1), PAGE_LIMIT_MAX)
+
+
+def _encode_cursor(values):
+    """Opaque, URL-safe cursor from the sort key of the last row on a page."""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor):
+    """The list given to _encode_cursor, or None if the cursor is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+def _thread_cursor(sort, thread):
+    """The sort key of `thread` in THREAD_SORTS[sort] order, as a cursor."""
+    key = [thread.created_at.isoformat(), thread.id]
+    if sort == "popular":
+        key.insert(0, thread.likes)
+    elif sort == "hot":
+        key.insert(0, thread.hot_score)
+    return _encode_cursor(key)
+
+
+def _keyset(sort, cursor):
+    """
+    Q() selecting the rows that come after `cursor` in the given sort —
+    a range scan on the matching index, however deep the page.
+        recent:  (created_at, id)             descending
+        popular: (likes, created_at, id)      descending
+        hot:     (hot_score, created_at, id)  descending
+    Returns None if the cursor does not fit the sort.
+    """
+    values = _decode_cursor(cursor)
+    try:
+        if sort == "recent":
+            created_at, pk = values
+        else:
+            lead, created_at, pk = values
+            lead = int(lead) if sort == "popular" else float(lead)
+        pk = int(pk)
+        created_at = parse_datetime(created_at)
+    except (TypeError, ValueError):
+        return None
+    if created_at is None:
+        return None
+
+    after = Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+    if sort == "popular":
+        after = Q(likes__lt=lead) | Q(likes=lead) & after
+    elif sort == "hot":
+        after = Q(hot_score__lt=lead) | Q(hot_score=lead) & after
+    return after
+
+
+def _liked_ids(request, like_model, field, objects):
+    """
+    Ids among `objects` the viewer has liked — one IN query for the whole
+    page, nothing for anonymous visitors or empty pages.
+    """
+    if not request.user.is_authenticated or not objects:
+        return set()
+    return set(
+        like_model.objects.filter(user=request.user, **{f"{field}__in": objects})
+        .values_list(f"{field}_id", flat=True)
+    )
+
+
+def _reply_page(request, thread_id, cursor=None):
+    """
+    One page of a thread's replies, oldest first, keyset-paginated on
+    (created_at, id) like the thread list.  Each reply carries the
+    viewer's liked_by_me flag, from one query for the whole page.
+    Returns {"results": [...], "next": cursor} or None for a bad cursor.
+    """
+    qs = Reply.objects.filter(thread_id=thread_id).select_related("author").order_by("created_at", "id")
+
+    if cursor:
+        try:
+            created_at, pk = _decode_cursor(cursor)
+            created_at, pk = parse_datetime(created_at), int(pk)
+        except (TypeError, ValueError):
+            return None
+        if created_at is None:
+            return None
+        qs = qs.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+
+    limit = _page_limit(request)
+    replies = list(qs[:limit + 1])
+    has_next = len(replies) > limit
+    replies = replies[:limit]
+
+    liked = _liked_ids(request, ReplyLike, "reply", replies)
+
+    next_cursor = None
+    if has_next:
+        last = replies[-1]
+        next_cursor = _encode_cursor([last.created_at.isoformat(), last.id])
+
+    return {
+        "results": [{**reply_to_dict(r), "liked_by_me": r.id in liked} for r in replies],
+        "next":    next_cursor,
+    }
+
+
 # ── Views ──────────────────────────────────────────────────────────────────────
 
 class ThreadListView(View):
-    """GET  /forum/api/threads/   — list threads
+    """GET  /forum/api/threads/   — list threads, one page at a time
+            ?category=&sort=recent|hot|popular&limit=&cursor=
+            → {"results": [...], "next": <cursor or null>}
+            every thread carries the viewer's liked_by_me flag
        POST /forum/api/threads/   — create thread (auth required)
     """
 
     def get(self, request):
-        qs = Thread.objects.select_related("author").annotate(reply_count=Count("replies"))
+        qs = Thread.objects.select_related("author")
 
         category = request.GET.get("category")
         if category:
             qs = qs.filter(category=category)
 
         sort = request.GET.get("sort", "recent")
-        qs = qs.order_by("-likes", "-created_at") if sort == "popular" else qs.order_by("-created_at")
-
-        return JsonResponse([thread_to_dict(t) for t in qs], safe=False)
+        if sort not in THREAD_SORTS:
+            sort = "recent"
+        qs = qs.order_by(*THREAD_SORTS[sort])
+
+        cursor = request.GET.get("cursor")
+        if cursor:
+            after = _keyset(sort, cursor)
+            if after is None:
+                return JsonResponse({"detail": "Invalid cursor."}, status=400)
+            qs = qs.filter(after)
+
+        # One row past the page tells us whether there is a next page.
+        limit = _page_limit(request)
+        threads = list(qs[:limit + 1])
+        has_next = len(threads) > limit
+        threads = threads[:limit]
+
+        liked = _liked_ids(request, ThreadLike, "thread", threads)
+        return JsonResponse({
+            "results": [{**thread_to_dict(t), "liked_by_me": t.id in liked} for t in threads],
+            "next":    _thread_cursor(sort, threads[-1]) if has_next else None,
+        })
 
     def post(self, request):
         if not request.user.is_authenticated:
@@ -104,18 +262,25 @@ class ThreadListView(View):
         thread = Thread.objects.create(
             title=title, body=body, category=category,
             author=request.user, image=image,
+            image_status=IMAGE_PROCESSING if image else IMAGE_READY,
+            hot_score=hot_score(0, 0, timezone.now()),
         )
-        return JsonResponse(thread_to_dict(thread), status=201)
+        if image:
+            imaging.enqueue(Thread, thread.pk)
+        return JsonResponse({**thread_to_dict(thread), "liked_by_me": False}, status=201)
 
 
 class ReplyListView(View):
-    """GET  /forum/api/threads/<pk>/replies/
+    """GET  /forum/api/threads/<pk>/replies/?limit=&cursor=
+            → {"results": [...], "next": <cursor or null>}
        POST /forum/api/threads/<pk>/replies/
     """
 
     def get(self, request, pk):
-        replies = Reply.objects.filter(thread_id=pk).select_related("author")
-        return JsonResponse([reply_to_dict(r) for r in replies], safe=False)
+        page = _reply_page(request, pk, request.GET.get("cursor"))
+        if page is None:
+            return JsonResponse({"detail": "Invalid cursor."}, status=400)
+        return JsonResponse(page)
 
     def post(self, request, pk):
         if not request.user.is_authenticated:
@@ -143,56 +308,80 @@ class ReplyListView(View):
         reply = Reply.objects.create(
             thread=thread, body=body,
             author=request.user, image=image,
+            image_status=IMAGE_PROCESSING if image else IMAGE_READY,
         )
-        return JsonResponse(reply_to_dict(reply), status=201)
+        if image:
+            imaging.enqueue(Reply, reply.pk)
+        return JsonResponse({**reply_to_dict(reply), "liked_by_me": False}, status=201)
 
 
-class ThreadLikeView(View):
-    """POST /forum/api/threads/<pk>/like/"""
+class _LikeToggleView(View):
+    """
+    POST   — like    (idempotent)
+    DELETE — unlike  (idempotent)
+    Both insert or delete the junction row and move the counter with one
+    F() UPDATE in the same transaction, then answer with the stored count:
+        {"likes": n, "liked": bool}
+    """
+    model      = None    # Thread or Reply
+    like_model = None    # ThreadLike or ReplyLike
+    field      = None    # FK name on like_model
 
     def post(self, request, pk):
+        return self._set(request, pk, liked=True)
+
+    def delete(self, request, pk):
+        return self._set(request, pk, liked=False)
+
+    def changed(self, pk):
+        """Hook run after the counter moved."""
+
+    def _set(self, request, pk, liked):
         if not request.user.is_authenticated:
             return JsonResponse({"detail": "Authentication required."}, status=401)
 
-        try:
-            thread = Thread.objects.get(pk=pk)
-        except Thread.DoesNotExist:
+        if not self.model.objects.filter(pk=pk).exists():
             return JsonResponse({"detail": "Not found."}, status=404)
 
-        _, created = ThreadLike.objects.get_or_create(user=request.user, thread=thread)
-        if not created:
-            return JsonResponse({"detail": "You have already liked this thread."}, status=409)
-
-        # Count real likes from the junction table
-        likes = thread.thread_likes.count()
-        Thread.objects.filter(pk=pk).update(likes=likes)
-        return JsonResponse({"likes": likes})
+        lookup = {"user": request.user, f"{self.field}_id": pk}
+        with transaction.atomic():
+            if liked:
+                _, moved = self.like_model.objects.get_or_create(**lookup)
+                if moved:
+                    self.model.objects.filter(pk=pk).update(likes=F("likes") + 1)
+            else:
+                moved, _ = self.like_model.objects.filter(**lookup).delete()
+                if moved:
+                    self.model.objects.filter(pk=pk, likes__gt=0).update(likes=F("likes") - 1)
+            likes = self.model.objects.filter(pk=pk).values_list("likes", flat=True).first()
 
+        if moved:
+            self.changed(pk)
+        return JsonResponse({"likes": likes, "liked": liked})
 
-class ReplyLikeView(View):
-    """POST /forum/api/replies/<pk>/like/"""
 
-    def post(self, request, pk):
-        if not request.user.is_authenticated:
-            return JsonResponse({"detail": "Authentication required."}, status=401)
+class ThreadLikeView(_LikeToggleView):
+    """POST / DELETE /forum/api/threads/<pk>/like/"""
+    model      = Thread
+    like_model = ThreadLike
+    field      = "thread"
 
-        try:
-            reply = Reply.objects.get(pk=pk)
-        except Reply.DoesNotExist:
-            return JsonResponse({"detail": "Not found."}, status=404)
+    def changed(self, pk):
+        refresh_thread(pk)
 
-        _, created = ReplyLike.objects.get_or_create(user=request.user, reply=reply)
-        if not created:
-            return JsonResponse({"detail": "You have already liked this reply."}, status=409)
 
-        likes = reply.reply_likes.count()
-        Reply.objects.filter(pk=pk).update(likes=likes)
-        return JsonResponse({"likes": likes})
+class ReplyLikeView(_LikeToggleView):
+    """POST / DELETE /forum/api/replies/<pk>/like/"""
+    model      = Reply
+    like_model = ReplyLike
+    field      = "reply"
 
 
 class ThreadDetailEditView(View):
     """
-    GET    /forum/api/threads/<pk>/
+    GET    /forum/api/threads/<pk>/   — the thread, the viewer's liked_by_me
+                                        flag and the first page of replies
+                                        ({"results", "next"}), in one response
     PATCH  /forum/api/threads/<pk>/
     DELETE /forum/api/threads/<pk>/
     """
@@ -202,7 +391,12 @@ class ThreadDetailEditView(View):
             thread = Thread.objects.select_related("author").get(pk=pk)
         except Thread.DoesNotExist:
             return JsonResponse({"detail": "Not found."}, status=404)
-        return JsonResponse(thread_to_dict(thread))
+
+        return JsonResponse({
+            **thread_to_dict(thread),
+            "liked_by_me": thread.id in _liked_ids(request, ThreadLike, "thread", [thread]),
+            "replies":     _reply_page(request, thread.pk),
+        })
 
     def _get_thread_for_owner(self, request, pk):
         if not request.user.is_authenticated:
@@ -243,7 +437,9 @@ class ThreadDetailEditView(View):
         if "category" in payload:
             thread.category = payload["category"]
 
-        thread.save()
+        # Only the edited columns: likes and reply_count are maintained with
+        # F() updates and must not be overwritten with this request's copy.
+        thread.save(update_fields=["title", "body", "category", "updated_at"])
         return JsonResponse(thread_to_dict(thread))
 
     def delete(self, request, pk):
@@ -256,10 +452,18 @@ class ThreadDetailEditView(View):
 
 class ReplyDetailEditView(View):
     """
+    GET    /forum/api/replies/<pk>/   — one reply (polled while its image is processing)
     PATCH  /forum/api/replies/<pk>/
     DELETE /forum/api/replies/<pk>/
     """
 
+    def get(self, request, pk):
+        try:
+            reply = Reply.objects.select_related("author").get(pk=pk)
+        except Reply.DoesNotExist:
+            return JsonResponse({"detail": "Reply not found."}, status=404)
+        return JsonResponse(reply_to_dict(reply))
+
     def _get_reply_for_owner(self, request, pk):
         if not request.user.is_authenticated:
             return None, JsonResponse({"detail": "Authentication required."}, status=401)
@@ -288,7 +492,7 @@ class ReplyDetailEditView(View):
                 return JsonResponse({"detail": err}, status=400)
             reply.body = body
 
-        reply.save()
+        reply.save(update_fields=["body"])   # likes is moved by F() updates; leave it alone
         return JsonResponse(reply_to_dict(reply))
 
     def delete(self, request, pk):
@@ -299,8 +503,94 @@ class ReplyDetailEditView(View):
         return JsonResponse({}, status=204)
 
 
+class SearchView(View):
+    """GET /forum/api/search/?q=&limit=&cursor=
+           — threads and replies matching q, best match first
+           → {"results": [{type, thread_id, reply_id, title, snippet_html,
+                           author_username, created_at}, ...],
+              "next": <cursor or null>}
+           snippet_html is escaped text with the matched words in <mark>.
+    """
+
+    def get(self, request):
+        terms = request.GET.get("q", "").strip()
+        if len(terms) < SEARCH_MIN_LENGTH:
+            return JsonResponse(
+                {"detail": f"Search for at least {SEARCH_MIN_LENGTH} characters."}, status=400
+            )
+        terms = terms[:SEARCH_MAX_LENGTH]
+
+        after = None
+        cursor = request.GET.get("cursor")
+        if cursor:
+            after = _search_keyset(cursor)
+            if after is None:
+                return JsonResponse({"detail": "Invalid cursor."}, status=400)
+
+        hits, next_key = search(terms, after, _page_limit(request))
+
+        # Two queries hydrate the whole page: the replies, then every thread
+        # involved (for titles), each with its author.
+        replies = Reply.objects.select_related("author").in_bulk(
+            [hit["id"] for hit in hits if hit["kind"] == "reply"]
+        )
+        threads = Thread.objects.select_related("author").in_bulk(
+            {hit["thread_id"] for hit in hits}
+        )
+
+        results = []
+        for hit in hits:
+            thread = threads.get(hit["thread_id"])
+            obj = thread if hit["kind"] == "thread" else replies.get(hit["id"])
+            if thread is None or obj is None:     # deleted since the index was read
+                continue
+            results.append({
+                "type":            hit["kind"],
+                "thread_id":       thread.id,
+                "reply_id":        obj.id if hit["kind"] == "reply" else None,
+                "title":           thread.title,
+                "snippet_html":    highlight(hit["snippet"]),
+                "author_username": obj.author.username,
+                "created_at":      obj.created_at.isoformat(),
+            })
+
+        return JsonResponse({
+            "results": results,
+            "next":    _encode_cursor(next_key) if next_key else None,
+        })
+
+
+def _search_keyset(cursor):
+    """[score, kind, id] from a search cursor, or None if it is malformed."""
+    values = _decode_cursor(cursor)
+    try:
+        score, kind, pk = values
+        score, pk = float(score), int(pk)
+    except (TypeError, ValueError):
+        return None
+    return [score, kind, pk] if kind in KINDS else None
+
+
 # ── Serialisation helpers ──────────────────────────────────────────────────────
 
+def _image_url(obj):
+    """
+    The WebP once it is ready.  Nothing while the raw upload is still being
+    compressed, or if compressing it failed: the original still carries the
+    camera's EXIF, GPS position included, so it is never published.
+    """
+    if not obj.image or obj.image_status != IMAGE_READY:
+        return None
+    return obj.image.url
+
+
+def _image_srcset(obj):
+    """320w/640w/full candidates, so lists and phones fetch a fraction of the bytes."""
+    if obj.image_status != IMAGE_READY:
+        return None
+    return image_srcset(obj.image, obj.image_width)
+
+
 def thread_to_dict(thread):
     return {
         "id":              thread.id,
@@ -310,8 +600,10 @@ def thread_to_dict(thread):
         "author_username": thread.author.username,
         "author_id":       thread.author.id,
         "likes":           thread.likes,
-        "image_url":       thread.image.url if thread.image else None,
-        "reply_count":     getattr(thread, "reply_count", thread.replies.count()),
+        "image_url":       _image_url(thread),
+        "image_srcset":    _image_srcset(thread),
+        "image_processing": thread.image_status == IMAGE_PROCESSING,
+        "reply_count":     thread.reply_count,
         "created_at":      thread.created_at.isoformat(),
     }
 
@@ -322,7 +614,9 @@ def reply_to_dict(reply):
         "body":            reply.body,
         "author_username": reply.author.username,
         "author_id":       reply.author.id,
-        "image_url":       reply.image.url if reply.image else None,
+        "image_url":       _image_url(reply),
+        "image_srcset":    _image_srcset(reply),
+        "image_processing": reply.image_status == IMAGE_PROCESSING,
         "likes":           reply.likes,
         "created_at":      reply.created_at.isoformat(),
     }
\ No newline at end of file
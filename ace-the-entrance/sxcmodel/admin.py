@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Leaderboard, Question, QuizAttempt, UserAnswer
+from django.utils import timezone
+
+from .models import Leaderboard, Question, QuizAttempt, SubjectResult, SubjectRollup, UserAnswer
 
 
 @admin.register(Leaderboard)
@@ -32,16 +34,51 @@ class UserAnswerInline(admin.TabularInline):
     is_correct_display.short_description = 'Correct?'
 
 
+class SubjectResultInline(admin.TabularInline):
+    model = SubjectResult
+    extra = 0
+    can_delete = False
+    readonly_fields = ('subject', 'correct_count', 'incorrect_count', 'unattempted_count',
+                       'raw_score', 'time_seconds')
+
+
+@admin.register(SubjectRollup)
+class SubjectRollupAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'attempt_count', 'mean_score', 'mean_time')
+    readonly_fields = ('subject', 'attempt_count', 'correct_sum', 'incorrect_sum', 'score_sum',
+                       'score_sq_sum', 'time_sum', 'time_sq_sum')
+
+
 @admin.register(QuizAttempt)
 class QuizAttemptAdmin(admin.ModelAdmin):
     list_display = (
-        'id', 'user', 'start_time', 'is_completed',
+        'id', 'user', 'start_time', 'deadline', 'paused_at', 'is_completed',
         'correct_count', 'incorrect_count', 'raw_score', 'final_grade'
     )
     list_filter = ('is_completed',)
     search_fields = ('user__username',)
-    inlines = [UserAnswerInline]
-    readonly_fields = ('session_key', 'start_time')
+    inlines = [SubjectResultInline, UserAnswerInline]
+    readonly_fields = ('session_key', 'start_time', 'deadline', 'paused_at', 'paused_seconds')
+
+    # ── Admin-approved interruptions (power cut, invigilator call, …) ────────
+
+    actions = ['pause_attempts', 'resume_attempts']
+
+    @admin.action(description='Pause selected attempts (freeze the clock)')
+    def pause_attempts(self, request, queryset):
+        # An attempt already past its deadline is only waiting to be graded;
+        # pausing it would hand back time that has run out.
+        attempts = queryset.filter(is_completed=False, paused_at__isnull=True, deadline__gt=timezone.now())
+        for attempt in attempts:
+            attempt.pause()
+        self.message_user(request, f"{len(attempts)} attempt(s) paused.")
+
+    @admin.action(description='Resume selected attempts (extend the deadline)')
+    def resume_attempts(self, request, queryset):
+        attempts = queryset.filter(is_completed=False, paused_at__isnull=False)
+        for attempt in attempts:
+            attempt.resume()
+        self.message_user(request, f"{len(attempts)} attempt(s) resumed.")
 
 
 @admin.register(UserAnswer)
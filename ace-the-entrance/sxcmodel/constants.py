@@ -1,4 +1,8 @@
 MAX_TIME_SECONDS = 90 * 60  # 1.5 hours in seconds
+
+# Answers arriving this long after the deadline are still accepted, to cover
+# the auto-submit POST and ordinary network latency.
+SUBMIT_GRACE_SECONDS = 60
 QUESTIONS_PER_SECTION = 20
 
 # Subjects whose order is randomized
@@ -12,5 +16,7 @@ ORDERED_SUBJECTS = ['ENG', 'IQ_GK']
 ALL_SUBJECTS = RANDOMIZED_SUBJECTS + ORDERED_SUBJECTS
 
 # Scoring formula weights
+MAX_GRADE = 100
 MARKS_WEIGHT = 0.80   # 80% of final grade from marks
-TIME_WEIGHT = 0.20    # 20% of final grade from speed bonus
\ No newline at end of file
+TIME_WEIGHT = 0.20    # 20% of final grade from speed bonus
+NEGATIVE_MARK = 0.25  # deducted from the raw score per wrong answer
\ No newline at end of file
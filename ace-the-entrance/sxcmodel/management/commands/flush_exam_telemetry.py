@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from sxcmodel import telemetry
+
+
+class Command(BaseCommand):
+    help = 'Writes buffered per-question exam timings from the Redis stream to UserAnswer'
+
+    def handle(self, *args, **kwargs):
+        processed = telemetry.drain()
+        self.stdout.write(self.style.SUCCESS(f'Flushed {processed} telemetry batch(es)'))
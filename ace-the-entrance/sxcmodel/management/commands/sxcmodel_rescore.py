@@ -0,0 +1,197 @@
+"""
+Management command to rescore every completed attempt after a change to
+compute_final_grade() or sxcmodel.constants.
+
+Runs in three phases:
+    1. attempts  — raw_score / final_grade recomputed in SQL, one UPDATE per
+                   chunk of primary keys (see utils.final_grade_expression)
+    2. subjects  — SubjectResult.raw_score recomputed the same way
+    3. rebuild   — Leaderboard and SubjectRollup rebuilt from scratch
+
+Each chunk commits on its own and the position is checkpointed in the
+cache, so an interrupted run on a large table picks up where it stopped.
+
+Usage:
+    python manage.py sxcmodel_rescore
+
+Options:
+    --chunk-size N      Rows per UPDATE (default 10000)
+    --resume            Continue from the last checkpoint instead of the start
+    --leaderboard-only  Skip phases 1–2; just rebuild the derived tables
+"""
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+
+from sxcmodel.models import Leaderboard, QuizAttempt, SubjectResult, SubjectRollup
+from sxcmodel.utils import final_grade_expression, raw_score_expression
+
+CHECKPOINT_KEY = 'sxcmodel:rescore:checkpoint'
+
+
+class Command(BaseCommand):
+    help = 'Recomputes raw_score / final_grade for all completed attempts and rebuilds the Leaderboard'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=10000)
+        parser.add_argument('--resume', action='store_true',
+                            help='Continue from the checkpoint left by an interrupted run')
+        parser.add_argument('--leaderboard-only', action='store_true',
+                            help='Only rebuild Leaderboard and SubjectRollup')
+
+    def handle(self, *args, **options):
+        checkpoint = cache.get(CHECKPOINT_KEY) if options['resume'] else None
+        if checkpoint:
+            self.stdout.write(f"Resuming {checkpoint['phase']} after id {checkpoint['last_id']}")
+        else:
+            checkpoint = {'phase': 'attempts', 'last_id': 0}
+
+        if not options['leaderboard_only']:
+            if checkpoint['phase'] == 'attempts':
+                self._rescore(
+                    'attempts',
+                    QuizAttempt.objects.filter(is_completed=True),
+                    {'raw_score': raw_score_expression(), 'final_grade': final_grade_expression()},
+                    checkpoint['last_id'], options['chunk_size'],
+                )
+                checkpoint = {'phase': 'subjects', 'last_id': 0}
+
+            self._rescore(
+                'subjects',
+                SubjectResult.objects.all(),
+                {'raw_score': raw_score_expression()},
+                checkpoint['last_id'], options['chunk_size'],
+            )
+
+        self._rebuild_leaderboard()
+        self._rebuild_rollups()
+        cache.delete(CHECKPOINT_KEY)
+
+    # ---- phases 1–2 --------------------------------------------------------
+
+    def _rescore(self, phase, queryset, updates, last_id, chunk_size):
+        """
+        Keyset-paginate `queryset` by primary key and apply `updates` to one
+        chunk per statement.  Every chunk is its own transaction, so locks
+        are short and a crash loses at most one chunk of work.
+        """
+        total = queryset.count()
+        done = queryset.filter(pk__lte=last_id).count() if last_id else 0
+        self.stdout.write(f"{phase}: {total} row(s) to rescore")
+
+        while True:
+            ids = list(
+                queryset.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+
+            with transaction.atomic():
+                queryset.filter(pk__gte=ids[0], pk__lte=ids[-1]).update(**updates)
+
+            last_id = ids[-1]
+            done += len(ids)
+            cache.set(CHECKPOINT_KEY, {'phase': phase, 'last_id': last_id}, None)
+            pct = done * 100 // total if total else 100
+            self.stdout.write(f"  {done}/{total} ({pct}%) — through id {last_id}")
+
+        self.stdout.write(self.style.SUCCESS(f"{phase}: done"))
+
+    # ---- phase 3 -----------------------------------------------------------
+
+    def _rebuild_leaderboard(self):
+        """
+        One row per user from their best finalised attempt.  Ties keep the
+        earlier attempt, matching SubmitExamView's strictly-greater rule.
+        """
+        with transaction.atomic():
+            Leaderboard.objects.all().delete()
+            if connection.vendor == 'postgresql':
+                self._insert_leaderboard_sql()
+            else:
+                self._insert_leaderboard_orm()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Leaderboard rebuilt: {Leaderboard.objects.count()} user(s)"
+        ))
+
+    def _insert_leaderboard_sql(self):
+        qn = connection.ops.quote_name
+        lb = Leaderboard._meta
+        qa = QuizAttempt._meta
+
+        def col(meta, name):
+            return qn(meta.get_field(name).column)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                INSERT INTO {qn(lb.db_table)} (
+                    {col(lb, 'user')}, {col(lb, 'attempt')}, {col(lb, 'final_grade')},
+                    {col(lb, 'raw_score')}, {col(lb, 'correct_count')}, {col(lb, 'incorrect_count')},
+                    {col(lb, 'total_time_seconds')}, {col(lb, 'achieved_at')}
+                )
+                SELECT DISTINCT ON ({col(qa, 'user')})
+                    {col(qa, 'user')}, {col(qa, 'id')}, {col(qa, 'final_grade')},
+                    {col(qa, 'raw_score')}, {col(qa, 'correct_count')}, {col(qa, 'incorrect_count')},
+                    {col(qa, 'total_time_seconds')}, {col(qa, 'end_time')}
+                FROM {qn(qa.db_table)}
+                WHERE {col(qa, 'is_completed')} AND {col(qa, 'end_time')} IS NOT NULL
+                ORDER BY {col(qa, 'user')}, {col(qa, 'final_grade')} DESC,
+                         {col(qa, 'end_time')} ASC, {col(qa, 'id')} ASC
+            """)
+
+    def _insert_leaderboard_orm(self):
+        """Portable fallback (SQLite): correlated subquery picks each user's best attempt."""
+        finalised = QuizAttempt.objects.filter(is_completed=True, end_time__isnull=False)
+        best = (
+            finalised.filter(user=OuterRef('user'))
+            .order_by('-final_grade', 'end_time', 'id')
+            .values('id')[:1]
+        )
+        rows = (
+            Leaderboard(
+                user_id=a.user_id, attempt_id=a.id, final_grade=a.final_grade,
+                raw_score=a.raw_score, correct_count=a.correct_count,
+                incorrect_count=a.incorrect_count, total_time_seconds=a.total_time_seconds,
+                achieved_at=a.end_time,
+            )
+            for a in finalised.filter(id=Subquery(best)).iterator(chunk_size=2000)
+        )
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= 2000:
+                Leaderboard.objects.bulk_create(batch)
+                batch = []
+        Leaderboard.objects.bulk_create(batch)
+
+    def _rebuild_rollups(self):
+        """Recompute the per-subject running sums with one grouped query."""
+        totals = (
+            SubjectResult.objects.filter(attempt__is_completed=True)
+            .values('subject')
+            .annotate(
+                attempts=Count('id'),
+                correct=Sum('correct_count'),
+                incorrect=Sum('incorrect_count'),
+                score=Sum('raw_score'),
+                score_sq=Sum(F('raw_score') * F('raw_score')),
+                time=Sum('time_seconds'),
+                time_sq=Sum(F('time_seconds') * F('time_seconds')),
+            )
+        )
+        with transaction.atomic():
+            SubjectRollup.objects.all().delete()
+            SubjectRollup.objects.bulk_create([
+                SubjectRollup(
+                    subject=t['subject'], attempt_count=t['attempts'],
+                    correct_sum=t['correct'], incorrect_sum=t['incorrect'],
+                    score_sum=t['score'], score_sq_sum=t['score_sq'],
+                    time_sum=t['time'], time_sq_sum=t['time_sq'],
+                )
+                for t in totals
+            ])
+
+        self.stdout.write(self.style.SUCCESS(f"Subject rollups rebuilt: {len(totals)} subject(s)"))
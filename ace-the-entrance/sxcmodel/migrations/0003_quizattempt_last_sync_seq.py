@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sxcmodel', '0002_alter_quizattempt_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizattempt',
+            name='last_sync_seq',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
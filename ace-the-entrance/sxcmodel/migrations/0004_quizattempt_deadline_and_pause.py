@@ -0,0 +1,48 @@
+# Generated by Django 6.0.2 on 2026-10-19 10:05
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import F
+
+# MAX_TIME_SECONDS when this migration was written — frozen so later changes
+# to the constant don't rewrite history.
+EXAM_DURATION = timedelta(minutes=90)
+
+
+def backfill_deadline(apps, schema_editor):
+    QuizAttempt = apps.get_model('sxcmodel', 'QuizAttempt')
+    QuizAttempt.objects.filter(deadline__isnull=True).update(
+        deadline=F('start_time') + EXAM_DURATION
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sxcmodel', '0003_quizattempt_last_sync_seq'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizattempt',
+            name='deadline',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name='quizattempt',
+            name='paused_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='quizattempt',
+            name='paused_seconds',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_deadline, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='quizattempt',
+            name='deadline',
+            field=models.DateTimeField(),
+        ),
+    ]
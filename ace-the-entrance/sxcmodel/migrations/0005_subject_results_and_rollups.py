@@ -0,0 +1,44 @@
+# Generated by Django 6.0.2 on 2026-10-19 11:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sxcmodel', '0004_quizattempt_deadline_and_pause'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubjectRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(choices=[('PHY', 'Physics'), ('CHE', 'Chemistry'), ('BIO', 'Biology'), ('MAT', 'Maths'), ('ENG', 'English'), ('IQ_GK', 'IQ/GK')], max_length=10, unique=True)),
+                ('attempt_count', models.IntegerField(default=0)),
+                ('correct_sum', models.BigIntegerField(default=0)),
+                ('incorrect_sum', models.BigIntegerField(default=0)),
+                ('score_sum', models.FloatField(default=0.0)),
+                ('score_sq_sum', models.FloatField(default=0.0)),
+                ('time_sum', models.BigIntegerField(default=0)),
+                ('time_sq_sum', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SubjectResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(choices=[('PHY', 'Physics'), ('CHE', 'Chemistry'), ('BIO', 'Biology'), ('MAT', 'Maths'), ('ENG', 'English'), ('IQ_GK', 'IQ/GK')], max_length=10)),
+                ('correct_count', models.IntegerField(default=0)),
+                ('incorrect_count', models.IntegerField(default=0)),
+                ('unattempted_count', models.IntegerField(default=0)),
+                ('raw_score', models.FloatField(default=0.0)),
+                ('time_seconds', models.IntegerField(default=0)),
+                ('attempt', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subject_results', to='sxcmodel.quizattempt')),
+            ],
+            options={
+                'unique_together': {('attempt', 'subject')},
+            },
+        ),
+    ]
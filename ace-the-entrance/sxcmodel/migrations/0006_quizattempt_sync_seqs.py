@@ -0,0 +1,31 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:50
+
+from django.db import migrations, models
+
+
+def copy_last_seq(apps, schema_editor):
+    # Queued batches from clients that predate client ids arrive without one;
+    # they keep being compared against the old single high-water mark.
+    QuizAttempt = apps.get_model('sxcmodel', 'QuizAttempt')
+    for attempt in QuizAttempt.objects.filter(last_sync_seq__gt=0).only('pk', 'last_sync_seq'):
+        QuizAttempt.objects.filter(pk=attempt.pk).update(sync_seqs={'': attempt.last_sync_seq})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sxcmodel', '0005_subject_results_and_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizattempt',
+            name='sync_seqs',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.RunPython(copy_last_seq, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='quizattempt',
+            name='last_sync_seq',
+        ),
+    ]
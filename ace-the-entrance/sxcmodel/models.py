@@ -1,4 +1,8 @@
+import math
+from datetime import timedelta
+
 from django.db import models
+from django.utils import timezone
 from accounts.models import User
 import uuid
 
@@ -48,6 +52,13 @@ class QuizAttempt(models.Model):
     # Time fields
     total_time_seconds = models.IntegerField(default=0)
 
+    # Server-authoritative clock.  deadline = start_time + MAX_TIME_SECONDS,
+    # pushed back by the length of every admin-approved pause.  While paused,
+    # paused_at is set and the remaining time is frozen.
+    deadline = models.DateTimeField()
+    paused_at = models.DateTimeField(null=True, blank=True)
+    paused_seconds = models.IntegerField(default=0)
+
     # Final computed grade (0–100)
     # Formula: final_grade = (raw_score / total_questions) * 80 + time_bonus * 20
     # time_bonus = max(0, 1 - (total_time_seconds / MAX_TIME_SECONDS))
@@ -60,12 +71,53 @@ class QuizAttempt(models.Model):
     # Track the current page/section index so user can resume
     current_section_index = models.IntegerField(default=0)
 
+    # Highest offline-sync batch seq applied so far, per client id
+    # ({"<client>": seq}).  A client's batches at or below its entry are
+    # replays and are acknowledged without being re-applied.
+    sync_seqs = models.JSONField(default=dict)
+
     class Meta:
         ordering = ['-final_grade']
 
     def __str__(self):
         return f"{self.user.username} – attempt {self.pk} (grade={self.final_grade:.1f})"
 
+    @property
+    def is_paused(self):
+        return self.paused_at is not None
+
+    def remaining_seconds(self, now=None) -> int:
+        """Seconds left on the clock; frozen while the attempt is paused."""
+        now = self.paused_at or now or timezone.now()
+        return max(0, int((self.deadline - now).total_seconds()))
+
+    def elapsed_seconds(self, now=None) -> int:
+        """Exam time actually used — wall clock since start, minus pauses."""
+        now = self.paused_at or now or timezone.now()
+        return max(0, int((now - self.start_time).total_seconds()) - self.paused_seconds)
+
+    def is_expired(self, grace_seconds=0, now=None) -> bool:
+        """Pure comparison against the stored deadline — no queries, no cache."""
+        if self.paused_at is not None:
+            return False
+        now = now or timezone.now()
+        return now >= self.deadline + timedelta(seconds=grace_seconds)
+
+    def pause(self, now=None):
+        if self.paused_at is None:
+            self.paused_at = now or timezone.now()
+            self.save(update_fields=['paused_at'])
+
+    def resume(self, now=None):
+        """Push the deadline back by however long the attempt was paused."""
+        if self.paused_at is None:
+            return
+        paused_for = (now or timezone.now()) - self.paused_at
+        self.deadline += paused_for
+        self.paused_seconds += int(paused_for.total_seconds())
+        self.paused_at = None
+        self.save(update_fields=['deadline', 'paused_seconds', 'paused_at'])
+
 
 class Leaderboard(models.Model):
     """
@@ -95,6 +147,69 @@ class Leaderboard(models.Model):
         return f"{self.user.username} — {self.final_grade:.1f}"
 
 
+class SubjectResult(models.Model):
+    """
+    Per-subject breakdown of one completed attempt.  Written once by
+    SubmitExamView so the results page never has to re-scan UserAnswer.
+    """
+    attempt = models.ForeignKey(QuizAttempt, on_delete=models.CASCADE, related_name='subject_results')
+    subject = models.CharField(max_length=10, choices=Question.SUBJECT_CHOICES)
+
+    correct_count = models.IntegerField(default=0)
+    incorrect_count = models.IntegerField(default=0)
+    unattempted_count = models.IntegerField(default=0)
+    raw_score = models.FloatField(default=0.0)  # correct - 0.25 * incorrect
+    time_seconds = models.IntegerField(default=0)  # sum of UserAnswer.time_taken_seconds
+
+    class Meta:
+        unique_together = ('attempt', 'subject')
+
+    def __str__(self):
+        return f"Attempt {self.attempt_id} | {self.subject} → {self.raw_score:g}"
+
+
+class SubjectRollup(models.Model):
+    """
+    Running totals over every completed attempt, one row per subject.
+    Incremented with F() expressions when an attempt is finalised; mean and
+    standard deviation fall straight out of the sums, so comparing a student
+    with everyone else costs O(subjects) regardless of how many attempts exist.
+    """
+    subject = models.CharField(max_length=10, choices=Question.SUBJECT_CHOICES, unique=True)
+    attempt_count = models.IntegerField(default=0)
+
+    correct_sum = models.BigIntegerField(default=0)
+    incorrect_sum = models.BigIntegerField(default=0)
+    score_sum = models.FloatField(default=0.0)
+    score_sq_sum = models.FloatField(default=0.0)
+    time_sum = models.BigIntegerField(default=0)
+    time_sq_sum = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.subject} — {self.attempt_count} attempts"
+
+    @staticmethod
+    def _mean_std(total, sq_total, n):
+        if not n:
+            return 0.0, 0.0
+        mean = total / n
+        variance = max(0.0, sq_total / n - mean * mean)  # float error can dip below 0
+        return mean, math.sqrt(variance)
+
+    @property
+    def mean_score(self):
+        return self._mean_std(self.score_sum, self.score_sq_sum, self.attempt_count)[0]
+
+    @property
+    def mean_time(self):
+        return self._mean_std(self.time_sum, self.time_sq_sum, self.attempt_count)[0]
+
+    def score_z(self, score):
+        """Standard score of `score` against all attempts; 0 when there is no spread yet."""
+        mean, std = self._mean_std(self.score_sum, self.score_sq_sum, self.attempt_count)
+        return (score - mean) / std if std else 0.0
+
+
 class UserAnswer(models.Model):
     attempt = models.ForeignKey(QuizAttempt, on_delete=models.CASCADE, related_name='answers')
     question = models.ForeignKey(Question, on_delete=models.CASCADE)
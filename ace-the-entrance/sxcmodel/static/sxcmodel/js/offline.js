@@ -0,0 +1,269 @@
+/* ============================================================
+   sxcmodel/offline.js  –  Offline answer queue for the exam page
+   Usage:
+     ExamOffline.init({
+       sessionKey: '…',
+       syncUrl:    '/sxcmodel/exam/<key>/sync/',
+       paperUrl:   '/sxcmodel/exam/<key>/paper/',
+       workerUrl:  '/sxcmodel/exam-sw.js',
+       onStatus:   function (state, pending) { … }  // 'saving' | 'saved' | 'offline' | 'error' | 'paused'
+     });
+
+     ExamOffline.record({ '<question_id>': 2 }, sectionIndex);  // queue a change
+     ExamOffline.restore(function (answers) { … });             // answers queued on this device
+     ExamOffline.flush().then(function (pending) { … });        // sync; resolves to #still queued
+
+   Every answer change is written to IndexedDB first and synced in
+   batches — on an interval, on reconnect and before navigation — so a
+   dropped connection never loses an answer.  Each page load is its own
+   client with a random `client` id, and each batch carries that id and a
+   strictly increasing `seq`; the server keeps the highest seq applied per
+   client, so (client, seq) is the idempotency key and another device or
+   a clock running behind can't make fresh batches look like replays.
+   While an administrator has the attempt paused the server refuses
+   batches (423); they stay queued and the status becomes 'paused'.
+   ============================================================ */
+
+(function (global) {
+    'use strict';
+
+    var DB_NAME        = 'sxcmodel-exam';
+    var DB_VERSION     = 1;
+    var SEQ_KEY        = 'sxcmodel-exam-seq';
+    var BATCH_LIMIT    = 200;
+    var SYNC_INTERVAL  = 30000;
+
+    var opts      = null;
+    var dbPromise = null;
+    var memory    = { outbox: [], answers: {} };   // fallback when IndexedDB is unavailable
+    var flushing  = null;
+    var clientId  = newClientId();
+
+    /* ── Helpers ── */
+    function getCookie(name) {
+        var match = document.cookie.match(new RegExp('(^| )' + name + '=([^;]+)'));
+        return match ? match[2] : '';
+    }
+
+    function status(state, pending) {
+        if (opts && opts.onStatus) opts.onStatus(state, pending);
+    }
+
+    function newClientId() {
+        if (global.crypto && crypto.randomUUID) return crypto.randomUUID();
+        return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2);
+    }
+
+    /* Strictly increasing across page loads: wall clock, bumped past the last one issued.
+       Also keeps outbox keys unique on this device; the server never compares seqs of
+       different clients. */
+    function nextSeq() {
+        var last = 0;
+        try { last = parseInt(localStorage.getItem(SEQ_KEY), 10) || 0; } catch (e) {}
+        var seq = Math.max(Date.now(), last + 1);
+        try { localStorage.setItem(SEQ_KEY, String(seq)); } catch (e) {}
+        return seq;
+    }
+
+    /* ── IndexedDB ── */
+    function openDb() {
+        if (dbPromise) return dbPromise;
+        dbPromise = new Promise(function (resolve, reject) {
+            if (!global.indexedDB) { reject(new Error('IndexedDB unavailable')); return; }
+            var req = indexedDB.open(DB_NAME, DB_VERSION);
+            req.onupgradeneeded = function () {
+                var db = req.result;
+                db.createObjectStore('outbox',  { keyPath: 'seq' }).createIndex('session', 'session');
+                db.createObjectStore('answers', { keyPath: 'id'  }).createIndex('session', 'session');
+            };
+            req.onsuccess = function () { resolve(req.result); };
+            req.onerror   = function () { reject(req.error); };
+        });
+        return dbPromise;
+    }
+
+    /* Run `work(tx)` in one transaction; resolves with whatever work() returned
+       (an IDBRequest is unwrapped to its result) once the transaction commits. */
+    function withStores(names, mode, work) {
+        return openDb().then(function (db) {
+            return new Promise(function (resolve, reject) {
+                var tx  = db.transaction(names, mode);
+                var out = work(tx);
+                tx.oncomplete = function () { resolve(out instanceof IDBRequest ? out.result : out); };
+                tx.onerror = tx.onabort = function () { reject(tx.error); };
+            });
+        });
+    }
+
+    function bySession(tx, name, session) {
+        return tx.objectStore(name).index('session').getAll(IDBKeyRange.only(session));
+    }
+
+    /* ── Queue operations ── */
+    function record(answers, section) {
+        var entry = {
+            seq: nextSeq(), client: clientId, session: opts.sessionKey, section: section, answers: answers,
+        };
+
+        return withStores(['outbox', 'answers'], 'readwrite', function (tx) {
+            tx.objectStore('outbox').put(entry);
+            var store = tx.objectStore('answers');
+            Object.keys(answers).forEach(function (qid) {
+                store.put({ id: opts.sessionKey + ':' + qid, session: opts.sessionKey, question: qid, value: answers[qid] });
+            });
+        }).catch(function () {
+            memory.outbox.push(entry);
+            Object.keys(answers).forEach(function (qid) { memory.answers[qid] = answers[qid]; });
+        });
+    }
+
+    function pending() {
+        return withStores(['outbox'], 'readonly', function (tx) {
+            return bySession(tx, 'outbox', opts.sessionKey);
+        }).catch(function () {
+            return memory.outbox.slice();
+        });
+    }
+
+    /* `acked` maps client id -> highest seq the server has applied for it
+       (true acks every batch).  Anything else stays queued. */
+    function ack(acked) {
+        function applied(b) {
+            var client = b.client || '';
+            return acked === true || (acked.hasOwnProperty(client) && b.seq <= acked[client]);
+        }
+        memory.outbox = memory.outbox.filter(function (b) { return !applied(b); });
+        return withStores(['outbox'], 'readwrite', function (tx) {
+            tx.objectStore('outbox').index('session').openCursor(IDBKeyRange.only(opts.sessionKey)).onsuccess = function (e) {
+                var cursor = e.target.result;
+                if (!cursor) return;
+                if (applied(cursor.value)) cursor.delete();
+                cursor.continue();
+            };
+        }).catch(function () {});
+    }
+
+    /* Drop everything belonging to other (finished or abandoned) attempts. */
+    function prune() {
+        return withStores(['outbox', 'answers'], 'readwrite', function (tx) {
+            ['outbox', 'answers'].forEach(function (name) {
+                tx.objectStore(name).openCursor().onsuccess = function (e) {
+                    var cursor = e.target.result;
+                    if (!cursor) return;
+                    if (cursor.value.session !== opts.sessionKey) cursor.delete();
+                    cursor.continue();
+                };
+            });
+        }).catch(function () {});
+    }
+
+    function restore(callback) {
+        return withStores(['answers'], 'readonly', function (tx) {
+            return bySession(tx, 'answers', opts.sessionKey);
+        }).then(function (rows) {
+            var answers = {};
+            rows.forEach(function (row) { answers[row.question] = row.value; });
+            return answers;
+        }).catch(function () {
+            return memory.answers;
+        }).then(callback);
+    }
+
+    /* ── Sync ── */
+    function sendBatches(batches) {
+        return fetch(opts.syncUrl, {
+            method:      'POST',
+            credentials: 'same-origin',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken':  getCookie('csrftoken'),
+            },
+            body: JSON.stringify({
+                batches: batches.map(function (b) {
+                    return { client: b.client || '', seq: b.seq, section: b.section, answers: b.answers };
+                }),
+            }),
+        }).then(function (res) {
+            if (res.status === 404 || res.status === 410) {
+                /* Attempt already submitted or past its deadline — nothing left to sync. */
+                return ack(true);
+            }
+            if (res.status === 423) {
+                var err = new Error('Paused');
+                err.paused = true;
+                throw err;
+            }
+            if (!res.ok) throw new Error('HTTP ' + res.status);
+            return res.json().then(function (data) { return ack(data.acked || {}); });
+        });
+    }
+
+    function flushOnce() {
+        return pending().then(function (batches) {
+            if (!batches.length) return 0;
+            if (!navigator.onLine) { status('offline', batches.length); return batches.length; }
+
+            status('saving', batches.length);
+            batches.sort(function (a, b) { return a.seq - b.seq; });
+            return sendBatches(batches.slice(0, BATCH_LIMIT)).then(function () {
+                return batches.length > BATCH_LIMIT ? flushOnce() : pending().then(function (rest) {
+                    return rest.length;
+                });
+            });
+        });
+    }
+
+    function flush() {
+        if (flushing) return flushing;
+        flushing = flushOnce().then(function (left) {
+            if (!left) status('saved', 0);
+            return left;
+        }).catch(function (err) {
+            return pending().then(function (rest) {
+                status(err && err.paused ? 'paused' : navigator.onLine ? 'error' : 'offline', rest.length);
+                return rest.length;
+            });
+        }).then(function (left) {
+            flushing = null;
+            return left;
+        });
+        return flushing;
+    }
+
+    /* ── Service worker ── */
+    function registerWorker() {
+        if (!('serviceWorker' in navigator) || !opts.workerUrl) return;
+
+        navigator.serviceWorker.register(opts.workerUrl).then(function () {
+            return navigator.serviceWorker.ready;
+        }).then(function (reg) {
+            var assets = [].slice.call(
+                document.querySelectorAll('link[rel="stylesheet"][href], script[src]')
+            ).map(function (el) { return el.href || el.src; });
+
+            reg.active.postMessage({
+                type:     'precache',
+                session:  opts.sessionKey,
+                paperUrl: opts.paperUrl,
+                assets:   assets,
+            });
+        }).catch(function () { /* offline mode is an enhancement — the exam still works without it */ });
+    }
+
+    /* ── Public API ── */
+    function init(options) {
+        opts = options;
+        prune();
+        registerWorker();
+
+        global.addEventListener('online',  flush);
+        global.addEventListener('offline', function () {
+            pending().then(function (b) { status('offline', b.length); });
+        });
+        setInterval(flush, SYNC_INTERVAL);
+        flush();
+    }
+
+    global.ExamOffline = { init: init, record: record, restore: restore, flush: flush, pending: pending };
+
+}(window));
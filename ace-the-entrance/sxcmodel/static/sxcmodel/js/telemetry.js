@@ -0,0 +1,164 @@
+/* ============================================================
+   sxcmodel/telemetry.js  –  Per-question timing for the exam page
+   Usage:
+     ExamTelemetry.init({
+       sessionKey: '…',
+       url:        '/sxcmodel/exam/<key>/telemetry/',
+       initial:    { '<question_id>': seconds, … },  // totals the server already has
+       cards:      '.exam-q-card',                    // one per question, id="qcard-<id>"
+     });
+
+     ExamTelemetry.totals();      // { '<question_id>': seconds } for the section form
+     ExamTelemetry.send(true);    // flush via sendBeacon (page hide)
+
+   The active question is whichever card was last focused, clicked or
+   answered — or, while scrolling, the card crossing the middle of the
+   viewport.  Time accrues to it only while the tab is visible.  Totals
+   are cumulative and kept in localStorage, so reloads, offline sections
+   and replayed batches never double-count.
+   ============================================================ */
+
+(function (global) {
+    'use strict';
+
+    var STORE_PREFIX  = 'sxcmodel-timing-';
+    var SEND_INTERVAL = 15000;
+
+    var opts     = null;
+    var storeKey = null;
+    var totalsMs = {};     // question id → cumulative milliseconds
+    var dirty    = {};     // question ids changed since the last batch
+    var active   = null;
+    var since    = null;   // when `active` last started accruing; null while hidden
+    var stopped  = false;
+
+    /* ── Persistence ── */
+    function load() {
+        try { totalsMs = JSON.parse(localStorage.getItem(storeKey)) || {}; } catch (e) { totalsMs = {}; }
+
+        Object.keys(opts.initial || {}).forEach(function (qid) {
+            totalsMs[qid] = Math.max(totalsMs[qid] || 0, opts.initial[qid] * 1000);
+        });
+        /* Anything this device measured beyond what the server has — e.g. a
+           section answered offline — goes out with the first batch. */
+        Object.keys(totalsMs).forEach(function (qid) {
+            if (!opts.initial || totalsMs[qid] > (opts.initial[qid] || 0) * 1000) dirty[qid] = true;
+        });
+    }
+
+    function persist() {
+        try { localStorage.setItem(storeKey, JSON.stringify(totalsMs)); } catch (e) {}
+    }
+
+    /* Drop totals belonging to other (finished or abandoned) attempts. */
+    function prune() {
+        try {
+            for (var i = localStorage.length - 1; i >= 0; i--) {
+                var key = localStorage.key(i);
+                if (key && key.indexOf(STORE_PREFIX) === 0 && key !== storeKey) localStorage.removeItem(key);
+            }
+        } catch (e) {}
+    }
+
+    /* ── Accounting ── */
+    function settle() {
+        var now = Date.now();
+        if (active && since !== null) {
+            totalsMs[active] = (totalsMs[active] || 0) + (now - since);
+            dirty[active] = true;
+        }
+        since = document.hidden ? null : now;
+    }
+
+    function activate(qid) {
+        if (!qid || qid === active) return;
+        settle();
+        active = qid;
+    }
+
+    function questionOf(el) {
+        var card = el && el.closest ? el.closest(opts.cards) : null;
+        return card ? card.id.replace('qcard-', '') : null;
+    }
+
+    function seconds(ms) {
+        return Math.round(ms / 1000);
+    }
+
+    function totals() {
+        settle();
+        persist();
+        var out = {};
+        Object.keys(totalsMs).forEach(function (qid) { out[qid] = seconds(totalsMs[qid]); });
+        return out;
+    }
+
+    /* ── Sending ── */
+    function send(beacon) {
+        settle();
+        persist();
+
+        var ids = Object.keys(dirty);
+        if (stopped || !ids.length || !navigator.onLine) return;
+
+        var batch = {};
+        ids.forEach(function (qid) { batch[qid] = seconds(totalsMs[qid]); });
+        dirty = {};
+
+        var body = JSON.stringify({ t: batch });
+        if (beacon && navigator.sendBeacon) {
+            navigator.sendBeacon(opts.url, new Blob([body], { type: 'application/json' }));
+            return;
+        }
+
+        fetch(opts.url, {
+            method:      'POST',
+            credentials: 'same-origin',
+            keepalive:   true,
+            headers:     { 'Content-Type': 'application/json' },
+            body:        body,
+        }).then(function (res) {
+            /* Attempt submitted or out of time — nothing more to report. */
+            if (res.status === 404 || res.status === 410) { stopped = true; return; }
+            /* 423 (paused) falls through: totals are kept and resent after the resume. */
+            if (!res.ok) throw new Error('HTTP ' + res.status);
+        }).catch(function () {
+            ids.forEach(function (qid) { dirty[qid] = true; });   // cumulative, so just resend later
+        });
+    }
+
+    /* ── Public API ── */
+    function init(options) {
+        opts     = options;
+        storeKey = STORE_PREFIX + opts.sessionKey;
+        prune();
+        load();
+
+        var first = document.querySelector(opts.cards);
+        activate(questionOf(first));
+
+        ['focusin', 'pointerdown', 'change'].forEach(function (type) {
+            document.addEventListener(type, function (e) { activate(questionOf(e.target)); }, true);
+        });
+
+        if ('IntersectionObserver' in global) {
+            var observer = new IntersectionObserver(function (entries) {
+                entries.forEach(function (entry) {
+                    if (entry.isIntersecting) activate(questionOf(entry.target));
+                });
+            }, { rootMargin: '-45% 0px -45% 0px' });   // a thin band across the middle of the viewport
+            document.querySelectorAll(opts.cards).forEach(function (card) { observer.observe(card); });
+        }
+
+        document.addEventListener('visibilitychange', function () {
+            settle();
+            if (document.hidden) send(true);
+        });
+        global.addEventListener('pagehide', function () { send(true); });
+        global.addEventListener('online', function () { send(false); });
+        setInterval(function () { send(false); }, SEND_INTERVAL);
+    }
+
+    global.ExamTelemetry = { init: init, totals: totals, send: send };
+
+}(window));
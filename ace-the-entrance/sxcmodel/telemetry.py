@@ -0,0 +1,203 @@
+# sxcmodel/telemetry.py
+"""
+Buffered ingestion of per-question timing from the exam page.
+
+The exam JS keeps a running total of how long each question has been the
+active one and posts only the totals that changed since its last batch.
+A request never touches the database: the batch is appended to a Redis
+stream (one XADD) or, when the cache is not Redis, to a per-process buffer.
+`flush_exam_telemetry` drains the stream on a cron tick and writes every
+buffered total in a handful of bulk queries, so DB write load depends on
+the flush interval — not on how many students are sitting the exam.  The
+per-process buffer can't be reached from the cron process, so it flushes
+itself on a timer and when the process exits.
+
+Totals are cumulative, so replays and reordering are harmless: a stored
+time_taken_seconds is only ever raised, never lowered.
+"""
+import atexit
+import json
+import logging
+import threading
+
+from django.db import connections
+
+from config.redis_client import redis_client
+
+from .constants import MAX_TIME_SECONDS
+from .models import QuizAttempt, UserAnswer
+
+
+# ── Constants ─────────────────────────────────────────────────────────────────
+
+STREAM_KEY            = 'sxcmodel:telemetry'
+STREAM_MAX_LEN        = 1_000_000     # approximate cap, bounds Redis memory if the flusher stalls
+FLUSH_BATCH           = 5000          # stream entries drained per round
+MEMORY_FLUSH_SECONDS  = 30            # per-process buffer is written this long after its first batch
+
+logger = logging.getLogger(__name__)
+
+
+class _MemoryBuffer:
+    """
+    Per-process fallback: totals coalesced by key.  The first batch after a
+    flush starts a timer that writes the buffer out, so an idle process
+    never sits on data; exit flushes whatever is left.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.totals = {}
+        self.timer = None
+
+    def add(self, attempt_id, timings):
+        with self.lock:
+            for q_id, seconds in timings.items():
+                key = (attempt_id, q_id)
+                if seconds > self.totals.get(key, -1):
+                    self.totals[key] = seconds
+            if self.timer is None:
+                self.timer = threading.Timer(MEMORY_FLUSH_SECONDS, self.flush_from_timer)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def take(self):
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            due, self.totals = self.totals, {}
+        return due
+
+    def flush(self):
+        due = self.take()
+        try:
+            write_totals(due)
+        except Exception:
+            logger.exception('Dropped %d buffered exam timing(s)', len(due))
+
+    def flush_from_timer(self):
+        try:
+            self.flush()
+        finally:
+            connections.close_all()   # this thread's connections only
+
+
+_memory = _MemoryBuffer()
+atexit.register(_memory.flush)
+
+
+# ── Public API ────────────────────────────────────────────────────────────────
+
+def clean_timings(attempt, raw):
+    """
+    Validate a client { "<question_id>": seconds } map: ids must be on this
+    attempt's paper, values are clamped to [0, MAX_TIME_SECONDS].
+    """
+    if not isinstance(raw, dict):
+        return {}
+    paper = {q_id for section in attempt.question_sequence for q_id in section}
+    timings = {}
+    for q_id_str, seconds in raw.items():
+        try:
+            q_id = int(q_id_str)
+        except (TypeError, ValueError):
+            continue
+        if q_id in paper and isinstance(seconds, (int, float)):
+            timings[q_id] = min(max(int(seconds), 0), MAX_TIME_SECONDS)
+    return timings
+
+
+def record(attempt_id, timings):
+    """
+    Buffer one batch of { question_id: cumulative_seconds } for an attempt.
+    Caller is responsible for validating ids and clamping values.
+    """
+    if not timings:
+        return
+
+    client = redis_client()
+    if client:
+        client.xadd(
+            STREAM_KEY,
+            {'a': attempt_id, 't': json.dumps(timings, separators=(',', ':'))},
+            maxlen=STREAM_MAX_LEN,
+            approximate=True,
+        )
+        return
+
+    _memory.add(attempt_id, timings)
+
+
+def drain(batch=FLUSH_BATCH):
+    """
+    Move everything currently in the Redis stream into UserAnswer.
+    Returns the number of stream entries processed.
+    """
+    client = redis_client()
+    if not client:
+        return 0
+
+    processed = 0
+    while True:
+        entries = client.xrange(STREAM_KEY, min='-', max='+', count=batch)
+        if not entries:
+            return processed
+
+        totals = {}
+        for _entry_id, fields in entries:
+            # A malformed entry is skipped here and deleted with the rest of
+            # the round, so it can't wedge every later run.
+            try:
+                attempt_id = int(fields[b'a'])
+                timings = {
+                    int(q_id): int(seconds)
+                    for q_id, seconds in json.loads(fields[b't']).items()
+                }
+            except (KeyError, ValueError, TypeError, AttributeError):
+                continue
+            for q_id, seconds in timings.items():
+                key = (attempt_id, q_id)
+                if seconds > totals.get(key, -1):
+                    totals[key] = seconds
+
+        write_totals(totals)
+        client.xdel(STREAM_KEY, *[entry_id for entry_id, _ in entries])
+        processed += len(entries)
+
+
+def write_totals(totals):
+    """
+    Apply { (attempt_id, question_id): seconds } to UserAnswer.time_taken_seconds
+    in three queries: read the existing rows, raise the ones that grew, and
+    create rows for questions that have been looked at but not answered yet.
+    """
+    if not totals:
+        return
+
+    attempt_ids = {a_id for a_id, _ in totals}
+    question_ids = {q_id for _, q_id in totals}
+
+    seen, changed = set(), []
+    for ua in (UserAnswer.objects
+               .filter(attempt_id__in=attempt_ids, question_id__in=question_ids)
+               .only('id', 'attempt_id', 'question_id', 'time_taken_seconds')):
+        key = (ua.attempt_id, ua.question_id)
+        if key not in totals:
+            continue
+        seen.add(key)
+        if totals[key] > ua.time_taken_seconds:
+            ua.time_taken_seconds = totals[key]
+            changed.append(ua)
+    UserAnswer.objects.bulk_update(changed, ['time_taken_seconds'], batch_size=500)
+
+    live = set(QuizAttempt.objects.filter(id__in=attempt_ids).values_list('id', flat=True))
+    UserAnswer.objects.bulk_create(
+        [
+            UserAnswer(attempt_id=a_id, question_id=q_id, time_taken_seconds=seconds)
+            for (a_id, q_id), seconds in totals.items()
+            if (a_id, q_id) not in seen and a_id in live
+        ],
+        ignore_conflicts=True,
+        batch_size=500,
+    )
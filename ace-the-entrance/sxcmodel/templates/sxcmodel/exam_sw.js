@@ -0,0 +1,126 @@
+/* ============================================================
+   sxcmodel/exam_sw.js  –  Service worker for offline exam mode
+   Served from /sxcmodel/exam-sw.js (not /static/) so its scope
+   covers the exam pages.  Registered by sxcmodel/js/offline.js.
+
+   • On a 'precache' message: fetch the attempt's paper manifest and
+     store every section page + question image in one cache per attempt.
+   • Section pages: network-first, cached copy when offline.
+   • Everything else: cached copy if we have one, else network.
+   • POSTs are never touched — answers travel through the IndexedDB
+     outbox and the /sync/ endpoint instead.
+   ============================================================ */
+
+'use strict';
+
+var CACHE_PREFIX = 'sxcmodel-exam-';
+var SECTION_PATH = /\/exam\/([0-9a-f-]+)\/section\/\d+\/$/;
+
+self.addEventListener('install', function () {
+    self.skipWaiting();
+});
+
+self.addEventListener('activate', function (event) {
+    event.waitUntil(self.clients.claim());
+});
+
+/* ── Cache management ── */
+function dropCaches(keep) {
+    return caches.keys().then(function (names) {
+        return Promise.all(names.filter(function (name) {
+            return name.indexOf(CACHE_PREFIX) === 0 && name !== keep;
+        }).map(function (name) {
+            return caches.delete(name);
+        }));
+    });
+}
+
+function store(cache, url, init) {
+    return fetch(url, init).then(function (res) {
+        if (res.ok && !res.redirected) return cache.put(url, res);
+    }).catch(function () { /* best effort — a missing image must not abort the rest */ });
+}
+
+function precache(msg) {
+    var name = CACHE_PREFIX + msg.session;
+
+    return dropCaches(name).then(function () {
+        return caches.open(name);
+    }).then(function (cache) {
+        var assets = (msg.assets || []).map(function (url) {
+            return store(cache, url, { credentials: 'same-origin' });
+        });
+
+        return Promise.all(assets).then(function () {
+            return cache.match(msg.paperUrl);
+        }).then(function (hit) {
+            if (hit) return;   // already warmed on an earlier section
+
+            return fetch(msg.paperUrl, { credentials: 'same-origin' }).then(function (res) {
+                if (!res.ok) return;
+                return res.clone().json().then(function (paper) {
+                    var pages = paper.sections.map(function (url) {
+                        return store(cache, url, {
+                            credentials: 'same-origin',
+                            headers: { 'X-Exam-Precache': '1' },
+                        });
+                    });
+                    var images = paper.images.map(function (url) {
+                        return store(cache, url, { credentials: 'same-origin' });
+                    });
+                    return Promise.all(pages.concat(images)).then(function () {
+                        return cache.put(msg.paperUrl, res);
+                    });
+                });
+            });
+        });
+    }).catch(function () {});
+}
+
+self.addEventListener('message', function (event) {
+    var msg = event.data || {};
+    if (msg.type === 'precache') event.waitUntil(precache(msg));
+    if (msg.type === 'clear')    event.waitUntil(dropCaches(null));
+});
+
+/* ── Fetch strategies ── */
+function networkFirst(request, session) {
+    return fetch(request).then(function (res) {
+        if (res.ok && !res.redirected) {
+            var copy = res.clone();
+            caches.open(CACHE_PREFIX + session).then(function (cache) {
+                cache.put(request.url, copy);
+            });
+        }
+        return res;
+    }).catch(function () {
+        return caches.match(request.url, { ignoreVary: true }).then(function (hit) {
+            return hit || new Response('You are offline and this section has not been saved yet.', {
+                status: 503,
+                headers: { 'Content-Type': 'text/plain; charset=utf-8' },
+            });
+        });
+    });
+}
+
+function cacheFirst(request) {
+    return caches.match(request, { ignoreVary: true }).then(function (hit) {
+        return hit || fetch(request);
+    });
+}
+
+self.addEventListener('fetch', function (event) {
+    var request = event.request;
+    if (request.method !== 'GET') return;
+
+    var url = new URL(request.url);
+    if (url.origin !== self.location.origin) return;
+
+    if (request.mode === 'navigate') {
+        var match = url.pathname.match(SECTION_PATH);
+        if (match) event.respondWith(networkFirst(request, match[1]));
+        return;
+    }
+
+    event.respondWith(cacheFirst(request));
+});
@@ -1,3 +1,370 @@
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib import admin
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from sxcmodel import telemetry
+from sxcmodel.admin import QuizAttemptAdmin
+from sxcmodel.constants import MAX_TIME_SECONDS, SUBMIT_GRACE_SECONDS
+from sxcmodel.models import Question, QuizAttempt, SubjectResult, SubjectRollup, UserAnswer
+from sxcmodel.utils import compute_final_grade, compute_raw_score, final_grade_expression, raw_score_expression
+
+
+def make_question(subject='PHY', correct=1):
+    return Question.objects.create(
+        subject=subject, text='Question', correct_option=correct,
+        option_1='a', option_2='b', option_3='c', option_4='d',
+    )
+
+
+class ExamTestCase(TestCase):
+    """A logged-in examinee with a fresh two-section attempt."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='examinee', email='examinee@example.com', password='pass', is_active=True,
+        )
+        self.client.force_login(self.user)
+        self.questions = [make_question('PHY'), make_question('PHY'), make_question('CHE', correct=2)]
+        self.attempt = QuizAttempt.objects.create(
+            user=self.user,
+            question_sequence=[[self.questions[0].id, self.questions[1].id], [self.questions[2].id]],
+            deadline=timezone.now() + timedelta(hours=1),
+        )
+
+    def url(self, name, **kwargs):
+        return reverse(f'sxcmodel:{name}', kwargs={'session_key': self.attempt.session_key, **kwargs})
+
+    def post_json(self, name, data):
+        return self.client.post(self.url(name), json.dumps(data), content_type='application/json')
+
+
+# ---------------------------------------------------------------------------
+# Offline sync
+# ---------------------------------------------------------------------------
+
+class SyncProgressTests(ExamTestCase):
+    def answers(self):
+        return dict(UserAnswer.objects.filter(attempt=self.attempt).values_list('question_id', 'selected_option'))
+
+    def sync(self, *batches):
+        return self.post_json('sync_progress', {'batches': list(batches)})
+
+    def test_replayed_batches_are_acknowledged_not_reapplied(self):
+        q1, q2, q3 = (str(q.id) for q in self.questions)
+        response = self.sync(
+            {'client': 'a', 'seq': 20, 'section': 1, 'answers': {q3: 2}},
+            {'client': 'a', 'seq': 10, 'section': 0, 'answers': {q1: 1, q2: 3}},
+        )
+        self.assertEqual(response.json(), {'status': 'ok', 'acked': {'a': 20}})
+        self.assertEqual(self.answers(), {self.questions[0].id: 1, self.questions[1].id: 3, self.questions[2].id: 2})
+
+        # The client retries a batch it never saw acknowledged, now stale.
+        response = self.sync({'client': 'a', 'seq': 10, 'section': 0, 'answers': {q1: 4}})
+        self.assertEqual(response.json()['acked'], {'a': 20})
+        self.assertEqual(self.answers()[self.questions[0].id], 1)
+
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.sync_seqs, {'a': 20})
+        self.assertEqual(self.attempt.current_section_index, 1)
+
+    def test_lower_seq_from_another_client_is_applied(self):
+        # A second device (or one whose clock runs behind) starts well below
+        # the first client's seqs; its batches are new, not replays.
+        q1, q2 = str(self.questions[0].id), str(self.questions[1].id)
+        self.sync({'client': 'laptop', 'seq': 1_700_000_000_000, 'answers': {q1: 1}})
+
+        response = self.sync({'client': 'phone', 'seq': 5, 'answers': {q1: 3, q2: 4}})
+        self.assertEqual(response.json()['acked'], {'phone': 5})
+        self.assertEqual(self.answers(), {self.questions[0].id: 3, self.questions[1].id: 4})
+
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.sync_seqs, {'laptop': 1_700_000_000_000, 'phone': 5})
+
+    def test_batches_without_a_client_id_share_one_slot(self):
+        q1 = str(self.questions[0].id)
+        self.sync({'seq': 7, 'answers': {q1: 1}})
+        response = self.sync({'seq': 6, 'answers': {q1: 2}})
+        self.assertEqual(response.json()['acked'], {'': 7})
+        self.assertEqual(self.answers()[self.questions[0].id], 1)
+
+    def test_later_batches_win_within_one_request(self):
+        q1 = str(self.questions[0].id)
+        self.sync({'client': 'a', 'seq': 2, 'answers': {q1: 3}}, {'client': 'a', 'seq': 1, 'answers': {q1: 2}})
+        self.assertEqual(self.answers()[self.questions[0].id], 3)
+
+    def test_ignores_questions_off_the_paper_and_bad_batches(self):
+        stranger = make_question()
+        response = self.sync(
+            {'client': 'a', 'seq': 'x'}, {'client': 'a', 'seq': -1}, {'client': ['a'], 'seq': 3},
+            {'client': 'a', 'seq': 5, 'answers': {str(stranger.id): 1}},
+        )
+        self.assertEqual(response.json()['acked'], {'a': 5})
+        self.assertEqual(self.answers(), {})
+
+        self.assertEqual(self.post_json('sync_progress', {'batches': {}}).status_code, 400)
+
+
+# ---------------------------------------------------------------------------
+# Deadline and pause
+# ---------------------------------------------------------------------------
+
+class DeadlineTests(ExamTestCase):
+    def expire(self, seconds_ago):
+        QuizAttempt.objects.filter(pk=self.attempt.pk).update(
+            deadline=timezone.now() - timedelta(seconds=seconds_ago)
+        )
+
+    def test_writes_within_the_grace_period_are_accepted(self):
+        self.expire(SUBMIT_GRACE_SECONDS // 2)
+        response = self.post_json('save_progress', {'answers': {str(self.questions[0].id): 1}})
+        self.assertEqual(response.status_code, 200)
+
+    def test_writes_after_the_grace_period_are_refused(self):
+        self.expire(SUBMIT_GRACE_SECONDS + 5)
+        for name, data in [
+            ('save_progress', {'answers': {str(self.questions[0].id): 1}}),
+            ('sync_progress', {'batches': [{'seq': 1, 'answers': {str(self.questions[0].id): 1}}]}),
+            ('telemetry', {'t': {str(self.questions[0].id): 30}}),
+        ]:
+            self.assertEqual(self.post_json(name, data).status_code, 410, name)
+        self.assertFalse(UserAnswer.objects.filter(attempt=self.attempt).exists())
+
+        response = self.client.post(self.url('section', section_index=0))
+        self.assertRedirects(response, self.url('submit'), fetch_redirect_response=False)
+
+    def test_expired_attempt_is_graded_on_the_server(self):
+        UserAnswer.objects.create(attempt=self.attempt, question=self.questions[0], selected_option=1)
+        UserAnswer.objects.create(attempt=self.attempt, question=self.questions[1], selected_option=2)
+        self.expire(SUBMIT_GRACE_SECONDS + 5)
+
+        self.client.post(self.url('submit'))
+        self.attempt.refresh_from_db()
+        self.assertTrue(self.attempt.is_completed)
+        self.assertEqual(
+            (self.attempt.correct_count, self.attempt.incorrect_count, self.attempt.unattempted_count),
+            (1, 1, 1),
+        )
+        self.assertEqual(self.attempt.raw_score, compute_raw_score(1, 1))
+        self.assertEqual(
+            self.attempt.final_grade,
+            compute_final_grade(1, 1, 3, self.attempt.total_time_seconds),
+        )
+
+    def test_graded_time_is_capped_at_the_exam_length(self):
+        QuizAttempt.objects.filter(pk=self.attempt.pk).update(
+            start_time=timezone.now() - timedelta(seconds=MAX_TIME_SECONDS + 600),
+            deadline=timezone.now() - timedelta(seconds=SUBMIT_GRACE_SECONDS + 5),
+        )
+        self.client.post(self.url('submit'))
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.total_time_seconds, MAX_TIME_SECONDS)
+        self.assertEqual(self.attempt.final_grade, compute_final_grade(0, 0, 3, MAX_TIME_SECONDS))
+
+    def test_admin_does_not_pause_expired_attempts(self):
+        self.expire(60)
+        model_admin = QuizAttemptAdmin(QuizAttempt, admin.site)
+        with mock.patch.object(model_admin, 'message_user'):
+            model_admin.pause_attempts(None, QuizAttempt.objects.all())
+        self.attempt.refresh_from_db()
+        self.assertFalse(self.attempt.is_paused)
+
+
+class PausedAttemptTests(ExamTestCase):
+    def setUp(self):
+        super().setUp()
+        self.attempt.pause()
+
+    def test_json_writes_are_refused_while_paused(self):
+        answers = {str(self.questions[0].id): 1}
+        for name, data in [
+            ('save_progress', {'answers': answers}),
+            ('sync_progress', {'batches': [{'seq': 1, 'section': 0, 'answers': answers}]}),
+            ('telemetry', {'t': {str(self.questions[0].id): 30}}),
+        ]:
+            response = self.post_json(name, data)
+            self.assertEqual(response.status_code, 423, name)
+            self.assertEqual(response.json(), {'error': 'Paused'})
+
+        self.assertFalse(UserAnswer.objects.filter(attempt=self.attempt).exists())
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.sync_seqs, {})
+
+    def test_section_post_is_not_saved_while_paused(self):
+        response = self.client.post(
+            self.url('section', section_index=0), {f'answer_{self.questions[0].id}': '1'},
+        )
+        self.assertRedirects(response, self.url('section', section_index=0))
+        self.assertFalse(UserAnswer.objects.filter(attempt=self.attempt).exists())
+
+    def test_submit_waits_for_the_resume(self):
+        self.client.post(self.url('submit'))
+        self.attempt.refresh_from_db()
+        self.assertFalse(self.attempt.is_completed)
+
+    def test_resume_pushes_the_deadline_back(self):
+        deadline = self.attempt.deadline
+        self.attempt.resume(now=self.attempt.paused_at + timedelta(minutes=10))
+        self.assertEqual(self.attempt.deadline, deadline + timedelta(minutes=10))
+        self.assertEqual(self.attempt.paused_seconds, 600)
+
+        response = self.post_json('save_progress', {'answers': {str(self.questions[0].id): 1}})
+        self.assertEqual(response.status_code, 200)
+
+
+# ---------------------------------------------------------------------------
+# Telemetry
+# ---------------------------------------------------------------------------
+
+class FakeStream:
+    """Just enough of a Redis client for telemetry.drain()."""
+
+    def __init__(self, *entries):
+        self.entries = [(str(i).encode(), fields) for i, fields in enumerate(entries)]
+
+    def xrange(self, key, min, max, count):
+        return self.entries[:count]
+
+    def xdel(self, key, *ids):
+        self.entries = [e for e in self.entries if e[0] not in ids]
+
+
+class TelemetryTests(ExamTestCase):
+    def times(self):
+        return dict(UserAnswer.objects.filter(attempt=self.attempt).values_list('question_id', 'time_taken_seconds'))
+
+    def test_write_totals_only_raises_and_creates_viewed_rows(self):
+        q1, q2, q3 = self.questions
+        UserAnswer.objects.create(attempt=self.attempt, question=q1, selected_option=1, time_taken_seconds=30)
+        UserAnswer.objects.create(attempt=self.attempt, question=q2, selected_option=2, time_taken_seconds=40)
+
+        telemetry.write_totals({
+            (self.attempt.pk, q1.id): 50,       # grew
+            (self.attempt.pk, q2.id): 10,       # stale: never lowered
+            (self.attempt.pk, q3.id): 5,        # viewed, not answered yet
+            (self.attempt.pk + 1, q1.id): 99,   # no such attempt
+        })
+        self.assertEqual(self.times(), {q1.id: 50, q2.id: 40, q3.id: 5})
+        self.assertIsNone(UserAnswer.objects.get(attempt=self.attempt, question=q3).selected_option)
+        self.assertEqual(UserAnswer.objects.count(), 3)
+
+    def test_drain_skips_malformed_entries(self):
+        q1, q2 = (str(q.id) for q in self.questions[:2])
+        a = str(self.attempt.pk).encode()
+        stream = FakeStream(
+            {b'a': a, b't': json.dumps({q1: 20, q2: 5}).encode()},
+            {b't': b'{}'},                                  # no attempt
+            {b'a': a, b't': b'not json'},
+            {b'a': a, b't': b'[1, 2]'},
+            {b'a': a, b't': b'{"x": 3}'},                   # bad question id
+            {b'a': a, b't': json.dumps({q1: 'soon'}).encode()},
+            {b'a': a, b't': json.dumps({q1: 35}).encode()},
+        )
+        with mock.patch('sxcmodel.telemetry.redis_client', return_value=stream):
+            self.assertEqual(telemetry.drain(batch=3), 7)
+
+        self.assertEqual(stream.entries, [])
+        self.assertEqual(self.times(), {self.questions[0].id: 35, self.questions[1].id: 5})
+
+    def test_memory_buffer_coalesces_until_flushed(self):
+        q1 = self.questions[0].id
+        telemetry.record(self.attempt.pk, {q1: 10})
+        telemetry.record(self.attempt.pk, {q1: 25})
+        self.addCleanup(telemetry._memory.take)
+        self.assertIsNotNone(telemetry._memory.timer)
+        self.assertEqual(self.times(), {})
+
+        telemetry._memory.flush()
+        self.assertIsNone(telemetry._memory.timer)
+        self.assertEqual(self.times(), {q1: 25})
+
+
+# ---------------------------------------------------------------------------
+# Scoring
+# ---------------------------------------------------------------------------
+
+class RescoreExpressionTests(ExamTestCase):
+    def test_sql_matches_compute_final_grade(self):
+        # (correct, incorrect, unattempted, seconds): typical papers, a
+        # negative raw score, a perfect one, overtime and an empty paper.
+        cases = [
+            (60, 20, 40, 3600), (13, 7, 0, 1234), (0, 120, 0, 60), (120, 0, 0, 0),
+            (45, 30, 45, MAX_TIME_SECONDS + 500), (1, 0, 2, 17), (0, 0, 0, 100),
+        ]
+        attempts = [
+            QuizAttempt.objects.create(
+                user=self.user, deadline=timezone.now(), is_completed=True,
+                correct_count=c, incorrect_count=i, unattempted_count=u, total_time_seconds=t,
+            )
+            for c, i, u, t in cases
+        ]
+        QuizAttempt.objects.filter(pk__in=[a.pk for a in attempts]).update(
+            raw_score=raw_score_expression(), final_grade=final_grade_expression(),
+        )
+
+        for attempt, (c, i, u, t) in zip(attempts, cases):
+            attempt.refresh_from_db()
+            self.assertAlmostEqual(attempt.raw_score, compute_raw_score(c, i))
+            self.assertAlmostEqual(attempt.final_grade, compute_final_grade(c, i, c + i + u, t), places=6)
+
+
+class SubjectResultTests(ExamTestCase):
+    def setUp(self):
+        super().setUp()
+        rival = User.objects.create_user(
+            username='rival', email='rival@example.com', password='pass', is_active=True,
+        )
+        self.rival_attempt = QuizAttempt.objects.create(
+            user=rival, question_sequence=self.attempt.question_sequence,
+            deadline=timezone.now() + timedelta(hours=1),
+        )
+        # PHY: one right, one wrong; CHE left blank.
+        self.submit(self.attempt, [(1, 30), (2, 20), (None, 0)])
+        # Everything right.
+        self.submit(self.rival_attempt, [(1, 10), (1, 10), (2, 40)])
+
+    def submit(self, attempt, picks):
+        """Answer attempt's paper with (option, seconds) per question and submit it."""
+        for question, (option, seconds) in zip(self.questions, picks):
+            UserAnswer.objects.create(
+                attempt=attempt, question=question, selected_option=option, time_taken_seconds=seconds,
+            )
+        self.client.force_login(attempt.user)
+        self.client.post(reverse('sxcmodel:submit', kwargs={'session_key': attempt.session_key}))
+
+    def test_per_subject_rows(self):
+        rows = {
+            (r.attempt_id, r.subject): (r.correct_count, r.incorrect_count, r.unattempted_count, r.raw_score, r.time_seconds)
+            for r in SubjectResult.objects.all()
+        }
+        self.assertEqual(rows, {
+            (self.attempt.id, 'PHY'):       (1, 1, 0, 0.75, 50),
+            (self.attempt.id, 'CHE'):       (0, 0, 1, 0.0, 0),
+            (self.rival_attempt.id, 'PHY'): (2, 0, 0, 2.0, 20),
+            (self.rival_attempt.id, 'CHE'): (1, 0, 0, 1.0, 40),
+        })
+
+    def test_rollups_sum_both_submissions(self):
+        rollups = {
+            r.subject: (r.attempt_count, r.correct_sum, r.incorrect_sum, r.score_sum, r.score_sq_sum, r.time_sum, r.time_sq_sum)
+            for r in SubjectRollup.objects.all()
+        }
+        self.assertEqual(rollups, {
+            'PHY': (2, 3, 1, 2.75, 0.75 ** 2 + 2.0 ** 2, 70, 50 ** 2 + 20 ** 2),
+            'CHE': (2, 1, 0, 1.0, 1.0, 40, 40 ** 2),
+        })
 
-# Create your tests here.
+    def test_results_page_compares_with_everyone(self):
+        response = self.client.get(reverse('sxcmodel:results', kwargs={'session_key': self.rival_attempt.session_key}))
+        stats = {
+            s['result'].subject: (s['avg_score'], s['avg_time'], s['z_score'], s['peers'])
+            for s in response.context['subject_stats']
+        }
+        # PHY scores 0.75 and 2.0: mean 1.375, std 0.625.  CHE 0 and 1: mean 0.5, std 0.5.
+        self.assertEqual(stats, {'PHY': (1.375, 35, 1.0, 2), 'CHE': (0.5, 20, 1.0, 2)})
+        self.assertEqual([s['label'] for s in response.context['subject_stats']], ['Physics', 'Chemistry'])
@@ -10,5 +10,9 @@ urlpatterns = [
     path('exam/<uuid:session_key>/submit/', views.SubmitExamView.as_view(), name='submit'),
     path('exam/<uuid:session_key>/results/', views.ResultsView.as_view(), name='results'),
     path('exam/<uuid:session_key>/save/', views.SaveProgressView.as_view(), name='save_progress'),
+    path('exam/<uuid:session_key>/telemetry/', views.TelemetryView.as_view(), name='telemetry'),
+    path('exam/<uuid:session_key>/sync/', views.SyncProgressView.as_view(), name='sync_progress'),
+    path('exam/<uuid:session_key>/paper/', views.ExamPaperView.as_view(), name='paper'),
+    path('exam-sw.js', views.ExamServiceWorkerView.as_view(), name='service_worker'),
     path('leaderboard/', views.LeaderboardView.as_view(), name='leaderboard'),
 ]
\ No newline at end of file
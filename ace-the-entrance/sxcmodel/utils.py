@@ -1,9 +1,17 @@
 import random
+
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Cast, Greatest, Least, Round
+
 from .constants import (
     MAX_TIME_SECONDS, QUESTIONS_PER_SECTION,
-    RANDOMIZED_SUBJECTS, ORDERED_SUBJECTS, MARKS_WEIGHT, TIME_WEIGHT
+    RANDOMIZED_SUBJECTS, ORDERED_SUBJECTS,
+    MAX_GRADE, MARKS_WEIGHT, TIME_WEIGHT, NEGATIVE_MARK,
 )
-from .models import Question
+from .models import Question, SubjectResult, SubjectRollup, UserAnswer
+
+MARKS_POINTS = MARKS_WEIGHT * MAX_GRADE   # 80
+TIME_POINTS = TIME_WEIGHT * MAX_GRADE     # 20
 
 
 def build_question_sequence():
@@ -38,34 +46,153 @@ def build_question_sequence():
     return sequence
 
 
+def compute_raw_score(correct, incorrect):
+    return correct - NEGATIVE_MARK * incorrect
+
+
 def compute_final_grade(correct, incorrect, total_questions, time_seconds):
     """
-    final_grade is out of 100.
+    final_grade is out of MAX_GRADE (100), weighted by sxcmodel.constants.
 
-    Marks component (80 pts max):
-      raw_score = correct - 0.25 * incorrect
-      marks_score = (raw_score / total_questions) * 80
-      clamped to [0, 80]
+    Marks component (MARKS_POINTS = 80 pts max):
+      raw_score = correct - NEGATIVE_MARK * incorrect
+      marks_score = (raw_score / total_questions) * MARKS_POINTS
+      clamped to [0, MARKS_POINTS]
 
-    Time bonus component (20 pts max):
+    Time bonus component (TIME_POINTS = 20 pts max):
       time_bonus = max(0, 1 - time_seconds / MAX_TIME_SECONDS)
-      time_score = time_bonus * 20
+      time_score = time_bonus * TIME_POINTS
 
     final_grade = marks_score + time_score
     """
     if total_questions == 0:
         return 0.0
 
-    raw_score = correct - 0.25 * incorrect
-    marks_score = max(0.0, (raw_score / total_questions) * 80)
-    marks_score = min(marks_score, 80.0)
+    raw_score = compute_raw_score(correct, incorrect)
+    marks_score = max(0.0, (raw_score / total_questions) * MARKS_POINTS)
+    marks_score = min(marks_score, MARKS_POINTS)
 
     time_bonus = max(0.0, 1 - time_seconds / MAX_TIME_SECONDS)
-    time_score = time_bonus * 20
+    time_score = time_bonus * TIME_POINTS
 
     return round(marks_score + time_score, 2)
 
 
+def save_answers(attempt, answers):
+    """
+    Upsert { question_id: option } pairs in a single query.  Ids that are
+    not part of this attempt's paper are ignored; anything other than an
+    option number 1–4 is stored as skipped.
+    """
+    if not isinstance(answers, dict):
+        return
+
+    paper = {q_id for section in attempt.question_sequence for q_id in section}
+    rows = []
+    for q_id_str, selected in answers.items():
+        try:
+            q_id = int(q_id_str)
+        except (TypeError, ValueError):
+            continue
+        if q_id not in paper:
+            continue
+        if not (isinstance(selected, int) and 1 <= selected <= 4):
+            selected = None
+        rows.append(UserAnswer(attempt=attempt, question_id=q_id, selected_option=selected))
+
+    if rows:
+        UserAnswer.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['attempt', 'question'],
+            update_fields=['selected_option'],
+        )
+
+
+def raw_score_expression():
+    """
+    SQL twin of compute_raw_score() for set-based rescoring; works on any
+    model with correct_count / incorrect_count (QuizAttempt, SubjectResult).
+    """
+    return Cast(F('correct_count'), FloatField()) - NEGATIVE_MARK * F('incorrect_count')
+
+
+def final_grade_expression():
+    """
+    SQL twin of compute_final_grade() over a QuizAttempt row, so history can
+    be rescored with UPDATE … SET rather than a Python loop.  Both read the
+    same constants; a change to the shape of the formula above must be
+    mirrored here.
+
+    total_questions is correct + incorrect + unattempted, which is exactly
+    the paper length for every finalised attempt.
+    """
+    total = F('correct_count') + F('incorrect_count') + F('unattempted_count')
+    marks = Least(
+        Greatest(raw_score_expression() / Cast(total, FloatField()) * MARKS_POINTS, Value(0.0)),
+        Value(float(MARKS_POINTS)),
+    )
+    time_score = Greatest(
+        1 - Cast(F('total_time_seconds'), FloatField()) / MAX_TIME_SECONDS, Value(0.0)
+    ) * TIME_POINTS
+    return Case(
+        When(correct_count=0, incorrect_count=0, unattempted_count=0, then=Value(0.0)),
+        default=Round(marks + time_score, 2),
+        output_field=FloatField(),
+    )
+
+
+def build_subject_results(attempt, answers):
+    """
+    Unsaved SubjectResult rows for a finished attempt, one per subject on the
+    paper.  `answers` is the attempt's UserAnswer list with question selected;
+    questions that never got a UserAnswer row count as unattempted.
+    """
+    paper = [q_id for section in attempt.question_sequence for q_id in section]
+    results = {}
+    for subject in Question.objects.filter(id__in=paper).values_list('subject', flat=True):
+        result = results.setdefault(subject, SubjectResult(attempt=attempt, subject=subject))
+        result.unattempted_count += 1
+
+    for a in answers:
+        result = results.get(a.question.subject)
+        if result is None:
+            continue
+        result.time_seconds += a.time_taken_seconds
+        if a.selected_option is None:
+            continue
+        result.unattempted_count -= 1
+        if a.selected_option == a.question.correct_option:
+            result.correct_count += 1
+        else:
+            result.incorrect_count += 1
+
+    for result in results.values():
+        result.raw_score = compute_raw_score(result.correct_count, result.incorrect_count)
+    return list(results.values())
+
+
+def add_to_subject_rollups(results):
+    """
+    Fold one attempt's SubjectResult rows into the running SubjectRollup
+    totals.  Each increment is a single UPDATE with F() expressions, so
+    concurrent submissions never lose each other's counts.
+    """
+    SubjectRollup.objects.bulk_create(
+        [SubjectRollup(subject=r.subject) for r in results], ignore_conflicts=True
+    )
+    for r in results:
+        SubjectRollup.objects.filter(subject=r.subject).update(
+            attempt_count=F('attempt_count') + 1,
+            correct_sum=F('correct_sum') + r.correct_count,
+            incorrect_sum=F('incorrect_sum') + r.incorrect_count,
+            score_sum=F('score_sum') + r.raw_score,
+            score_sq_sum=F('score_sq_sum') + r.raw_score * r.raw_score,
+            time_sum=F('time_sum') + r.time_seconds,
+            time_sq_sum=F('time_sq_sum') + r.time_seconds * r.time_seconds,
+        )
+
+
 def get_section_label(subject_code):
     labels = {
         'PHY': 'Physics', 'CHE': 'Chemistry', 'BIO': 'Biology',
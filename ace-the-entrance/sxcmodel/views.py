@@ -1,8 +1,10 @@
 import json
+from datetime import timedelta
 
-from django.core.cache import cache
+from django.db import transaction
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
 from django.utils import timezone
 from django.views import View
 from django.views.generic import ListView, TemplateView
@@ -10,9 +12,13 @@ from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 
 from .mixins import MyLoginRequiredMixin
-from .constants import MAX_TIME_SECONDS
-from .models import Leaderboard, Question, QuizAttempt, UserAnswer
-from .utils import build_question_sequence, compute_final_grade, get_section_label
+from .constants import ALL_SUBJECTS, MAX_TIME_SECONDS, SUBMIT_GRACE_SECONDS
+from .models import Leaderboard, Question, QuizAttempt, SubjectResult, SubjectRollup, UserAnswer
+from . import telemetry
+from .utils import (
+    TIME_POINTS, add_to_subject_rollups, build_question_sequence, build_subject_results,
+    compute_final_grade, compute_raw_score, get_section_label, save_answers,
+)
 
 
 # ---------------------------------------------------------------------------
@@ -25,12 +31,15 @@ class AttemptMixin:
     enforcing that it belongs to the logged-in user.
     require_incomplete=True  → 404 if already completed
     require_completed=True   → 404 if not yet completed
+    for_update=True          → row-locked; call inside transaction.atomic()
     """
     require_incomplete: bool = False
     require_completed: bool = False
 
-    def get_attempt(self, session_key):
+    def get_attempt(self, session_key, for_update=False):
         qs = QuizAttempt.objects.filter(session_key=session_key, user=self.request.user)
+        if for_update:
+            qs = qs.select_for_update()
         if self.require_incomplete:
             qs = qs.filter(is_completed=False)
         if self.require_completed:
@@ -38,11 +47,6 @@ class AttemptMixin:
         return get_object_or_404(qs)
 
 
-def _elapsed_seconds(attempt) -> int:
-    """Wall-clock seconds since attempt started (server-side, cannot be spoofed)."""
-    return int((timezone.now() - attempt.start_time).total_seconds())
-
-
 # ---------------------------------------------------------------------------
 # Dashboard
 # ---------------------------------------------------------------------------
@@ -99,6 +103,7 @@ class StartExamView(MyLoginRequiredMixin, View):
             user=request.user,
             question_sequence=sequence,
             current_section_index=0,
+            deadline=timezone.now() + timedelta(seconds=MAX_TIME_SECONDS),
         )
         return redirect('sxcmodel:section', session_key=attempt.session_key, section_index=0)
 
@@ -109,6 +114,8 @@ class ResumeExamView(MyLoginRequiredMixin, AttemptMixin, View):
 
     def get(self, request, session_key):
         attempt = self.get_attempt(session_key)
+        if attempt.is_expired():
+            return redirect('sxcmodel:submit', session_key=session_key)
         return redirect(
             'sxcmodel:section',
             session_key=attempt.session_key,
@@ -137,10 +144,12 @@ class SectionView(MyLoginRequiredMixin, AttemptMixin, View):
         return [lookup[qid] for qid in ids if qid in lookup]
 
     def _existing_answers(self, attempt, questions):
-        return {
-            ua.question_id: ua.selected_option
-            for ua in UserAnswer.objects.filter(attempt=attempt, question__in=questions)
-        }
+        """({question_id: selected_option}, {question_id: time_taken_seconds})"""
+        answers, times = {}, {}
+        for ua in UserAnswer.objects.filter(attempt=attempt, question__in=questions):
+            answers[ua.question_id] = ua.selected_option
+            times[ua.question_id] = ua.time_taken_seconds
+        return answers, times
 
     # ---- GET -------------------------------------------------------------
 
@@ -148,24 +157,19 @@ class SectionView(MyLoginRequiredMixin, AttemptMixin, View):
         attempt = self.get_attempt(session_key)
         sequence = attempt.question_sequence
 
-        if section_index >= len(sequence):
+        if section_index >= len(sequence) or attempt.is_expired():
             return redirect('sxcmodel:submit', session_key=session_key)
 
-        if attempt.current_section_index != section_index:
+        # The offline service worker pre-fetches every section at exam start;
+        # those fetches must not move the user's resume point.
+        is_precache = request.headers.get('X-Exam-Precache') == '1'
+
+        if attempt.current_section_index != section_index and not is_precache:
             attempt.current_section_index = section_index
             attempt.save(update_fields=['current_section_index'])
 
         questions = self._ordered_questions(attempt, section_index)
-
-        # ── Use cached remaining time if available, else derive from wall clock ──
-        cache_key = f'quiz_remaining_{session_key}'
-        cached_remaining = cache.get(cache_key)
-
-        if cached_remaining is not None:
-            time_remaining = cached_remaining
-        else:
-            elapsed = _elapsed_seconds(attempt)  # ← only needed in this branch
-            time_remaining = max(0, MAX_TIME_SECONDS - elapsed)
+        existing_answers, existing_times = self._existing_answers(attempt, questions)
 
         return render(request, self.template_name, {
             'attempt': attempt,
@@ -176,8 +180,12 @@ class SectionView(MyLoginRequiredMixin, AttemptMixin, View):
             'subject_label': get_section_label(
                 questions[0].subject) if questions else '',
             'is_last_section': section_index == len(sequence) - 1,
-            'existing_answers': self._existing_answers(attempt, questions),
-            'time_remaining': time_remaining,
+            'next_section_index': section_index + 1,
+            'existing_answers': existing_answers,
+            'existing_times': {str(q_id): t for q_id, t in existing_times.items() if t},
+            'time_remaining': attempt.remaining_seconds(),
+            'deadline_ms': int(attempt.deadline.timestamp() * 1000),
+            'is_paused': attempt.is_paused,
             'max_time': MAX_TIME_SECONDS,
             'session_key': str(attempt.session_key),
         })
@@ -187,21 +195,30 @@ class SectionView(MyLoginRequiredMixin, AttemptMixin, View):
         attempt = self.get_attempt(session_key)
         sequence = attempt.question_sequence
 
-        if section_index >= len(sequence):
+        if section_index >= len(sequence) or attempt.is_expired(SUBMIT_GRACE_SECONDS):
             return redirect('sxcmodel:submit', session_key=session_key)
-
-        questions = self._ordered_questions(attempt, section_index)
-        time_taken = int(request.POST.get('time_taken_seconds', 0))
-        per_q_time = time_taken // max(len(questions), 1)
-
-        for question in questions:
-            raw = request.POST.get(f'answer_{question.id}')
-            selected = int(raw) if raw and raw.isdigit() else None
-            UserAnswer.objects.update_or_create(
-                attempt=attempt,
-                question=question,
-                defaults={'selected_option': selected, 'time_taken_seconds': per_q_time},
-            )
+        # Nothing is saved while paused; the page re-renders with the pause
+        # notice and the answers stay queued on the device until it resumes.
+        if attempt.is_paused:
+            return redirect('sxcmodel:section', session_key=session_key, section_index=section_index)
+
+        answers = {}
+        for q_id in sequence[section_index]:
+            raw = request.POST.get(f'answer_{q_id}')
+            answers[q_id] = int(raw) if raw and raw.isdigit() else None
+        save_answers(attempt, answers)
+
+        # Per-question time measured on the page.  Written straight through
+        # (not buffered) so the section's final totals are in place before
+        # SubmitExamView builds the per-subject results.
+        try:
+            timings = json.loads(request.POST.get('timings') or '{}')
+        except json.JSONDecodeError:
+            timings = {}
+        telemetry.write_totals({
+            (attempt.pk, q_id): seconds
+            for q_id, seconds in telemetry.clean_timings(attempt, timings).items()
+        })
 
         next_index = section_index + 1
         if next_index >= len(sequence):
@@ -232,11 +249,21 @@ class SubmitExamView(MyLoginRequiredMixin, AttemptMixin, View):
 
     def _finalise(self, request, session_key):
         attempt = self.get_attempt(session_key)
+        if attempt.is_paused:
+            return redirect(
+                'sxcmodel:section',
+                session_key=session_key,
+                section_index=attempt.current_section_index,
+            )
+        # One transaction with the attempt row locked: a double submit (JS
+        # auto-submit racing the button) waits here, then 404s on
+        # is_completed, so the subject rollups count each attempt once.
+        with transaction.atomic():
+            self._score(request, self.get_attempt(session_key, for_update=True))
+        return redirect('sxcmodel:results', session_key=session_key)
 
-        # ── Clear cached timer — no longer needed after submission ──
-        cache.delete(f'quiz_remaining_{session_key}')
-
-        answers = UserAnswer.objects.filter(attempt=attempt).select_related('question')
+    def _score(self, request, attempt):
+        answers = list(UserAnswer.objects.filter(attempt=attempt).select_related('question'))
         total_questions = sum(len(s) for s in attempt.question_sequence)
 
         correct = sum(1 for a in answers if a.selected_option == a.question.correct_option)
@@ -244,18 +271,24 @@ class SubmitExamView(MyLoginRequiredMixin, AttemptMixin, View):
             1 for a in answers
             if a.selected_option is not None and a.selected_option != a.question.correct_option
         )
-        elapsed = _elapsed_seconds(attempt)
+        # Submits within the grace period (or graded late, after expiry) can run
+        # past the exam length; time beyond it doesn't count.
+        elapsed = min(attempt.elapsed_seconds(), MAX_TIME_SECONDS)
 
         attempt.end_time = timezone.now()
         attempt.correct_count = correct
         attempt.incorrect_count = incorrect
         attempt.unattempted_count = total_questions - correct - incorrect
-        attempt.raw_score = correct - 0.25 * incorrect
+        attempt.raw_score = compute_raw_score(correct, incorrect)
         attempt.total_time_seconds = elapsed
         attempt.final_grade = compute_final_grade(correct, incorrect, total_questions, elapsed)
         attempt.is_completed = True
         attempt.save()
 
+        subject_results = build_subject_results(attempt, answers)
+        SubjectResult.objects.bulk_create(subject_results)
+        add_to_subject_rollups(subject_results)
+
         # --- Update the Leaderboard table (upsert best score) ---
         # Only write if there is no existing entry, or this attempt beats it.
         existing = Leaderboard.objects.filter(user=request.user).first()
@@ -273,8 +306,6 @@ class SubmitExamView(MyLoginRequiredMixin, AttemptMixin, View):
                 },
             )
 
-        return redirect('sxcmodel:results', session_key=session_key)
-
 
 # ---------------------------------------------------------------------------
 # Results
@@ -289,16 +320,39 @@ class ResultsView(MyLoginRequiredMixin, AttemptMixin, TemplateView):
         attempt = self.get_attempt(session_key)
         total_questions = sum(len(s) for s in attempt.question_sequence)
         avg_time = attempt.total_time_seconds / total_questions if total_questions else 0
-        time_bonus = max(0.0, 1 - attempt.total_time_seconds / MAX_TIME_SECONDS) * 20
+        time_bonus = max(0.0, 1 - attempt.total_time_seconds / MAX_TIME_SECONDS) * TIME_POINTS
 
         context = self.get_context_data(
             attempt=attempt,
             total_questions=total_questions,
             avg_time_seconds=int(avg_time),
             speed_bonus=round(time_bonus, 0),
+            subject_stats=self._subject_stats(attempt),
         )
         return self.render_to_response(context)
 
+    @staticmethod
+    def _subject_stats(attempt):
+        """
+        This attempt's per-subject results next to the all-attempt averages.
+        Two small queries (≤ one row per subject each) — no UserAnswer scan.
+        Attempts finalised before subject results existed get an empty list.
+        """
+        rollups = {r.subject: r for r in SubjectRollup.objects.all()}
+        stats = []
+        for result in attempt.subject_results.all():
+            rollup = rollups.get(result.subject)
+            stats.append({
+                'label': get_section_label(result.subject),
+                'result': result,
+                'avg_score': rollup.mean_score if rollup else result.raw_score,
+                'avg_time': int(rollup.mean_time) if rollup else result.time_seconds,
+                'z_score': rollup.score_z(result.raw_score) if rollup else 0.0,
+                'peers': rollup.attempt_count if rollup else 1,
+            })
+        stats.sort(key=lambda s: ALL_SUBJECTS.index(s['result'].subject))
+        return stats
+
 
 # ---------------------------------------------------------------------------
 # Leaderboard
@@ -334,8 +388,9 @@ class LeaderboardView(ListView):
 @method_decorator(csrf_exempt, name='dispatch')
 class SaveProgressView(MyLoginRequiredMixin, AttemptMixin, View):
     """
-    Called every 30 s by the exam JS to persist current answers without
-    navigating away.
+    Called by the exam JS on tab close (sendBeacon) to persist current answers
+    without navigating away.  Rejected once the attempt's deadline (plus a
+    short grace period) has passed, and with 423 while it is paused.
     Body: JSON { "answers": { "<question_id>": <int|null>, … } }
     """
     require_incomplete = True
@@ -343,29 +398,156 @@ class SaveProgressView(MyLoginRequiredMixin, AttemptMixin, View):
 
     def post(self, request, session_key):
         attempt = self.get_attempt(session_key)
+        if attempt.is_expired(SUBMIT_GRACE_SECONDS):
+            return JsonResponse({'error': 'Time is up'}, status=410)
+        if attempt.is_paused:
+            return JsonResponse({'error': 'Paused'}, status=423)
+
+        try:
+            data = json.loads(request.body)
+        except json.JSONDecodeError:
+            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+        save_answers(attempt, data.get('answers', {}))
+
+        return JsonResponse({'status': 'ok'})
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class TelemetryView(MyLoginRequiredMixin, AttemptMixin, View):
+    """
+    Per-question timing batches from the exam page (fetch or sendBeacon).
+    Body: JSON { "t": { "<question_id>": <cumulative seconds>, … } }
+    Only buffered here — see sxcmodel.telemetry — so the cost per request is
+    the attempt lookup plus one append, whatever the number of examinees.
+    """
+    require_incomplete = True
+    http_method_names = ['post']
+
+    def post(self, request, session_key):
+        attempt = self.get_attempt(session_key)
+        if attempt.is_expired(SUBMIT_GRACE_SECONDS):
+            return JsonResponse({'error': 'Time is up'}, status=410)
+        if attempt.is_paused:
+            return JsonResponse({'error': 'Paused'}, status=423)
 
         try:
             data = json.loads(request.body)
         except json.JSONDecodeError:
             return JsonResponse({'error': 'Invalid JSON'}, status=400)
 
-        for q_id_str, selected in data.get('answers', {}).items():
-            try:
-                question = Question.objects.get(pk=int(q_id_str))
-            except (ValueError, Question.DoesNotExist):
+        telemetry.record(attempt.pk, telemetry.clean_timings(attempt, data.get('t')))
+        return JsonResponse({'status': 'ok'})
+
+
+# ---------------------------------------------------------------------------
+# Offline exam mode
+# ---------------------------------------------------------------------------
+
+class SyncProgressView(SaveProgressView):
+    """
+    Replays answer batches queued in IndexedDB by the offline exam client.
+    Body: JSON {
+        "batches": [
+            { "client": "<id>", "seq": <int>, "section": <int>, "answers": { … } }, …
+        ]
+    }
+    Every page load of the exam is its own client with its own id, and its
+    seqs only increase, so (client, seq) is the idempotency key: a batch at
+    or below attempt.sync_seqs[client] has already been applied and is only
+    acknowledged.  Seqs are never compared across clients — a second device
+    or a clock running behind cannot make its batches look like replays.
+    Batches are applied in ascending seq order.  The response's "acked" maps
+    each client in the request to the highest seq applied for it, which
+    tells the client which queued batches it may drop.
+    """
+
+    CLIENT_ID_MAX_LENGTH = 64
+
+    def post(self, request, session_key):
+        attempt = self.get_attempt(session_key)
+        if attempt.is_expired(SUBMIT_GRACE_SECONDS):
+            return JsonResponse({'error': 'Time is up'}, status=410)
+        if attempt.is_paused:
+            return JsonResponse({'error': 'Paused'}, status=423)
+
+        try:
+            data = json.loads(request.body)
+        except json.JSONDecodeError:
+            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+        batches = data.get('batches')
+        if not isinstance(batches, list):
+            return JsonResponse({'error': 'Expected a list of batches'}, status=400)
+
+        valid = []
+        for b in batches:
+            if not (isinstance(b, dict) and isinstance(b.get('seq'), int) and b['seq'] > 0):
                 continue
+            # Batches queued before clients had ids carry none and share the '' slot.
+            client = b.get('client', '')
+            if isinstance(client, str) and len(client) <= self.CLIENT_ID_MAX_LENGTH:
+                valid.append({**b, 'client': client})
+        valid.sort(key=lambda b: b['seq'])
+
+        with transaction.atomic():
+            # Row lock serialises concurrent syncs (interval + reconnect) so a
+            # batch can never be applied twice or out of order.
+            attempt = QuizAttempt.objects.select_for_update().get(pk=attempt.pk)
+
+            merged = {}
+            seqs = dict(attempt.sync_seqs)
+            section = attempt.current_section_index
+            for batch in valid:
+                if batch['seq'] <= seqs.get(batch['client'], 0):
+                    continue
+                if isinstance(batch.get('answers'), dict):
+                    merged.update(batch['answers'])
+                if isinstance(batch.get('section'), int):
+                    section = max(section, batch['section'])
+                seqs[batch['client']] = batch['seq']
+
+            save_answers(attempt, merged)
+
+            if seqs != attempt.sync_seqs:
+                attempt.sync_seqs = seqs
+                attempt.current_section_index = min(section, max(len(attempt.question_sequence) - 1, 0))
+                attempt.save(update_fields=['sync_seqs', 'current_section_index'])
+
+        acked = {b['client']: seqs[b['client']] for b in valid}
+        return JsonResponse({'status': 'ok', 'acked': acked})
+
+
+class ExamPaperView(MyLoginRequiredMixin, AttemptMixin, View):
+    """
+    Manifest of everything the exam needs offline: one URL per section page
+    plus every question diagram.  Fetched once by the service worker at
+    exam start.
+    """
+    require_incomplete = True
 
-            UserAnswer.objects.update_or_create(
-                attempt=attempt,
-                question=question,
-                defaults={'selected_option': selected},
-            )
+    def get(self, request, session_key):
+        attempt = self.get_attempt(session_key)
+        sequence = attempt.question_sequence
+
+        sections = [
+            reverse('sxcmodel:section', kwargs={'session_key': session_key, 'section_index': i})
+            for i in range(len(sequence))
+        ]
+        images = {
+            q.image.url
+            for q in Question.objects
+            .filter(id__in=[q_id for section in sequence for q_id in section])
+            .exclude(image='').exclude(image__isnull=True)
+            .only('id', 'image')
+        }
+        return JsonResponse({'sections': sections, 'images': sorted(images)})
 
-            elapsed = data.get('elapsed')
-            if elapsed is not None:
-                remaining = max(0, MAX_TIME_SECONDS - int(elapsed))
-                cache_key = f'quiz_remaining_{session_key}'
-                cache.set(cache_key, remaining,
-                          timeout=60 * 60 * 24)  # 24 hours
 
-        return JsonResponse({'status': 'ok'})
\ No newline at end of file
+class ExamServiceWorkerView(TemplateView):
+    """
+    Serves the exam service worker from /sxcmodel/ rather than /static/ so
+    its scope covers the exam pages.
+    """
+    template_name = 'sxcmodel/exam_sw.js'
+    content_type = 'application/javascript'
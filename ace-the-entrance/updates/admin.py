@@ -1,4 +1,6 @@
 from django.contrib import admin
+
+from config.images import delete_image
 from .models import Update
 
 
@@ -11,6 +13,16 @@ class UpdateAdmin(admin.ModelAdmin):
     ordering = ('-created_at',)
     readonly_fields = ('created_at', 'updated_at')
 
+    def save_model(self, request, obj, form, change):
+        previous = None
+        if change and 'image' in form.changed_data:
+            previous = Update.objects.filter(pk=obj.pk).values_list('image', flat=True).first()
+        super().save_model(request, obj, form, change)
+        if 'image' in form.changed_data:
+            obj.process_image()
+            if previous:
+                delete_image(obj.image.storage, previous)
+
     fieldsets = (
         ('Content', {
             'fields': ('title', 'category', 'body', 'image')
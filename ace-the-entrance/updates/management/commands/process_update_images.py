@@ -0,0 +1,47 @@
+"""
+Management command to convert update images uploaded before they were
+processed on save: each becomes a WebP of at most 1024 px with thumb and
+medium variants for srcset.
+
+Usage:
+    python manage.py process_update_images
+    python manage.py process_update_images --dry-run
+
+Options:
+    --dry-run   List the updates that would be processed
+"""
+
+from django.core.management.base import BaseCommand
+
+from updates.models import Update
+
+
+class Command(BaseCommand):
+    help = 'Compresses update images and generates their srcset variants'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        pending = list(
+            Update.objects.filter(image_width__isnull=True)
+            .exclude(image='').exclude(image__isnull=True).order_by('pk')
+        )
+
+        if options['dry_run']:
+            for update in pending:
+                self.stdout.write(f"  update {update.pk}: {update.image.name}")
+            self.stdout.write(f"Would process {len(pending)} image(s).")
+            return
+
+        processed = 0
+        for update in pending:
+            try:
+                update.process_image()
+            except Exception as exc:        # missing or unreadable file: leave it as it is
+                self.stderr.write(f"  update {update.pk}: {exc}")
+                continue
+            processed += 1
+            self.stdout.write(f"  update {update.pk}: {update.image.name}")
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} of {len(pending)} image(s)."))
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('updates', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='update',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
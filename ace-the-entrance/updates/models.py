@@ -1,5 +1,9 @@
+import os
+
 from django.db import models
 
+from config.images import encode_image, image_srcset, prepare_image, save_variants
+
 
 class Update(models.Model):
     CATEGORY_CHOICES = [
@@ -18,6 +22,8 @@ class Update(models.Model):
     priority = models.CharField(max_length=10, choices=PRIORITY_CHOICES, default='normal')
     body = models.TextField()
     image = models.ImageField(upload_to='updates/images/', blank=True, null=True)
+    # Set by process_image once the WebP and its srcset variants exist.
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
     is_published = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -28,4 +34,34 @@ class Update(models.Model):
         verbose_name_plural = 'Updates'
 
     def __str__(self):
-        return f"[{self.get_category_display()}] {self.title}"
\ No newline at end of file
+        return f"[{self.get_category_display()}] {self.title}"
+
+    @property
+    def image_srcset(self):
+        return image_srcset(self.image, self.image_width)
+
+    def process_image(self):
+        """
+        Replace the stored upload with a WebP of at most 1024 px plus its
+        thumb/medium variants, the same treatment forum images get, and
+        record the width for srcset.  Called by UpdateAdmin when the image
+        changes, and by process_update_images for older rows.
+        """
+        if not self.image:
+            if self.image_width is not None:
+                self.image_width = None
+                Update.objects.filter(pk=self.pk).update(image_width=None)
+            return
+
+        storage = self.image.storage
+        original = self.image.name
+        with storage.open(original, 'rb') as raw:
+            img = prepare_image(raw)
+        webp = encode_image(img, os.path.basename(original))
+        name = storage.save(self.image.field.generate_filename(self, webp.name), webp)
+        width = save_variants(storage, name, img)
+
+        Update.objects.filter(pk=self.pk).update(image=name, image_width=width)
+        self.image.name = name
+        self.image_width = width
+        storage.delete(original)
\ No newline at end of file